@@ -4,59 +4,65 @@ from tools import (
     get_skills,
     get_projects,
     search_experience,
-    check_availability
+    check_availability,
+    get_portfolio_overview,
+    search_portfolio
 )
+import asyncio
 import logging
-from openai import AsyncOpenAI
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Set
 from decouple import config
+from metrics import metrics
+from invalidation import content_changes, ContentChange
+from portfolio_bundle import portfolio_bundle
+from llm_pool import DEFAULT_BASE_URL, LLMClientPool, configured_api_keys, register_metrics
 
 # Set up logging
 from logging_config import get_logger
 
 logger = get_logger(__name__)
 
+AGENT_BUILD_SECONDS = metrics.histogram(
+    "agent_build_seconds", "Time to construct the portfolio agent, including profile priming", ("personality",)
+)
+
 # 🛑 CRITICAL: Disable OpenAI tracing
 set_tracing_disabled(True)
 
-def init_llm_client() -> AsyncOpenAI:
+def init_llm_client() -> LLMClientPool:
     """
-    Initializes the AsyncOpenAI client with failover support for multiple API keys.
-    Checks GEMINI_API_KEY first, then falls back to GEMINI_API_KEY_2 if the first is missing.
+    Initializes the LLM client pool over every configured API key.
+    Requests go to the key with the fewest in flight and fail over to
+    another key on 429/5xx, so GEMINI_API_KEY_2 and later keys add capacity
+    rather than only standing by (see llm_pool.configured_api_keys).
     """
-    # 1. Try Primary Key
-    api_key = config("GEMINI_API_KEY", default="").strip()
-    key_source = "Primary (GEMINI_API_KEY)"
-
-    # 2. Fallback to Secondary Key if primary is empty
-    if not api_key or api_key.startswith("YOUR_"):
-        logger.warning("⚠️ Primary GEMINI_API_KEY missing, trying backup key...")
-        api_key = config("GEMINI_API_KEY_2", default="").strip()
-        key_source = "Backup (GEMINI_API_KEY_2)"
-
-    base_url = config("GEMINI_BASE_URL", default="https://generativelanguage.googleapis.com/v1beta/openai/")
-    
-    if not api_key or api_key.startswith("YOUR_"):
-        logger.error("❌ No valid GEMINI_API_KEY found! All keys are missing or invalid.")
-    else:
-        logger.info(f"✅ Using {key_source} (starts with: {api_key[:4]}...)")
-
-    logger.info(f"Initializing AsyncOpenAI client with base_url: {base_url}")
-    client = AsyncOpenAI(
-        api_key=api_key,
-        base_url=base_url,
-    )
-    return client
+    base_url = config("GEMINI_BASE_URL", default=DEFAULT_BASE_URL)
+    pool = LLMClientPool(configured_api_keys(), base_url=base_url)
+    register_metrics(pool)
+    return pool
 
 # Gemini Model Definition
 GEMINI_MODEL_NAME = "gemini-2.5-flash"
 
-# Initialize global client and model
+# Initialize global client pool and model
 _client = init_llm_client()
 GEMINI_MODEL = OpenAIChatCompletionsModel(
     model=GEMINI_MODEL_NAME,
     openai_client=_client
 )
 
+
+def get_llm_client() -> LLMClientPool:
+    """The shared LLM client pool, for callers outside the agent (e.g. summaries)."""
+    return _client
+
+
+async def open_llm_connection(timeout: float = 5.0) -> None:
+    """Open (and pool) each key's connection with a cheap authenticated request."""
+    await _client.warm(timeout=timeout)
+
 # Personality configurations
 PERSONALITY_INSTRUCTIONS = {
     "crisp": """You are a concise AI assistant representing a professional portfolio.
@@ -89,22 +95,24 @@ STYLE RULES:
 }
 
 
-def create_portfolio_agent(personality: str = "clear") -> Agent:
-    """Create a portfolio agent with specified personality and real-time identity."""
+def _personality(personality: str) -> str:
+    return personality if personality in PERSONALITY_INSTRUCTIONS else "clear"
+
 
+async def build_instructions(personality: str = "clear") -> str:
+    """Build the full instructions for a personality, primed with the current profile."""
     # 1. Fetch core identity from Sanity to 'prime' the agent's memory
     # We use the tool's logic directly to ensure consistency
     try:
-        from tools import get_profile
-        # get_profile is a FunctionTool object, call the underlying function .fn()
-        profile_info = get_profile.fn() if hasattr(get_profile, 'fn') else get_profile()
+        from tools import fetch_profile
+        profile_info = await fetch_profile()
     except Exception as e:
         logger.error(f"Error fetching profile for agent initialization: {e}")
         profile_info = "Profile information unavailable."
 
-    base_personality = PERSONALITY_INSTRUCTIONS.get(personality, PERSONALITY_INSTRUCTIONS["clear"])
+    base_personality = PERSONALITY_INSTRUCTIONS[_personality(personality)]
 
-    full_instructions = f"""{base_personality}
+    return f"""{base_personality}
 
 YOUR IDENTITY (FROM SANITY CMS):
 {profile_info}
@@ -114,21 +122,129 @@ IMPORTANT GUIDELINES:
 2. ALWAYS use the tools to fetch real-time lists of skills, specific projects, or recent experience.
 3. Never make up information - if the provided identity or tools don't have it, say you don't know.
 4. If asked about availability, services, or pricing, use the check_availability tool.
+5. For broad questions (e.g. "tell me about yourself"), call get_portfolio_overview once with the sections you need instead of calling several tools one after another.
+6. For specific free-form questions that no single tool covers (e.g. "what did clients say about code quality?"), use search_portfolio to find the relevant passages.
     """
 
-    agent = Agent(
+
+def _make_agent(instructions: str) -> Agent:
+    return Agent(
         name="Portfolio AI Assistant",
-        instructions=full_instructions,
+        instructions=instructions,
         model=GEMINI_MODEL,
         tools=[
             get_profile,
             get_skills,
             get_projects,
             search_experience,
-            check_availability
+            check_availability,
+            get_portfolio_overview,
+            search_portfolio
         ]
     )
 
-    logger.debug(f"Agent full instructions: {full_instructions}")
-    logger.info(f"Portfolio agent refreshed with Sanity background. Personality: {personality}")
-    return agent
\ No newline at end of file
+
+@dataclass
+class _CachedAgent:
+    agent: Agent
+    instructions: str
+    # Bundle version the profile was read from
+    version: Optional[str]
+
+
+class PortfolioAgentCache:
+    """
+    One agent per personality, reused across turns.
+
+    A cached agent is returned immediately. When the profile may have
+    changed (a newer portfolio bundle, or a published profile change) it is
+    rebuilt in a background task and swapped in once ready, so building never
+    sits on the request path after the first use. A rebuild whose
+    instructions come out unchanged keeps the existing agent.
+    """
+
+    def __init__(self):
+        self._agents: Dict[str, _CachedAgent] = {}
+        self._builds: Dict[str, asyncio.Task] = {}
+        self._dirty: Set[str] = set()
+        self.hits = 0
+        self.builds = 0
+
+    async def get(self, personality: str = "clear") -> Agent:
+        """Return the agent for a personality, building it only on first use."""
+        personality = _personality(personality)
+        cached = self._agents.get(personality)
+        if cached is None:
+            return (await self._build_task(personality)).agent
+        self.hits += 1
+        if self._outdated(personality, cached):
+            self._build_task(personality)
+        return cached.agent
+
+    async def current(self, personality: str = "clear") -> Agent:
+        """
+        Return an agent built from the current profile, waiting for any
+        pending rebuild instead of serving the cached agent meanwhile.
+        """
+        personality = _personality(personality)
+        task = self._builds.get(personality)
+        cached = await task if task is not None else self._agents.get(personality)
+        while cached is None or self._outdated(personality, cached):
+            cached = await self._build_task(personality)
+        return cached.agent
+
+    def _outdated(self, personality: str, cached: _CachedAgent) -> bool:
+        if personality in self._dirty:
+            return True
+        bundle = portfolio_bundle.current
+        return bundle is not None and bundle.version != cached.version
+
+    def _build_task(self, personality: str) -> asyncio.Task:
+        """The in-flight build for a personality; concurrent callers share it."""
+        task = self._builds.get(personality)
+        if task is None:
+            task = asyncio.create_task(self._rebuild(personality))
+            self._builds[personality] = task
+            task.add_done_callback(lambda _: self._builds.pop(personality, None))
+        return task
+
+    async def _rebuild(self, personality: str) -> _CachedAgent:
+        started = time.perf_counter()
+        self._dirty.discard(personality)
+        instructions = await build_instructions(personality)
+        bundle = portfolio_bundle.current
+        version = bundle.version if bundle is not None else None
+
+        cached = self._agents.get(personality)
+        if cached is not None and cached.instructions == instructions:
+            cached.version = version
+            return cached
+
+        cached = _CachedAgent(_make_agent(instructions), instructions, version)
+        self._agents[personality] = cached
+        self.builds += 1
+        AGENT_BUILD_SECONDS.observe(time.perf_counter() - started, personality=personality)
+        logger.debug(f"Agent full instructions: {instructions}")
+        logger.info(f"Portfolio agent built for personality '{personality}' (bundle version {version})")
+        return cached
+
+    async def warm(self) -> None:
+        """Build every personality's agent ahead of the first turn."""
+        await asyncio.gather(*(self._build_task(p) for p in PERSONALITY_INSTRUCTIONS), return_exceptions=True)
+
+    def on_content_change(self, change: ContentChange) -> None:
+        if change.doc_type not in (None, "profile"):
+            return
+        self._dirty.update(self._agents)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # Rebuilt on the next get()
+            return
+        for personality in list(self._agents):
+            self._build_task(personality)
+
+
+# Global agent cache, refreshed when the profile changes
+agent_cache = PortfolioAgentCache()
+content_changes.subscribe(agent_cache.on_content_change)
@@ -0,0 +1,95 @@
+"""
+Benchmark: local GROQ engine vs the Sanity HTTP API for the tool queries.
+
+Runs every tool in tools.py against the local mirror (01_Frontend/Data by
+default) and, with --http, against the live Sanity API with the result
+cache cleared before each call so every call is a real round trip.
+
+    python benchmarks/bench_groq_engine.py [--iterations 200] [--http]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import logging
+logging.disable(logging.CRITICAL)
+
+from agents.tool_context import ToolContext
+
+import tools
+from cache_config import query_cache
+from document_store import document_store, DEFAULT_EXPORT_PATH, MIRROR_PATH
+from groq_engine import compile_query, _compile_normalized
+from sanity_client import close_sanity_clients
+
+TOOL_CALLS = [
+    ("get_profile", tools.fetch_profile, {}),
+    ("get_skills", tools.get_skills, {}),
+    ("get_skills(frontend)", tools.get_skills, {"category": "frontend"}),
+    ("get_projects", tools.get_projects, {}),
+    ("search_experience(Tech)", tools.search_experience, {"query_param": "Tech"}),
+    ("check_availability", tools.check_availability, {}),
+]
+
+
+async def _call(tool, args):
+    if not hasattr(tool, "on_invoke_tool"):
+        return await tool(**args)
+    payload = json.dumps(args)
+    ctx = ToolContext(context=None, tool_name=tool.name, tool_call_id="bench", tool_arguments=payload)
+    return await tool.on_invoke_tool(ctx, payload)
+
+
+async def _time(tool, args, iterations: int, clear_cache: bool) -> list:
+    samples = []
+    for _ in range(iterations):
+        if clear_cache:
+            query_cache.invalidate()
+        started = time.perf_counter()
+        await _call(tool, args)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def _report(label: str, samples: list) -> str:
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return f"{label:<28} p50={statistics.median(samples):9.3f}ms  p95={p95:9.3f}ms"
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--http", action="store_true", help="Also time the live Sanity HTTP path")
+    args = parser.parse_args()
+
+    document_store.load(MIRROR_PATH or DEFAULT_EXPORT_PATH)
+
+    # Compile cost (first call) vs cached plan reuse
+    _compile_normalized.cache_clear()
+    started = time.perf_counter()
+    compile_query('*[_type == "skill" && !(_id in path("drafts.**"))] | order(percentage desc){name}')
+    print(f"compile (cold plan)          {(time.perf_counter() - started) * 1000:9.3f}ms\n")
+
+    print("Local mirror (GROQ engine):")
+    document_store.serving = True
+    for label, tool, tool_args in TOOL_CALLS:
+        print("  " + _report(label, await _time(tool, tool_args, args.iterations, clear_cache=False)))
+
+    if args.http:
+        print("\nSanity HTTP API (cache cleared per call):")
+        document_store.serving = False
+        http_iterations = max(5, args.iterations // 20)
+        for label, tool, tool_args in TOOL_CALLS:
+            print("  " + _report(label, await _time(tool, tool_args, http_iterations, clear_cache=True)))
+        await close_sanity_clients()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,81 @@
+"""
+Benchmark: tokens per tool response for each tool output format.
+
+Renders every tool from the local mirror (01_Frontend/Data by default) in
+each TOOL_OUTPUT_FORMAT and reports tokens and characters per response,
+plus the total for a turn that calls every tool once. Token budgets are
+lifted so the full responses are compared; pass --paged to apply them.
+
+    python benchmarks/bench_tool_formats.py [--paged] [--show tsv]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import logging
+logging.disable(logging.CRITICAL)
+
+from document_store import DocumentStore, DEFAULT_EXPORT_PATH, MIRROR_PATH
+from groq_engine import evaluate
+from portfolio_bundle import BUNDLE_QUERY, PortfolioBundle
+from token_budget import TIKTOKEN_AVAILABLE, count_tokens
+from tool_formats import FORMATS
+
+TOOL_NAMES = ("get_skills", "get_projects", "search_experience")
+UNLIMITED_BUDGET = "1000000"
+
+
+def tool_calls(bundle):
+    import tools
+
+    return [
+        ("get_profile", lambda fmt: tools._format_profile(bundle.profile, fmt=fmt)),
+        ("get_skills", lambda fmt: tools._format_skills(bundle.skills(), None, fmt=fmt)),
+        ("get_skills(frontend)", lambda fmt: tools._format_skills(bundle.skills("frontend"), "frontend", fmt=fmt)),
+        ("get_projects", lambda fmt: tools._format_projects(bundle.projects(), False, fmt=fmt)),
+        ("search_experience", lambda fmt: tools._format_experience(bundle.experience(), None, fmt=fmt)),
+        ("check_availability", lambda fmt: tools._format_availability(bundle.availability, fmt=fmt)),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--paged", action="store_true", help="Apply the per-tool token budgets")
+    parser.add_argument("--show", choices=FORMATS, help="Print every response in this format")
+    args = parser.parse_args()
+
+    if not args.paged:
+        for name in TOOL_NAMES:
+            os.environ[f"TOOL_TOKEN_BUDGET_{name.upper()}"] = UNLIMITED_BUDGET
+
+    store = DocumentStore()
+    store.load(MIRROR_PATH or DEFAULT_EXPORT_PATH)
+    bundle = PortfolioBundle(evaluate(BUNDLE_QUERY.text, store))
+
+    counter = "tiktoken o200k_base" if TIKTOKEN_AVAILABLE else "chars/4 estimate"
+    print(f"Tokens per response ({counter}); characters in parentheses\n")
+    print(f"{'tool':<24}" + "".join(f"{fmt:>18}" for fmt in FORMATS))
+
+    totals = {fmt: 0 for fmt in FORMATS}
+    shown = []
+    for label, render in tool_calls(bundle):
+        cells = []
+        for fmt in FORMATS:
+            text = render(fmt)
+            tokens = count_tokens(text)
+            totals[fmt] += tokens
+            cells.append(f"{tokens:>9} ({len(text):>5})")
+            if fmt == args.show:
+                shown.append(f"--- {label} ({fmt}) ---\n{text}\n")
+        print(f"{label:<24}" + "".join(f"{cell:>18}" for cell in cells))
+
+    print(f"\n{'turn total':<24}" + "".join(f"{totals[fmt]:>18}" for fmt in FORMATS))
+    print(f"{'vs prose':<24}" + "".join(f"{totals[fmt] / totals[FORMATS[0]]:>17.0%} " for fmt in FORMATS))
+    for text in shown:
+        print(f"\n{text}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,15 @@
-from typing import Optional
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+from decouple import config
+import json
+import re
+import threading
 import time
 
+from invalidation import content_changes
+from metrics import metrics
+
 
 class SanityCacheManager:
     """
@@ -9,10 +18,19 @@ class SanityCacheManager:
     """
 
     def __init__(self):
-        self.default_ttl = 300  # 5 minutes default TTL
+        self.default_ttl = config("SANITY_CACHE_TTL", default=300, cast=int)  # 5 minutes default TTL
+        self.max_entries = config("SANITY_CACHE_MAX_ENTRIES", default=256, cast=int)
         self.cache_headers = {
             "Cache-Control": "public, max-age=300, stale-while-revalidate=60"
         }
+        # Per-document-type TTLs; portfolio content rarely changes, availability does
+        self.type_ttls: Dict[str, int] = {
+            "profile": self.default_ttl,
+            "service": self.default_ttl * 3,
+            "skill": self.default_ttl * 6,
+            "project": self.default_ttl * 6,
+            "experience": self.default_ttl * 6,
+        }
 
     def get_cache_headers(self, ttl: Optional[int] = None) -> dict:
         """
@@ -25,12 +43,29 @@ class SanityCacheManager:
             Dictionary of cache headers
         """
         actual_ttl = ttl or self.default_ttl
-        stale_revalidate = min(actual_ttl // 2, 300)  # Half of TTL or max 5 mins
+        stale_revalidate = self.get_stale_window(actual_ttl)
 
         return {
             "Cache-Control": f"public, max-age={actual_ttl}, stale-while-revalidate={stale_revalidate}"
         }
 
+    def get_stale_window(self, ttl: int) -> int:
+        """Seconds a stale entry may still be served while it is refreshed."""
+        return min(ttl // 2, 300)  # Half of TTL or max 5 mins
+
+    def get_ttl(self, doc_types: Iterable[str] = ()) -> int:
+        """
+        Get the TTL for a query touching the given document types.
+
+        Args:
+            doc_types: Document `_type`s referenced by the query
+
+        Returns:
+            The shortest TTL among the types, or the default TTL
+        """
+        ttls = [self.type_ttls.get(doc_type, self.default_ttl) for doc_type in doc_types]
+        return min(ttls) if ttls else self.default_ttl
+
     def should_bust_cache(self, last_updated: Optional[float] = None, threshold: int = 300) -> bool:
         """
         Determine if cache should be busted based on last update time.
@@ -49,5 +84,189 @@ class SanityCacheManager:
         return (current_time - last_updated) < threshold
 
 
+FRESH = "fresh"
+STALE = "stale"
+MISS = "miss"
+
+_STRING_LITERAL = re.compile(r'("(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\')')
+_TYPE_FILTER = re.compile(r'_type\s*==\s*["\']([^"\']+)["\']')
+_DEREFERENCE = re.compile(r'(\w+)(?:\[\])?\s*->')
+
+# Reference fields and the `_type` they point to (see 01_Frontend/sanity/schemaTypes);
+# a query dereferencing one depends on that type too
+REFERENCE_TYPES = {
+    "technologies": "skill",
+}
+
+
+def normalize_query(query: str) -> str:
+    """Collapse whitespace outside string literals so formatting does not change cache keys."""
+    parts = _STRING_LITERAL.split(query)
+    for i in range(0, len(parts), 2):
+        parts[i] = re.sub(r"\s+", " ", parts[i])
+    return "".join(parts).strip()
+
+
+def extract_doc_types(query: str) -> frozenset:
+    """Return the `_type`s a GROQ query filters on or dereferences."""
+    code = "".join(_STRING_LITERAL.split(query)[::2])
+    referenced = {REFERENCE_TYPES[field] for field in _DEREFERENCE.findall(code) if field in REFERENCE_TYPES}
+    return frozenset(_TYPE_FILTER.findall(query)) | referenced
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    doc_types: frozenset
+    fetched_at: float
+    expires_at: float
+    stale_until: float
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    stale_hits: int = 0
+    misses: int = 0
+    refreshes: int = 0
+    refresh_errors: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+    fallbacks: int = 0
+
+    def as_dict(self) -> dict:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "fallbacks": self.fallbacks,
+            "hit_ratio": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+        }
+
+
+class QueryResultCache:
+    """
+    Bounded LRU cache of GROQ query results with per-type TTLs and
+    stale-while-revalidate, driven by a SanityCacheManager.
+
+    Entries are fresh until their TTL, then served stale (while the caller
+    refreshes them in the background) for the manager's stale window.
+    Expired entries stay in the LRU as a last-known-good fallback for when
+    Sanity cannot be reached, until they are evicted or invalidated.
+    """
+
+    def __init__(self, manager: SanityCacheManager, max_entries: Optional[int] = None):
+        self.manager = manager
+        self.max_entries = max_entries or manager.max_entries
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(query: str, params: Optional[dict] = None, use_cdn: bool = True) -> Tuple:
+        """Build a cache key from normalized query text, params and the CDN/live choice."""
+        params_key = json.dumps(params or {}, sort_keys=True, default=str)
+        return (normalize_query(query), params_key, use_cdn)
+
+    def lookup(self, key: Hashable) -> Tuple[Optional[CacheEntry], str]:
+        """
+        Look up a key.
+
+        Returns:
+            Tuple of (entry, state) where state is FRESH, STALE or MISS
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or now >= entry.stale_until:
+                self.stats.misses += 1
+                return None, MISS
+
+            self._entries.move_to_end(key)
+            if now < entry.expires_at:
+                self.stats.hits += 1
+                return entry, FRESH
+
+            self.stats.stale_hits += 1
+            return entry, STALE
+
+    def last_known(self, key: Hashable) -> Optional[CacheEntry]:
+        """Return the entry for a key regardless of age (for serving while Sanity is failing)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.stats.fallbacks += 1
+            return entry
+
+    def store(self, key: Hashable, value: Any, doc_types: Iterable[str] = ()) -> CacheEntry:
+        """Store a result, evicting least recently used entries beyond max_entries."""
+        doc_types = frozenset(doc_types)
+        ttl = self.manager.get_ttl(doc_types)
+        now = time.time()
+        entry = CacheEntry(
+            value=value,
+            doc_types=doc_types,
+            fetched_at=now,
+            expires_at=now + ttl,
+            stale_until=now + ttl + self.manager.get_stale_window(ttl),
+        )
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+        return entry
+
+    def invalidate(self, doc_type: Optional[str] = None) -> int:
+        """
+        Drop cached results.
+
+        Args:
+            doc_type: Only drop results touching this `_type` (plus results whose
+                types are unknown). If None, drop everything.
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            if doc_type is None:
+                keys = list(self._entries)
+            else:
+                keys = [
+                    key for key, entry in self._entries.items()
+                    if not entry.doc_types or doc_type in entry.doc_types
+                ]
+            for key in keys:
+                del self._entries[key]
+            self.stats.invalidations += len(keys)
+        return len(keys)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
 # Global cache manager instance
-cache_manager = SanityCacheManager()
\ No newline at end of file
+cache_manager = SanityCacheManager()
+
+# Global GROQ result cache used by sanity_client
+query_cache = QueryResultCache(cache_manager)
+
+metrics.callback(
+    "sanity_cache_lookups_total", "Query result cache lookups by outcome", "counter",
+    lambda: {(outcome,): getattr(query_cache.stats, outcome) for outcome in ("hits", "stale_hits", "misses", "fallbacks")},
+    ("outcome",),
+)
+metrics.callback(
+    "sanity_cache_hit_ratio", "Share of cache lookups served fresh or stale", "gauge",
+    lambda: {(): query_cache.stats.as_dict()["hit_ratio"]},
+)
+metrics.callback("sanity_cache_entries", "Query results currently cached", "gauge", lambda: {(): len(query_cache)})
+
+# Drop affected results whenever Sanity content changes
+content_changes.subscribe(lambda change: query_cache.invalidate(change.doc_type))
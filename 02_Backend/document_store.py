@@ -0,0 +1,224 @@
+"""
+Local in-memory mirror of the portfolio dataset.
+Loads Sanity NDJSON exports (the files in 01_Frontend/Data, or the
+tarball produced by `sanity dataset export`) into per-`_type` and
+per-`_id` indexes so portfolio data can be served without network hops.
+"""
+import json
+import os
+import tarfile
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set
+from decouple import config
+
+# Set up logging
+from logging_config import get_logger
+logger = get_logger(__name__)
+
+DEFAULT_EXPORT_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "01_Frontend", "Data"
+)
+
+# Path to an NDJSON file, a directory of NDJSON files or a dataset export tarball
+MIRROR_PATH = config("SANITY_MIRROR_PATH", default="")
+# Offline mode never talks to Sanity; all data comes from the mirror
+OFFLINE_MODE = config("SANITY_OFFLINE", default=False, cast=bool)
+# Answer GROQ queries from the mirror once it is loaded (always in offline mode). Keep this off
+# unless the listener (SANITY_LISTEN_ENABLED) or webhooks keep the mirror up to date
+SERVE_FROM_MIRROR = config("SANITY_SERVE_FROM_MIRROR", default=False, cast=bool)
+
+
+class DocumentStore:
+    """
+    In-memory index of Sanity documents.
+
+    Documents are indexed by `_id` and by `_type` (in load order), and every
+    `{"_ref": ...}` is resolved at load time into reference indexes so
+    dereferencing is a dict lookup and reverse dependencies are known.
+    """
+
+    def __init__(self):
+        self.by_id: Dict[str, dict] = {}
+        self.by_type: Dict[str, Dict[str, dict]] = defaultdict(dict)
+        self.references: Dict[str, Set[str]] = {}
+        self.referenced_by: Dict[str, Set[str]] = defaultdict(set)
+        self.source: Optional[str] = None
+        self.loaded_at: Optional[float] = None
+        # When True, sanity_client evaluates queries locally instead of over HTTP
+        self.serving = False
+        self._lock = threading.RLock()
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def load(self, path: str) -> int:
+        """
+        Replace the store contents with an export.
+
+        Args:
+            path: An .ndjson file, a directory of .ndjson files, or a
+                `sanity dataset export` .tar.gz containing data.ndjson
+
+        Returns:
+            Number of documents loaded
+        """
+        started = time.perf_counter()
+        documents = list(self._read_export(path))
+        with self._lock:
+            self.clear()
+            for doc in documents:
+                self._index(doc)
+            self.source = path
+            self.loaded_at = time.time()
+
+        dangling = self.dangling_references()
+        if dangling:
+            logger.warning(f"Mirror has {len(dangling)} unresolved references: {sorted(dangling)[:5]}")
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        logger.info(f"Loaded {len(self.by_id)} Sanity documents from {path} in {elapsed_ms:.1f}ms")
+        return len(self.by_id)
+
+    def _read_export(self, path: str) -> Iterable[dict]:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.endswith(".ndjson"):
+                    yield from self._read_export(os.path.join(path, name))
+        elif path.endswith((".tar.gz", ".tgz")):
+            with tarfile.open(path, "r:gz") as archive:
+                for member in archive.getmembers():
+                    if member.isfile() and os.path.basename(member.name) == "data.ndjson":
+                        yield from self._parse_lines(archive.extractfile(member).read().decode().splitlines())
+        else:
+            with open(path, encoding="utf-8") as f:
+                yield from self._parse_lines(f)
+
+    @staticmethod
+    def _parse_lines(lines: Iterable[str]) -> Iterable[dict]:
+        for line in lines:
+            line = line.strip()
+            if line:
+                doc = json.loads(line)
+                if isinstance(doc, dict) and doc.get("_id") and doc.get("_type"):
+                    yield doc
+
+    def clear(self) -> None:
+        with self._lock:
+            self.by_id.clear()
+            self.by_type.clear()
+            self.references.clear()
+            self.referenced_by.clear()
+
+    # ------------------------------------------------------------------
+    # Incremental updates
+    # ------------------------------------------------------------------
+
+    def upsert(self, doc: dict) -> None:
+        """Insert or replace a single document, keeping all indexes consistent."""
+        with self._lock:
+            self._unindex(doc["_id"])
+            self._index(doc)
+
+    def delete(self, doc_id: str) -> Optional[dict]:
+        """Remove a document; returns it if it existed."""
+        with self._lock:
+            return self._unindex(doc_id)
+
+    def _index(self, doc: dict) -> None:
+        doc_id = doc["_id"]
+        if doc_id in self.by_id:
+            self._unindex(doc_id)
+        self.by_id[doc_id] = doc
+        self.by_type[doc["_type"]][doc_id] = doc
+        refs = set(_collect_refs(doc))
+        self.references[doc_id] = refs
+        for ref in refs:
+            self.referenced_by[ref].add(doc_id)
+
+    def _unindex(self, doc_id: str) -> Optional[dict]:
+        doc = self.by_id.pop(doc_id, None)
+        if doc is None:
+            return None
+        self.by_type[doc["_type"]].pop(doc_id, None)
+        for ref in self.references.pop(doc_id, ()):
+            self.referenced_by[ref].discard(doc_id)
+        return doc
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    def get(self, doc_id: str) -> Optional[dict]:
+        return self.by_id.get(doc_id)
+
+    def documents(self, doc_type: Optional[str] = None) -> List[dict]:
+        """All documents, or all documents of one `_type`, in load order."""
+        if doc_type is None:
+            return list(self.by_id.values())
+        return list(self.by_type.get(doc_type, {}).values())
+
+    def deref(self, value: Any) -> Any:
+        """Resolve a `{"_ref": id}` object to its document (None if missing)."""
+        if isinstance(value, dict) and "_ref" in value:
+            return self.by_id.get(value["_ref"])
+        return None
+
+    def dependents(self, doc_id: str) -> Set[str]:
+        """IDs of documents that reference `doc_id`."""
+        return set(self.referenced_by.get(doc_id, ()))
+
+    def dangling_references(self) -> Set[str]:
+        return {ref for ref, sources in self.referenced_by.items() if sources and ref not in self.by_id}
+
+    def status(self) -> dict:
+        return {
+            "loaded": self.is_loaded,
+            "serving": self.serving,
+            "offline": OFFLINE_MODE,
+            "source": self.source,
+            "documents": len(self.by_id),
+            "types": {doc_type: len(docs) for doc_type, docs in self.by_type.items() if docs},
+        }
+
+
+def _collect_refs(value: Any) -> Iterable[str]:
+    if isinstance(value, dict):
+        if "_ref" in value:
+            yield value["_ref"]
+        for child in value.values():
+            yield from _collect_refs(child)
+    elif isinstance(value, list):
+        for child in value:
+            yield from _collect_refs(child)
+
+
+def load_configured_mirror() -> bool:
+    """
+    Load the mirror at startup if configured.
+
+    SANITY_MIRROR_PATH selects the export; offline mode without a path falls
+    back to the NDJSON files shipped in 01_Frontend/Data.
+
+    Returns:
+        True if a mirror was loaded
+    """
+    path = MIRROR_PATH or (DEFAULT_EXPORT_PATH if OFFLINE_MODE else "")
+    if not path:
+        return False
+    try:
+        document_store.load(path)
+        document_store.serving = SERVE_FROM_MIRROR or OFFLINE_MODE
+        return True
+    except (OSError, ValueError, tarfile.TarError) as e:
+        logger.error(f"Failed to load Sanity mirror from {path}: {e}")
+        return False
+
+
+# Global document mirror
+document_store = DocumentStore()
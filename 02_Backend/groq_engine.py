@@ -0,0 +1,695 @@
+"""
+GROQ subset evaluator for the local document mirror.
+Compiles the GROQ the tools actually use into reusable query plans
+(Python closures) and runs them against a DocumentStore.
+
+Supported: `*`, filters, `[n]` / `[a..b]` / `[a...b]` slices, `[]` traversal,
+`->` dereferences, attribute access, projections (with aliases and `...`),
+object and array literals, `$params`, `==` `!=` `<` `<=` `>` `>=` `in`
+`match` `&&` `||` `!`, `path()`, `defined()`, `count()`, `coalesce()`,
+`lower()`, `upper()`, `references()`, and `| order(... asc|desc)`.
+Anything else raises GroqUnsupportedError so callers can fall back to HTTP.
+"""
+import fnmatch
+import functools
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from cache_config import normalize_query
+
+
+class GroqUnsupportedError(ValueError):
+    """Raised for syntax outside the supported GROQ subset."""
+
+
+# ----------------------------------------------------------------------
+# Tokenizer
+# ----------------------------------------------------------------------
+
+_TOKEN_SPEC = [
+    ("WS", r"\s+"),
+    ("COMMENT", r"//[^\n]*"),
+    ("NUMBER", r"\d+(?:\.\d+)?"),
+    ("STRING", r'"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\''),
+    ("PARAM", r"\$[A-Za-z_][A-Za-z0-9_]*"),
+    ("IDENT", r"[A-Za-z_][A-Za-z0-9_]*"),
+    ("OP", r"\.\.\.|\.\.|->|==|!=|<=|>=|&&|\|\||[\[\]{}(),:.|*@^!<>+\-]"),
+]
+_TOKEN_RE = re.compile("|".join(f"(?P<{name}>{pattern})" for name, pattern in _TOKEN_SPEC))
+
+
+@dataclass
+class Token:
+    kind: str
+    value: str
+    pos: int
+
+
+def tokenize(query: str) -> List[Token]:
+    tokens = []
+    pos = 0
+    while pos < len(query):
+        m = _TOKEN_RE.match(query, pos)
+        if not m:
+            raise GroqUnsupportedError(f"Unexpected character {query[pos]!r} at {pos}")
+        kind = m.lastgroup
+        if kind not in ("WS", "COMMENT"):
+            tokens.append(Token(kind, m.group(), pos))
+        pos = m.end()
+    tokens.append(Token("EOF", "", pos))
+    return tokens
+
+
+def _unquote(literal: str) -> str:
+    body = literal[1:-1]
+    return re.sub(r"\\(.)", lambda m: {"n": "\n", "t": "\t"}.get(m.group(1), m.group(1)), body)
+
+
+# ----------------------------------------------------------------------
+# Evaluation scope and value semantics
+# ----------------------------------------------------------------------
+
+class Scope:
+    __slots__ = ("store", "params", "this", "parent", "element")
+
+    def __init__(self, store, params: dict, this: Any = None, parent: "Optional[Scope]" = None,
+                 element: Any = None):
+        self.store = store
+        self.params = params
+        self.this = this
+        self.parent = parent
+        self.element = element
+
+    def nested(self, this: Any) -> "Scope":
+        return Scope(self.store, self.params, this, self)
+
+    def with_element(self, element: Any) -> "Scope":
+        return Scope(self.store, self.params, self.this, self.parent, element)
+
+
+class PathPattern:
+    """Result of path("..."): `*` matches one segment, `**` any number."""
+
+    def __init__(self, pattern: str):
+        self.pattern = pattern
+        regex = re.escape(pattern).replace(r"\*\*", ".*").replace(r"\*", r"[^.]*")
+        self.regex = re.compile(f"^{regex}$")
+
+    def matches(self, value: Any) -> bool:
+        return isinstance(value, str) and bool(self.regex.match(value))
+
+
+def _same_type(a: Any, b: Any) -> bool:
+    return isinstance(a, bool) == isinstance(b, bool)
+
+
+def _equals(a: Any, b: Any) -> bool:
+    return _same_type(a, b) and a == b
+
+
+def _compare(a: Any, b: Any, op: str) -> Optional[bool]:
+    numeric = (int, float)
+    comparable = (
+        (isinstance(a, numeric) and isinstance(b, numeric) and _same_type(a, b))
+        or (isinstance(a, str) and isinstance(b, str))
+    )
+    if not comparable:
+        return None
+    return {"<": a < b, "<=": a <= b, ">": a > b, ">=": a >= b}[op]
+
+
+def _and(a: Any, b: Any) -> Optional[bool]:
+    if a is False or b is False:
+        return False
+    if a is True and b is True:
+        return True
+    return None
+
+
+def _or(a: Any, b: Any) -> Optional[bool]:
+    if a is True or b is True:
+        return True
+    if a is False and b is False:
+        return False
+    return None
+
+
+_MATCH_TOKEN = re.compile(r"[\w*]+", re.UNICODE)
+
+
+@functools.lru_cache(maxsize=512)
+def _match_patterns(pattern: str) -> Tuple[Any, ...]:
+    return tuple(
+        re.compile(fnmatch.translate(token)) for token in _MATCH_TOKEN.findall(pattern.lower())
+    )
+
+
+def match_text(text: Any, pattern: Any) -> bool:
+    """GROQ `match`: every pattern token must match some token of the text."""
+    texts = text if isinstance(text, list) else [text]
+    patterns = pattern if isinstance(pattern, list) else [pattern]
+    words = set()
+    for t in texts:
+        if isinstance(t, str):
+            words.update(_MATCH_TOKEN.findall(t.lower().replace("*", " ")))
+    regexes = []
+    for p in patterns:
+        if not isinstance(p, str):
+            return False
+        regexes.extend(_match_patterns(p))
+    if not regexes or not words:
+        return False
+    return all(any(r.match(w) for w in words) for r in regexes)
+
+
+def _order_rank(value: Any) -> int:
+    if isinstance(value, bool):
+        return 0
+    if isinstance(value, (int, float)):
+        return 1
+    if isinstance(value, str):
+        return 2
+    if value is None:
+        return 4
+    return 3
+
+
+def _order_compare(a: Any, b: Any) -> int:
+    ra, rb = _order_rank(a), _order_rank(b)
+    if ra != rb:
+        return -1 if ra < rb else 1
+    if ra in (0, 1, 2):
+        return (a > b) - (a < b)
+    return 0
+
+
+# ----------------------------------------------------------------------
+# Parser: GROQ text -> closures taking a Scope
+# ----------------------------------------------------------------------
+
+Evaluator = Callable[[Scope], Any]
+
+_COMPARISON_OPS = {"==", "!=", "<", "<=", ">", ">="}
+_FUNCTIONS = {"path", "defined", "count", "coalesce", "lower", "upper", "references"}
+
+
+class _Parser:
+    def __init__(self, query: str):
+        self.tokens = tokenize(query)
+        self.i = 0
+
+    # -- token helpers --------------------------------------------------
+
+    @property
+    def tok(self) -> Token:
+        return self.tokens[self.i]
+
+    def peek(self, offset: int = 1) -> Token:
+        return self.tokens[min(self.i + offset, len(self.tokens) - 1)]
+
+    def advance(self) -> Token:
+        tok = self.tokens[self.i]
+        self.i += 1
+        return tok
+
+    def at(self, value: str) -> bool:
+        return self.tok.kind in ("OP", "IDENT") and self.tok.value == value
+
+    def expect(self, value: str) -> Token:
+        if not self.at(value):
+            raise GroqUnsupportedError(f"Expected {value!r} at {self.tok.pos}, got {self.tok.value!r}")
+        return self.advance()
+
+    # -- grammar ----------------------------------------------------------
+
+    def parse(self) -> Evaluator:
+        expr = self.parse_pipe()
+        if self.tok.kind != "EOF":
+            raise GroqUnsupportedError(f"Unexpected {self.tok.value!r} at {self.tok.pos}")
+        return expr
+
+    def parse_pipe(self) -> Evaluator:
+        expr = self.parse_or()
+        while self.at("|"):
+            self.advance()
+            name = self.advance()
+            if name.kind != "IDENT" or name.value != "order":
+                raise GroqUnsupportedError(f"Unsupported pipe function {name.value!r}")
+            expr = self.parse_postfix(self.parse_order(expr))
+        return expr
+
+    def parse_order(self, base: Evaluator) -> Evaluator:
+        self.expect("(")
+        keys: List[Tuple[Evaluator, bool]] = []
+        while True:
+            key = self.parse_or()
+            descending = False
+            if self.tok.kind == "IDENT" and self.tok.value in ("asc", "desc"):
+                descending = self.advance().value == "desc"
+            keys.append((key, descending))
+            if not self.at(","):
+                break
+            self.advance()
+        self.expect(")")
+
+        def order(scope: Scope) -> Any:
+            items = base(scope)
+            if not isinstance(items, list):
+                return None
+            decorated = [
+                ([key(scope.nested(item)) for key, _ in keys], item) for item in items
+            ]
+
+            def compare(x, y):
+                for (key_x, key_y, (_, descending)) in zip(x[0], y[0], keys):
+                    result = _order_compare(key_x, key_y)
+                    if result:
+                        return -result if descending else result
+                return 0
+
+            decorated.sort(key=functools.cmp_to_key(compare))
+            return [item for _, item in decorated]
+
+        return order
+
+    def parse_or(self) -> Evaluator:
+        left = self.parse_and()
+        while self.at("||"):
+            self.advance()
+            right = self.parse_and()
+            left = (lambda l, r: lambda s: _or(l(s), r(s)))(left, right)
+        return left
+
+    def parse_and(self) -> Evaluator:
+        left = self.parse_comparison()
+        while self.at("&&"):
+            self.advance()
+            right = self.parse_comparison()
+            hints = _index_hints(left) + _index_hints(right)
+            left = (lambda l, r: lambda s: _and(l(s), r(s)))(left, right)
+            left.index_hints = hints
+        return left
+
+    def parse_comparison(self) -> Evaluator:
+        # `_type == "x"` / `_id == "x"` conjuncts let filters over `*` use the store indexes
+        indexed_attr = None
+        if self.tok.kind == "IDENT" and self.tok.value in ("_type", "_id") and self.peek().value == "==" \
+                and self.peek(2).kind == "STRING" and self.peek(3).value in ("&&", "||", ")", "]", ","):
+            indexed_attr = self.tok.value
+
+        left = self.parse_additive()
+        tok = self.tok
+        if tok.kind == "OP" and tok.value in _COMPARISON_OPS:
+            op = self.advance().value
+            literal = _unquote(self.tok.value) if self.tok.kind == "STRING" else None
+            right = self.parse_additive()
+            if op == "==":
+                equals = lambda s: _equals(left(s), right(s))
+                if indexed_attr:
+                    equals.index_hints = [(indexed_attr, literal)]
+                return equals
+            if op == "!=":
+                return lambda s: not _equals(left(s), right(s))
+            return lambda s: _compare(left(s), right(s), op)
+        if tok.kind == "IDENT" and tok.value == "in":
+            self.advance()
+            right = self.parse_additive()
+
+            def contains(s: Scope) -> Optional[bool]:
+                value, collection = left(s), right(s)
+                if isinstance(collection, PathPattern):
+                    return collection.matches(value)
+                if isinstance(collection, list):
+                    return any(_equals(value, item) for item in collection)
+                return None
+
+            return contains
+        if tok.kind == "IDENT" and tok.value == "match":
+            self.advance()
+            right = self.parse_additive()
+            return lambda s: match_text(left(s), right(s))
+        return left
+
+    def parse_additive(self) -> Evaluator:
+        left = self.parse_unary()
+        while self.at("+") or self.at("-"):
+            op = self.advance().value
+            right = self.parse_unary()
+
+            def arith(s: Scope, l=left, r=right, op=op) -> Any:
+                a, b = l(s), r(s)
+                if op == "+" and isinstance(a, str) and isinstance(b, str):
+                    return a + b
+                if isinstance(a, (int, float)) and isinstance(b, (int, float)) \
+                        and not isinstance(a, bool) and not isinstance(b, bool):
+                    return a + b if op == "+" else a - b
+                return None
+
+            left = arith
+        return left
+
+    def parse_unary(self) -> Evaluator:
+        if self.at("!"):
+            self.advance()
+            operand = self.parse_unary()
+
+            def negate(s: Scope) -> Optional[bool]:
+                value = operand(s)
+                return (not value) if isinstance(value, bool) else None
+
+            return negate
+        if self.at("-"):
+            self.advance()
+            operand = self.parse_unary()
+
+            def minus(s: Scope) -> Any:
+                value = operand(s)
+                return -value if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+            return minus
+        return self.parse_postfix(self.parse_primary())
+
+    def parse_postfix(self, base: Evaluator) -> Evaluator:
+        while True:
+            if self.at("."):
+                self.advance()
+                name = self.advance()
+                if name.kind != "IDENT":
+                    raise GroqUnsupportedError(f"Expected attribute name at {name.pos}")
+                base = (lambda b, n: lambda s: _attribute(b(s), n))(base, name.value)
+            elif self.at("->"):
+                self.advance()
+                deref = (lambda b: lambda s: _deref(s, b(s)))(base)
+                if self.tok.kind == "IDENT":
+                    name = self.advance().value
+                    base = (lambda d, n: lambda s: _attribute(d(s), n))(deref, name)
+                else:
+                    base = deref
+            elif self.at("["):
+                base = self.parse_bracket(base)
+            elif self.at("{"):
+                base = self.parse_projection(base)
+            else:
+                return base
+
+    def parse_bracket(self, base: Evaluator) -> Evaluator:
+        self.expect("[")
+        if self.at("]"):
+            # Array traversal: the rest of the postfix chain maps over elements
+            self.advance()
+            inner = self.parse_postfix(lambda s: s.element)
+
+            def traverse(s: Scope) -> Any:
+                items = base(s)
+                if not isinstance(items, list):
+                    return None
+                return [inner(s.with_element(item)) for item in items]
+
+            return traverse
+
+        if self.tok.kind == "NUMBER" or (self.at("-") and self.peek().kind == "NUMBER"):
+            start = self._parse_int()
+            if self.at("..") or self.at("..."):
+                inclusive = self.advance().value == ".."
+                end = self._parse_int()
+                self.expect("]")
+                return (lambda b, a, z, inc: lambda s: _slice(b(s), a, z, inc))(base, start, end, inclusive)
+            self.expect("]")
+            return (lambda b, n: lambda s: _index(b(s), n))(base, start)
+
+        condition = self.parse_pipe()
+        self.expect("]")
+        hints = _index_hints(condition) if getattr(base, "is_everything", False) else []
+
+        def filter_(s: Scope) -> Any:
+            items = _candidates(s.store, hints) if hints else base(s)
+            if not isinstance(items, list):
+                return None
+            return [item for item in items if condition(s.nested(item)) is True]
+
+        return filter_
+
+    def _parse_int(self) -> int:
+        sign = 1
+        if self.at("-"):
+            self.advance()
+            sign = -1
+        tok = self.advance()
+        if tok.kind != "NUMBER" or "." in tok.value:
+            raise GroqUnsupportedError(f"Expected integer at {tok.pos}")
+        return sign * int(tok.value)
+
+    def parse_projection(self, base: Optional[Evaluator]) -> Evaluator:
+        fields = self.parse_object_fields()
+
+        def project_one(s: Scope, obj: Any) -> Any:
+            if not isinstance(obj, dict):
+                return None
+            inner = s.nested(obj)
+            result: Dict[str, Any] = {}
+            for key, value in fields:
+                if key is None:
+                    spread = value(inner)
+                    if isinstance(spread, dict):
+                        result.update(spread)
+                else:
+                    result[key] = value(inner)
+            return result
+
+        if base is None:
+            # Object literal: evaluate fields against the current scope
+            def literal(s: Scope) -> Any:
+                result: Dict[str, Any] = {}
+                for key, value in fields:
+                    if key is None:
+                        spread = value(s)
+                        if isinstance(spread, dict):
+                            result.update(spread)
+                    else:
+                        result[key] = value(s)
+                return result
+
+            return literal
+
+        def project(s: Scope) -> Any:
+            value = base(s)
+            if isinstance(value, list):
+                return [project_one(s, item) for item in value]
+            return project_one(s, value)
+
+        return project
+
+    def parse_object_fields(self) -> List[Tuple[Optional[str], Evaluator]]:
+        self.expect("{")
+        fields: List[Tuple[Optional[str], Evaluator]] = []
+        while not self.at("}"):
+            if self.at("..."):
+                self.advance()
+                fields.append((None, lambda s: s.this))
+            elif self.tok.kind == "STRING" and self.peek().value == ":":
+                key = _unquote(self.advance().value)
+                self.expect(":")
+                fields.append((key, self.parse_pipe()))
+            elif self.tok.kind == "IDENT" and self.peek().value in (",", "}"):
+                name = self.advance().value
+                fields.append((name, (lambda n: lambda s: _attribute(s.this, n))(name)))
+            else:
+                raise GroqUnsupportedError(
+                    f"Unsupported projection field at {self.tok.pos}: use an identifier or \"key\": expr"
+                )
+            if self.at(","):
+                self.advance()
+            elif not self.at("}"):
+                raise GroqUnsupportedError(f"Expected ',' or '}}' at {self.tok.pos}")
+        self.expect("}")
+        return fields
+
+    def parse_primary(self) -> Evaluator:
+        tok = self.tok
+        if tok.kind == "OP":
+            if tok.value == "*":
+                self.advance()
+                everything = lambda s: s.store.documents()
+                everything.is_everything = True
+                return everything
+            if tok.value == "@":
+                self.advance()
+                return lambda s: s.this
+            if tok.value == "^":
+                self.advance()
+                return lambda s: s.parent.this if s.parent is not None else None
+            if tok.value == "(":
+                self.advance()
+                expr = self.parse_pipe()
+                self.expect(")")
+                return expr
+            if tok.value == "[":
+                return self.parse_array_literal()
+            if tok.value == "{":
+                return self.parse_projection(None)
+        if tok.kind == "NUMBER":
+            self.advance()
+            number = float(tok.value) if "." in tok.value else int(tok.value)
+            return lambda s: number
+        if tok.kind == "STRING":
+            self.advance()
+            text = _unquote(tok.value)
+            return lambda s: text
+        if tok.kind == "PARAM":
+            self.advance()
+            name = tok.value[1:]
+
+            def param(s: Scope) -> Any:
+                if name not in s.params:
+                    raise GroqUnsupportedError(f"Missing query parameter ${name}")
+                return s.params[name]
+
+            return param
+        if tok.kind == "IDENT":
+            self.advance()
+            if tok.value in ("true", "false"):
+                value = tok.value == "true"
+                return lambda s: value
+            if tok.value == "null":
+                return lambda s: None
+            if self.at("("):
+                return self.parse_function(tok.value)
+            return (lambda n: lambda s: _attribute(s.this, n))(tok.value)
+        raise GroqUnsupportedError(f"Unexpected {tok.value!r} at {tok.pos}")
+
+    def parse_array_literal(self) -> Evaluator:
+        self.expect("[")
+        items: List[Evaluator] = []
+        while not self.at("]"):
+            items.append(self.parse_pipe())
+            if self.at(","):
+                self.advance()
+        self.expect("]")
+        return lambda s: [item(s) for item in items]
+
+    def parse_function(self, name: str) -> Evaluator:
+        if name not in _FUNCTIONS:
+            raise GroqUnsupportedError(f"Unsupported function {name}()")
+        self.expect("(")
+        args: List[Evaluator] = []
+        while not self.at(")"):
+            args.append(self.parse_pipe())
+            if self.at(","):
+                self.advance()
+        self.expect(")")
+
+        if name == "path":
+            if len(args) != 1:
+                raise GroqUnsupportedError("path() takes one argument")
+            return lambda s: PathPattern(args[0](s))
+        if name == "defined":
+            return lambda s: args[0](s) is not None
+        if name == "count":
+            return lambda s: len(v) if isinstance(v := args[0](s), list) else None
+        if name == "coalesce":
+            def coalesce(s: Scope) -> Any:
+                for arg in args:
+                    value = arg(s)
+                    if value is not None:
+                        return value
+                return None
+            return coalesce
+        if name in ("lower", "upper"):
+            def case(s: Scope) -> Any:
+                value = args[0](s)
+                if not isinstance(value, str):
+                    return None
+                return value.lower() if name == "lower" else value.upper()
+            return case
+        # references(id): does the current document reference `id`?
+        return lambda s: _references(s, [a(s) for a in args])
+
+
+def _index_hints(evaluator: Evaluator) -> List[Tuple[str, str]]:
+    return getattr(evaluator, "index_hints", [])
+
+
+def _candidates(store, hints: List[Tuple[str, str]]) -> List[dict]:
+    """Narrow `*` using the most selective index hint; the full filter still runs."""
+    for attr, value in hints:
+        if attr == "_id":
+            doc = store.get(value)
+            return [doc] if doc is not None else []
+    for attr, value in hints:
+        if attr == "_type":
+            return store.documents(value)
+    return store.documents()
+
+
+def _attribute(value: Any, name: str) -> Any:
+    return value.get(name) if isinstance(value, dict) else None
+
+
+def _deref(scope: Scope, value: Any) -> Any:
+    if isinstance(value, list):
+        return [scope.store.deref(item) for item in value]
+    return scope.store.deref(value)
+
+
+def _index(value: Any, n: int) -> Any:
+    if not isinstance(value, list):
+        return None
+    try:
+        return value[n]
+    except IndexError:
+        return None
+
+
+def _slice(value: Any, start: int, end: int, inclusive: bool) -> Any:
+    if not isinstance(value, list):
+        return None
+    if inclusive:
+        end = end + 1 if end != -1 else len(value)
+    return value[start:end]
+
+
+def _references(scope: Scope, ids: List[Any]) -> bool:
+    this = scope.this
+    if not isinstance(this, dict) or "_id" not in this:
+        return False
+    refs = scope.store.references.get(this["_id"], set())
+    wanted = set()
+    for value in ids:
+        wanted.update(value if isinstance(value, list) else [value])
+    return bool(refs & wanted)
+
+
+# ----------------------------------------------------------------------
+# Query plans
+# ----------------------------------------------------------------------
+
+class QueryPlan:
+    """A compiled GROQ query; execute() runs it against a DocumentStore."""
+
+    def __init__(self, query: str, evaluator: Evaluator):
+        self.query = query
+        self._evaluator = evaluator
+
+    def execute(self, store, params: Optional[dict] = None) -> Any:
+        return self._evaluator(Scope(store, params or {}))
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_normalized(normalized: str) -> QueryPlan:
+    return QueryPlan(normalized, _Parser(normalized).parse())
+
+
+def compile_query(query: str) -> QueryPlan:
+    """
+    Compile a GROQ query into a reusable plan (cached by normalized text).
+
+    Raises:
+        GroqUnsupportedError: If the query uses syntax outside the supported subset
+    """
+    return _compile_normalized(normalize_query(query))
+
+
+def evaluate(query: str, store, params: Optional[dict] = None) -> Any:
+    """Compile (or reuse) and execute a GROQ query against `store`."""
+    return compile_query(query).execute(store, params)
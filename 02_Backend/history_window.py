@@ -0,0 +1,172 @@
+"""
+Token-budgeted conversation history.
+`respond()` used to send the model the last 50 thread items whatever their
+size, so long conversations grew steadily slower and more expensive. The
+history window keeps the newest items that fit in a token budget: old tool
+outputs are elided or dropped first, then the oldest messages. Per-item
+token counts are cached by the store, so each item is tokenized once.
+"""
+import json
+from dataclasses import dataclass
+from typing import List, MutableMapping, Optional, Sequence
+
+from chatkit.types import AssistantMessageItem, ClientToolCallItem, ThreadItem, UserMessageItem
+from decouple import config
+
+from metrics import metrics, TOKEN_BUCKETS
+from token_budget import count_tokens
+
+# Set up logging
+from logging_config import get_logger
+logger = get_logger(__name__)
+
+# Token budget for the history sent with each turn
+HISTORY_TOKEN_BUDGET = config("HISTORY_TOKEN_BUDGET", default=4000, cast=int)
+# Most thread items loaded before the budget is applied
+HISTORY_MAX_ITEMS = config("HISTORY_MAX_ITEMS", default=50, cast=int)
+
+# Per-item overhead of the message framing (role, separators)
+ITEM_OVERHEAD_TOKENS = 4
+# Output kept in place of an elided client tool call output
+ELIDED_OUTPUT = "[output elided from history]"
+
+HISTORY_TOKENS = metrics.histogram(
+    "chat_history_tokens", "Estimated tokens of conversation history sent per turn", buckets=TOKEN_BUCKETS
+)
+HISTORY_ITEMS_DROPPED = metrics.counter(
+    "chat_history_items_dropped_total", "Thread items dropped or elided to fit the history budget", ("kind",)
+)
+
+
+def _text(item: ThreadItem) -> str:
+    """The text an item contributes to the model input."""
+    if isinstance(item, (UserMessageItem, AssistantMessageItem)):
+        return "\n".join(getattr(part, "text", "") or "" for part in item.content)
+    if isinstance(item, ClientToolCallItem):
+        return f"{item.name} {json.dumps(item.arguments)} {json.dumps(item.output, default=str)}"
+    return item.model_dump_json(exclude={"id", "thread_id", "created_at"})
+
+
+def item_tokens(item: ThreadItem) -> int:
+    """Estimated input tokens of one thread item."""
+    return count_tokens(_text(item)) + ITEM_OVERHEAD_TOKENS
+
+
+def _is_message(item: ThreadItem) -> bool:
+    return isinstance(item, (UserMessageItem, AssistantMessageItem))
+
+
+@dataclass
+class HistoryWindow:
+    items: List[ThreadItem]
+    tokens: int
+    total_tokens: int
+    dropped: int = 0
+    elided: int = 0
+    counted: int = 0
+
+
+@dataclass
+class _Entry:
+    item: ThreadItem
+    tokens: int
+    kept: bool = True
+
+
+def build_history(
+    items: Sequence[ThreadItem],
+    counts: Optional[MutableMapping[str, int]] = None,
+    budget: int = HISTORY_TOKEN_BUDGET,
+) -> HistoryWindow:
+    """
+    Select the thread items to send to the model within a token budget.
+
+    The newest user message and everything after it (the current turn) are
+    always kept. When over budget, older tool outputs go first: client tool
+    call outputs are elided (the call stays, so call/output pairs remain
+    valid) and other non-message items are dropped, oldest first. Then the
+    oldest messages are dropped, and a leading assistant message is removed
+    so the window starts on a user message.
+
+    Args:
+        items: Thread items, oldest first
+        counts: Token counts by item id, filled in for items not yet counted
+        budget: Token budget for the whole window
+
+    Returns:
+        The selected items (oldest first) and their token count
+    """
+    counts = {} if counts is None else counts
+    counted = 0
+    entries = []
+    for item in items:
+        tokens = counts.get(item.id)
+        if tokens is None:
+            tokens = counts[item.id] = item_tokens(item)
+            counted += 1
+        entries.append(_Entry(item, tokens))
+
+    total = sum(entry.tokens for entry in entries)
+    tokens = total
+    last_user = max((i for i, e in enumerate(entries) if isinstance(e.item, UserMessageItem)), default=len(entries))
+    older = entries[:last_user]
+    dropped = elided = 0
+
+    # 1. Old tool outputs, oldest first
+    for entry in older:
+        if tokens <= budget:
+            break
+        if isinstance(entry.item, ClientToolCallItem) and entry.item.output is not None:
+            slim = entry.item.model_copy(update={"output": ELIDED_OUTPUT})
+            key = f"{entry.item.id}:elided"
+            if key not in counts:
+                counts[key] = item_tokens(slim)
+            saved = entry.tokens - counts[key]
+            if saved > 0:
+                entry.item, entry.tokens = slim, entry.tokens - saved
+                tokens -= saved
+                elided += 1
+                HISTORY_ITEMS_DROPPED.inc(kind="tool_output")
+        elif not _is_message(entry.item):
+            entry.kept = False
+            tokens -= entry.tokens
+            dropped += 1
+            HISTORY_ITEMS_DROPPED.inc(kind=entry.item.type)
+
+    # 2. Oldest turns, whole items at a time
+    for entry in older:
+        if tokens <= budget:
+            break
+        if entry.kept:
+            entry.kept = False
+            tokens -= entry.tokens
+            dropped += 1
+            HISTORY_ITEMS_DROPPED.inc(kind=entry.item.type)
+
+    # 3. Start the window on a user message
+    if dropped:
+        for entry in older:
+            if not entry.kept:
+                continue
+            if isinstance(entry.item, UserMessageItem):
+                break
+            entry.kept = False
+            tokens -= entry.tokens
+            dropped += 1
+            HISTORY_ITEMS_DROPPED.inc(kind=entry.item.type)
+
+    window = HistoryWindow(
+        items=[entry.item for entry in entries if entry.kept],
+        tokens=tokens,
+        total_tokens=total,
+        dropped=dropped,
+        elided=elided,
+        counted=counted,
+    )
+    HISTORY_TOKENS.observe(tokens)
+    if dropped or elided:
+        logger.info(
+            f"History window: {len(window.items)}/{len(entries)} items, {tokens}/{total} tokens "
+            f"(dropped {dropped}, elided {elided}, budget {budget})"
+        )
+    return window
@@ -0,0 +1,76 @@
+"""
+Content-change fan-out for Sanity-backed caches.
+Webhooks (and other change sources) publish here; every cache that holds
+data derived from Sanity documents subscribes and drops what is affected.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+# Set up logging
+from logging_config import get_logger
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class ContentChange:
+    doc_type: Optional[str]
+    doc_id: Optional[str]
+    revision: int
+    source: str
+    received_at: float
+
+
+class InvalidationBus:
+    """
+    Publishes Sanity document changes to subscribed caches.
+
+    Each published change bumps a monotonically increasing dataset revision
+    that caches can use to stamp derived data. A change with no `_type`
+    means "anything may have changed".
+    """
+
+    def __init__(self):
+        self.revision = 0
+        self._listeners: List[Callable[[ContentChange], None]] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, listener: Callable[[ContentChange], None]) -> None:
+        """Register a callback invoked synchronously for every change."""
+        self._listeners.append(listener)
+
+    def publish(self, doc_type: Optional[str] = None, doc_id: Optional[str] = None,
+                source: str = "manual") -> ContentChange:
+        """
+        Publish a document change to every subscriber.
+
+        Args:
+            doc_type: The changed document's `_type`, if known
+            doc_id: The changed document's `_id`, if known
+            source: Where the change came from (for logging)
+
+        Returns:
+            The published ContentChange
+        """
+        with self._lock:
+            self.revision += 1
+            change = ContentChange(
+                doc_type=doc_type,
+                doc_id=doc_id,
+                revision=self.revision,
+                source=source,
+                received_at=time.time(),
+            )
+
+        logger.info(f"Content change from {source}: type={doc_type} id={doc_id} (revision {change.revision})")
+        for listener in list(self._listeners):
+            try:
+                listener(change)
+            except Exception as e:
+                logger.error(f"Invalidation listener {listener!r} failed: {e}")
+        return change
+
+
+# Global bus shared by all Sanity-derived caches
+content_changes = InvalidationBus()
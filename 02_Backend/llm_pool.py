@@ -0,0 +1,318 @@
+"""
+Pool of LLM clients over several API keys.
+Each configured key gets its own AsyncOpenAI client and a concurrency
+limit. Every chat completion goes to the available key with the fewest
+requests in flight; a key answering 429 or 5xx (or failing to connect) is
+put on cooldown and the request is retried transparently on another key.
+The pool stands in for a single AsyncOpenAI client wherever the agent or
+other callers use `chat.completions.create`.
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Set, Tuple
+
+import openai
+from openai import AsyncOpenAI
+from decouple import config
+
+from metrics import metrics
+
+# Set up logging
+from logging_config import get_logger
+logger = get_logger(__name__)
+
+DEFAULT_BASE_URL = "https://generativelanguage.googleapis.com/v1beta/openai/"
+# Concurrent requests per key before the pool routes elsewhere (or waits)
+MAX_IN_FLIGHT_PER_KEY = config("LLM_MAX_IN_FLIGHT_PER_KEY", default=8, cast=int)
+# Cooldown after a 429 without a Retry-After header
+RATE_LIMIT_COOLDOWN = config("LLM_RATE_LIMIT_COOLDOWN", default=20.0, cast=float)
+# Cooldown after a 5xx response or connection failure
+ERROR_COOLDOWN = config("LLM_ERROR_COOLDOWN", default=5.0, cast=float)
+# Longest a request waits for a key to become available
+ACQUIRE_TIMEOUT = config("LLM_ACQUIRE_TIMEOUT", default=30.0, cast=float)
+REQUEST_TIMEOUT = config("LLM_REQUEST_TIMEOUT", default=60.0, cast=float)
+# Numbered key variables read after GEMINI_API_KEY: GEMINI_API_KEY_2 ... GEMINI_API_KEY_<N>
+MAX_NUMBERED_KEYS = 9
+
+KEY_REQUESTS = metrics.counter("llm_key_requests_total", "LLM requests per API key by outcome", ("key", "outcome"))
+KEY_SECONDS = metrics.histogram(
+    "llm_key_request_seconds", "Time to the LLM response (headers, for streams) per API key", ("key",)
+)
+POOL_WAIT_SECONDS = metrics.histogram("llm_pool_wait_seconds", "Time requests waited for an available API key")
+
+
+class LLMPoolExhausted(RuntimeError):
+    """No API key became available within the acquire timeout."""
+
+
+def configured_api_keys() -> List[Tuple[str, str]]:
+    """
+    API keys from the environment as (label, key), in preference order.
+
+    GEMINI_API_KEYS (comma separated) comes first, then GEMINI_API_KEY and
+    GEMINI_API_KEY_2 ... GEMINI_API_KEY_9. Empty values, `YOUR_...`
+    placeholders and duplicates are skipped. Labels name the variable, never
+    the key itself, so they are safe for logs and metrics.
+    """
+    candidates = [
+        (f"GEMINI_API_KEYS[{i}]", key)
+        for i, key in enumerate(config("GEMINI_API_KEYS", default="").split(","), start=1)
+    ]
+    candidates.append(("GEMINI_API_KEY", config("GEMINI_API_KEY", default="")))
+    candidates.extend(
+        (f"GEMINI_API_KEY_{n}", config(f"GEMINI_API_KEY_{n}", default="")) for n in range(2, MAX_NUMBERED_KEYS + 1)
+    )
+    keys, seen = [], set()
+    for label, key in candidates:
+        key = key.strip()
+        if key and not key.startswith("YOUR_") and key not in seen:
+            seen.add(key)
+            keys.append((label, key))
+    return keys
+
+
+@dataclass
+class KeySlot:
+    name: str
+    client: AsyncOpenAI
+    max_in_flight: int
+    in_flight: int = 0
+    cooldown_until: float = 0.0
+    last_used: float = 0.0
+    requests: int = 0
+    failures: int = 0
+
+    def available(self, now: float) -> bool:
+        return self.in_flight < self.max_in_flight and now >= self.cooldown_until
+
+    def status(self, now: float) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "cooling_down_for": round(max(self.cooldown_until - now, 0.0), 3),
+            "requests": self.requests,
+            "failures": self.failures,
+        }
+
+
+def _retry_after(error: openai.APIStatusError) -> Optional[float]:
+    value = error.response.headers.get("retry-after") if error.response is not None else None
+    try:
+        return max(float(value), 0.0) if value is not None else None
+    except ValueError:
+        return None
+
+
+class PooledStream:
+    """A streamed completion that gives its key back once consumed or closed."""
+
+    def __init__(self, stream: Any, release):
+        self._stream = stream
+        self._release = release
+        self.response = getattr(stream, "response", None)
+
+    async def __aiter__(self) -> AsyncIterator[Any]:
+        try:
+            async for chunk in self._stream:
+                yield chunk
+        finally:
+            self._release()
+
+    async def aclose(self) -> None:
+        try:
+            close = getattr(self._stream, "close", None)
+            if close is not None:
+                await close()
+        finally:
+            self._release()
+
+
+class LLMClientPool:
+    """
+    Routes chat completions across API keys by fewest requests in flight.
+
+    Usable wherever an AsyncOpenAI client is expected for chat completions
+    (`pool.chat.completions.create(...)`); provider retries are disabled on
+    the underlying clients because the pool retries on another key instead.
+    """
+
+    def __init__(
+        self,
+        keys: Sequence[Tuple[str, str]],
+        base_url: str = DEFAULT_BASE_URL,
+        max_in_flight: int = MAX_IN_FLIGHT_PER_KEY,
+        rate_limit_cooldown: float = RATE_LIMIT_COOLDOWN,
+        error_cooldown: float = ERROR_COOLDOWN,
+        acquire_timeout: float = ACQUIRE_TIMEOUT,
+        timeout: float = REQUEST_TIMEOUT,
+    ):
+        if not keys:
+            logger.error("❌ No valid GEMINI_API_KEY found! All keys are missing or invalid.")
+            keys = [("GEMINI_API_KEY", "missing")]
+        self.slots = [
+            KeySlot(name, AsyncOpenAI(api_key=key, base_url=base_url, max_retries=0, timeout=timeout), max_in_flight)
+            for name, key in keys
+        ]
+        self.rate_limit_cooldown = rate_limit_cooldown
+        self.error_cooldown = error_cooldown
+        self.acquire_timeout = acquire_timeout
+        self.base_url = self.slots[0].client.base_url
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+        # Set whenever a key is released, waking requests waiting for one
+        self._released: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        logger.info(f"LLM client pool: {len(self.slots)} key(s) ({', '.join(s.name for s in self.slots)}), "
+                    f"base_url {base_url}")
+
+    def with_options(self, **kwargs) -> "LLMClientPool":
+        # Retries and timeouts are handled per key by the pool
+        return self
+
+    def _released_event(self) -> asyncio.Event:
+        loop = asyncio.get_running_loop()
+        if self._released is None or self._loop is not loop:
+            self._released = asyncio.Event()
+            self._loop = loop
+        return self._released
+
+    def _pick(self, exclude: Set[str]) -> Optional[KeySlot]:
+        now = time.monotonic()
+        candidates = [slot for slot in self.slots if slot.available(now) and slot.name not in exclude]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda slot: (slot.in_flight, slot.last_used))
+
+    def _next_change(self, exclude: Set[str]) -> Optional[float]:
+        """Seconds until the earliest cooldown among the usable keys ends."""
+        now = time.monotonic()
+        ends = [s.cooldown_until - now for s in self.slots if s.name not in exclude and s.cooldown_until > now]
+        return min(ends) if ends else None
+
+    async def acquire(self, exclude: Set[str] = frozenset()) -> KeySlot:
+        """
+        Reserve the available key with the fewest requests in flight.
+
+        Keys in `exclude` are skipped while any other key exists. Waits for
+        a release or a cooldown to end, up to the acquire timeout.
+        """
+        if len(exclude) >= len(self.slots):
+            exclude = set()
+        started = time.monotonic()
+        deadline = started + self.acquire_timeout
+        released = self._released_event()
+        while True:
+            # Picking and reserving do not await, so no other request can interleave
+            slot = self._pick(exclude)
+            if slot is not None:
+                slot.in_flight += 1
+                slot.last_used = time.monotonic()
+                POOL_WAIT_SECONDS.observe(slot.last_used - started)
+                return slot
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise LLMPoolExhausted(f"No LLM API key available within {self.acquire_timeout:.0f}s")
+            wait = min(remaining, self._next_change(exclude) or remaining)
+            released.clear()
+            try:
+                await asyncio.wait_for(released.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def release(self, slot: KeySlot) -> None:
+        slot.in_flight -= 1
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Released outside the loop (e.g. a stream collected late); waiters recheck on their timeout
+            return
+        if self._released is not None and self._loop is loop:
+            self._released.set()
+
+    def _cool_down(self, slot: KeySlot, seconds: float, reason: str) -> None:
+        slot.cooldown_until = max(slot.cooldown_until, time.monotonic() + seconds)
+        slot.failures += 1
+        logger.warning(f"LLM key {slot.name} {reason}, cooling down for {seconds:.1f}s")
+
+    async def create(self, **kwargs) -> Any:
+        """
+        `chat.completions.create` on the least-loaded key, failing over on 429, 5xx and connection errors.
+
+        Streams hold their key until they are consumed or closed.
+        """
+        tried: Set[str] = set()
+        last_error: Optional[Exception] = None
+        for _ in range(len(self.slots) + 1):
+            try:
+                slot = await self.acquire(tried)
+            except LLMPoolExhausted:
+                if last_error is not None:
+                    raise last_error
+                raise
+            started = time.perf_counter()
+            slot.requests += 1
+            try:
+                result = await slot.client.chat.completions.create(**kwargs)
+            except openai.RateLimitError as e:
+                outcome, last_error = "rate_limited", e
+                self._cool_down(slot, _retry_after(e) or self.rate_limit_cooldown, "rate limited (429)")
+            except openai.APIStatusError as e:
+                if e.status_code < 500:
+                    KEY_REQUESTS.inc(key=slot.name, outcome="client_error")
+                    self.release(slot)
+                    raise
+                outcome, last_error = "server_error", e
+                self._cool_down(slot, _retry_after(e) or self.error_cooldown, f"failed ({e.status_code})")
+            except (openai.APIConnectionError, openai.APITimeoutError) as e:
+                outcome, last_error = "connection_error", e
+                self._cool_down(slot, self.error_cooldown, f"unreachable ({type(e).__name__})")
+            except BaseException:
+                KEY_REQUESTS.inc(key=slot.name, outcome="error")
+                self.release(slot)
+                raise
+            else:
+                KEY_SECONDS.observe(time.perf_counter() - started, key=slot.name)
+                KEY_REQUESTS.inc(key=slot.name, outcome="ok")
+                if kwargs.get("stream") is True:
+                    released = []
+
+                    def release_once(slot=slot):
+                        if not released:
+                            released.append(True)
+                            self.release(slot)
+
+                    return PooledStream(result, release_once)
+                self.release(slot)
+                return result
+            KEY_REQUESTS.inc(key=slot.name, outcome=outcome)
+            self.release(slot)
+            tried.add(slot.name)
+        raise last_error
+
+    async def warm(self, timeout: float = 5.0) -> None:
+        """Open every key's connection with a cheap authenticated request."""
+        results = await asyncio.gather(
+            *(slot.client.with_options(timeout=timeout).models.list() for slot in self.slots),
+            return_exceptions=True,
+        )
+        failed = [slot.name for slot, result in zip(self.slots, results) if isinstance(result, Exception)]
+        if failed and len(failed) == len(results):
+            raise RuntimeError(f"No LLM key reachable ({', '.join(failed)})")
+        if failed:
+            logger.warning(f"LLM keys unreachable during warmup: {', '.join(failed)}")
+
+    def status(self) -> Dict[str, dict]:
+        """In-flight requests, cooldowns and counts per key."""
+        now = time.monotonic()
+        return {slot.name: slot.status(now) for slot in self.slots}
+
+
+def register_metrics(pool: LLMClientPool) -> None:
+    metrics.callback(
+        "llm_key_in_flight", "LLM requests in flight per API key", "gauge",
+        lambda: {(slot.name,): slot.in_flight for slot in pool.slots}, ("key",),
+    )
+    metrics.callback(
+        "llm_key_cooldown_seconds", "Seconds until a cooling-down API key is used again", "gauge",
+        lambda: {(name,): status["cooling_down_for"] for name, status in pool.status().items()}, ("key",),
+    )
@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
@@ -6,12 +7,39 @@ from chatkit.server import StreamingResult
 
 # Import the new ChatKit server
 from server import PortfolioChatServer
+from sanity_client import close_sanity_clients
+from sanity_webhook import SIGNATURE_HEADER, WEBHOOK_SECRET, verify_signature, handle_webhook_payload, sync_mirror
+from invalidation import content_changes
+from document_store import load_configured_mirror, OFFLINE_MODE
+from sanity_listener import sanity_listener, LISTEN_ENABLED
+from metrics import metrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from warmup import warmup
+from pregenerate import pregenerated_answers, PREGENERATED_ENABLED
+import json
 
 # Set up logging
 from logging_config import get_logger
 logger = get_logger(__name__)
 
-app = FastAPI(title="Portfolio AI Twin API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the local Sanity mirror (SANITY_MIRROR_PATH / SANITY_OFFLINE) before serving
+    load_configured_mirror()
+    # Starter prompt answers generated offline by pregenerate.py
+    if PREGENERATED_ENABLED:
+        pregenerated_answers.load()
+    # Keep caches hot from Sanity's listen stream (SANITY_LISTEN_ENABLED)
+    if LISTEN_ENABLED and not OFFLINE_MODE:
+        sanity_listener.start()
+    # Prefetch data, open connections and build agents; /healthz/ready waits for it
+    warmup.start()
+    yield
+    await warmup.stop()
+    await sanity_listener.stop()
+    # Release the shared Sanity connection pools on shutdown
+    await close_sanity_clients()
+
+app = FastAPI(title="Portfolio AI Twin API", lifespan=lifespan)
 
 # CORS setup
 app.add_middleware(
@@ -36,6 +64,22 @@ chatkit_server = PortfolioChatServer()
 async def root():
     return {"message": "Portfolio AI Twin API is Online", "status": "running"}
 
+@app.get("/healthz/live")
+async def healthz_live():
+    """ The process is up and serving requests. """
+    return {"status": "alive"}
+
+@app.get("/healthz/ready")
+async def healthz_ready():
+    """ Ready for traffic once startup warmup has finished; reports phase timings. """
+    report = warmup.report()
+    return JSONResponse(content=report, status_code=200 if warmup.ready else 503)
+
+@app.get("/metrics")
+async def metrics_endpoint() -> Response:
+    """ Counters and histograms in Prometheus text exposition format. """
+    return Response(content=metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
 @app.post("/chatkit")
 @app.post("//chatkit")
 @app.post("/api/chatkit")
@@ -60,6 +104,27 @@ async def chatkit_endpoint(request: Request) -> Response:
         logger.error(f"ChatKit Endpoint Error: {str(e)}")
         return JSONResponse({"error": "Failed to process ChatKit request"}, status_code=500)
 
+@app.post("/webhooks/sanity")
+async def sanity_webhook(request: Request) -> JSONResponse:
+    """ Invalidate cached Sanity data when a document changes. """
+    body = await request.body()
+    if not verify_signature(body, request.headers.get(SIGNATURE_HEADER, ""), WEBHOOK_SECRET):
+        logger.warning("Rejected Sanity webhook with invalid signature")
+        return JSONResponse({"error": "Invalid signature"}, status_code=401)
+
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return JSONResponse({"error": "Invalid JSON payload"}, status_code=400)
+
+    # Update the mirror first so queries after the invalidation read the new content
+    await sync_mirror(payload)
+    changes = handle_webhook_payload(payload)
+    return JSONResponse({
+        "invalidated": [{"_type": c.doc_type, "_id": c.doc_id} for c in changes],
+        "revision": content_changes.revision,
+    })
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
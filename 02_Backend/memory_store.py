@@ -6,6 +6,7 @@ A production app would implement this using a persistant database.
 from __future__ import annotations
 from collections import defaultdict
 from datetime import datetime
+from typing import Any
 from chatkit.store import NotFoundError, Store
 from chatkit.types import Attachment, Page, ThreadItem, ThreadMetadata
 
@@ -15,6 +16,26 @@ class MemoryStore(Store[dict]):
         self.items: dict[str, list[ThreadItem]] = defaultdict(list)
         self._item_counts: dict[str, int] = defaultdict(int)
         self._item_indices: dict[str, dict[str, int]] = defaultdict(dict)
+        # Cached token counts per thread, by item id (see history_window)
+        self._token_counts: dict[str, dict[str, int]] = defaultdict(dict)
+        # Rolling summary per thread (see summarizer)
+        self._summaries: dict[str, Any] = {}
+
+    def token_counts(self, thread_id: str) -> dict[str, int]:
+        """Token counts of a thread's items, kept until an item changes."""
+        return self._token_counts[thread_id]
+
+    def load_summary(self, thread_id: str) -> Any | None:
+        return self._summaries.get(thread_id)
+
+    def save_summary(self, thread_id: str, summary: Any) -> None:
+        self._summaries[thread_id] = summary
+
+    def _forget_tokens(self, thread_id: str, item_id: str) -> None:
+        counts = self._token_counts.get(thread_id)
+        if counts:
+            counts.pop(item_id, None)
+            counts.pop(f"{item_id}:elided", None)
 
     async def load_thread(self, thread_id: str, context: dict) -> ThreadMetadata:
         if thread_id not in self.threads:
@@ -66,6 +87,7 @@ class MemoryStore(Store[dict]):
         self._item_indices[thread_id][item.id] = self._item_counts[thread_id]
 
     async def save_item(self, thread_id: str, item: ThreadItem, context: dict) -> None:
+        self._forget_tokens(thread_id, item.id)
         items = self.items[thread_id]
         for idx, existing in enumerate(items):
             if existing.id == item.id:
@@ -84,10 +106,13 @@ class MemoryStore(Store[dict]):
     async def delete_thread(self, thread_id: str, context: dict) -> None:
         self.threads.pop(thread_id, None)
         self.items.pop(thread_id, None)
+        self._token_counts.pop(thread_id, None)
+        self._summaries.pop(thread_id, None)
 
     async def delete_thread_item(
         self, thread_id: str, item_id: str, context: dict
     ) -> None:
+        self._forget_tokens(thread_id, item_id)
         self.items[thread_id] = [
             item for item in self.items.get(thread_id, []) if item.id != item_id
         ]
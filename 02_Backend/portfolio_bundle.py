@@ -0,0 +1,149 @@
+"""
+Portfolio bundle: every section the tools need, fetched in one GROQ query.
+Each chat turn prefetches the bundle once; the profile priming and all
+five tools read their slice from it instead of issuing their own queries.
+"""
+import asyncio
+import hashlib
+import json
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from sanity_client import aquery_sanity
+from query_registry import queries
+from search_index import portfolio_index
+
+# Set up logging
+from logging_config import get_logger
+logger = get_logger(__name__)
+
+BUNDLE_QUERY = queries["portfolio.bundle"]
+MAX_RENDERED_OUTPUTS = 256
+
+# Prefetches in flight; asyncio keeps only weak references to running tasks
+_prefetches: set = set()
+
+
+def content_version(data: Any) -> str:
+    """Short content hash identifying one version of the bundle data."""
+    return hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()[:12]
+
+
+class PortfolioBundle:
+    """
+    A fetched bundle stamped with a content-hash version.
+
+    Rendered tool outputs are memoized on the bundle, so they live exactly
+    as long as this version of the content.
+    """
+
+    def __init__(self, data: dict):
+        self.data = data
+        self.fetched_at = time.time()
+        self.version = content_version(data)
+        self._rendered: Dict[Hashable, str] = {}
+
+    def rendered(self, key: Hashable, render: Callable[[], str]) -> str:
+        """
+        Return the memoized output for a tool call, rendering it on first use.
+
+        Args:
+            key: Tool name plus its arguments
+            render: Builds the output text from this bundle
+        """
+        text = self._rendered.get(key)
+        if text is None:
+            text = render()
+            # Arguments come from the model, so bound the memo per version
+            if len(self._rendered) < MAX_RENDERED_OUTPUTS:
+                self._rendered[key] = text
+        return text
+
+    @property
+    def profile(self) -> Optional[dict]:
+        return self.data.get("profile")
+
+    def skills(self, category: Optional[str] = None) -> List[dict]:
+        skills = self.data.get("skills") or []
+        if category:
+            return [s for s in skills if s.get("category") == category]
+        return skills
+
+    def projects(self, featured_only: bool = False) -> List[dict]:
+        projects = self.data.get("projects") or []
+        if featured_only:
+            return [p for p in projects if p.get("featured") is True]
+        return projects
+
+    def experience(self, query_param: Optional[str] = None) -> List[dict]:
+        """
+        Experience entries matching a search term, newest first.
+
+        Matches company, position, technologies, responsibilities and
+        achievements by token prefix or with small typos, via the local
+        search index.
+        """
+        experience = self.data.get("experience") or []
+        if query_param:
+            portfolio_index.sync(self.version, self.data)
+            matched = {hit.id for hit in portfolio_index.search(query_param, kinds=("experience",))}
+            return [job for job in experience if job.get("_id") in matched]
+        return experience
+
+    @property
+    def availability(self) -> Optional[dict]:
+        profile = self.profile
+        if not profile:
+            return None
+        return {
+            "availability": profile.get("availability"),
+            "email": profile.get("email"),
+            "services": self.data.get("services") or [],
+        }
+
+
+def _prefetch_done(task: "asyncio.Task") -> None:
+    _prefetches.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"Portfolio bundle prefetch failed: {task.exception()}")
+
+
+class PortfolioBundleCache:
+    """
+    Holds the current bundle. The raw result is cached (and coalesced) by
+    sanity_client, so a bundle is only re-versioned when its data changes.
+    """
+
+    def __init__(self):
+        self._bundle: Optional[PortfolioBundle] = None
+
+    async def get(self) -> Optional[PortfolioBundle]:
+        """Return the current bundle, or None if Sanity could not be reached."""
+        data = await aquery_sanity(BUNDLE_QUERY, use_cdn=False)
+        if not isinstance(data, dict) or not data.get("profile"):
+            return None
+        bundle = self._bundle
+        if bundle is None or bundle.data is not data:
+            if bundle is not None and content_version(data) == bundle.version:
+                # Refetched but unchanged: keep the bundle and its rendered outputs
+                bundle.data = data
+            else:
+                bundle = PortfolioBundle(data)
+                logger.info(f"Portfolio bundle version {bundle.version}")
+                self._bundle = bundle
+        return bundle
+
+    def prefetch(self) -> "asyncio.Task":
+        """Start fetching the bundle in the background for the current turn."""
+        task = asyncio.create_task(self.get())
+        _prefetches.add(task)
+        task.add_done_callback(_prefetch_done)
+        return task
+
+    @property
+    def current(self) -> Optional[PortfolioBundle]:
+        return self._bundle
+
+
+# Global bundle cache shared by all tools
+portfolio_bundle = PortfolioBundleCache()
@@ -0,0 +1,262 @@
+"""
+Pre-generated answers for the chat UI's starter prompts.
+Every starter prompt click would otherwise spend a full agent run. This
+module runs the real agent and tools over the configured prompts for each
+personality and stores the resulting stream events in a JSON artifact
+stamped with the portfolio content version. The server replays a stored
+answer instantly while the artifact matches the current content, and
+regenerates the artifact in the background when Sanity content changes.
+
+Usage:
+    python pregenerate.py [--prompt "What can you do?" ...] [--personality crisp ...] [--output PATH]
+"""
+import asyncio
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+
+from chatkit.types import ThreadStreamEvent
+from decouple import config
+
+from invalidation import content_changes, ContentChange
+from metrics import metrics
+from portfolio_bundle import portfolio_bundle
+from response_cache import normalize_question
+
+# Set up logging
+from logging_config import get_logger
+logger = get_logger(__name__)
+
+ARTIFACT_FORMAT = 1
+DEFAULT_ARTIFACT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "pregenerated_answers.json")
+PREGENERATED_PATH = config("PREGENERATED_ANSWERS_PATH", default=DEFAULT_ARTIFACT_PATH)
+PREGENERATED_ENABLED = config("PREGENERATED_ANSWERS_ENABLED", default=True, cast=bool)
+# Regenerate in the background after content changes (costs one agent run per prompt and personality)
+REGENERATE_ON_CHANGE = config("PREGENERATED_REGENERATE_ON_CHANGE", default=True, cast=bool)
+# Wait this long after a change so a burst of edits triggers one regeneration
+REGENERATE_DELAY = config("PREGENERATED_REGENERATE_DELAY", default=30.0, cast=float)
+# Starter prompts, separated by "|"; keep in sync with STARTER_PROMPTS in 01_Frontend/lib/config.ts
+STARTER_PROMPTS = [
+    prompt.strip() for prompt in config("STARTER_PROMPTS", default="What can you do?").split("|") if prompt.strip()
+]
+
+PREGENERATED_LOOKUPS = metrics.counter(
+    "pregenerated_answer_lookups_total", "Starter prompt lookups by outcome", ("outcome",)
+)
+
+Answer = Callable[[str, str], Awaitable[Sequence[ThreadStreamEvent]]]
+
+
+async def agent_answer(prompt: str, personality: str) -> List[ThreadStreamEvent]:
+    """
+    Run the real agent and tools for one opening prompt and collect its stream events.
+
+    The agent is the one built from the current profile: answers are stored
+    under the current content version, so a pending rebuild is awaited.
+    """
+    from agents import Runner
+    from chatkit.agents import AgentContext, simple_to_agent_input, stream_agent_response
+    from chatkit.types import InferenceOptions, ThreadMetadata, UserMessageItem, UserMessageTextContent
+
+    from agent import agent_cache
+    from memory_store import MemoryStore
+
+    store = MemoryStore()
+    thread = ThreadMetadata(id=f"pregenerate_{personality}", created_at=datetime.now(),
+                            metadata={"personality": personality})
+    item = UserMessageItem(id="pregenerate_prompt", thread_id=thread.id, created_at=datetime.now(),
+                           inference_options=InferenceOptions(), content=[UserMessageTextContent(text=prompt)])
+    agent_context = AgentContext(thread=thread, store=store, request_context={})
+    result = Runner.run_streamed(
+        await agent_cache.current(personality), await simple_to_agent_input([item]), context=agent_context
+    )
+    return [event async for event in stream_agent_response(agent_context, result)]
+
+
+def _personalities() -> List[str]:
+    from agent import PERSONALITY_INSTRUCTIONS
+    return list(PERSONALITY_INSTRUCTIONS)
+
+
+async def generate(
+    prompts: Sequence[str] = STARTER_PROMPTS,
+    personalities: Optional[Sequence[str]] = None,
+    answer: Answer = agent_answer,
+) -> dict:
+    """
+    Generate answers for every prompt and personality.
+
+    Returns:
+        The artifact: answers by personality and normalized prompt, stamped
+        with the portfolio content version they were generated from
+    """
+    bundle = await portfolio_bundle.get()
+    personalities = list(personalities or _personalities())
+    answers: Dict[str, Dict[str, dict]] = {}
+    for personality in personalities:
+        answers[personality] = {}
+        for prompt in prompts:
+            started = time.perf_counter()
+            events = list(await answer(prompt, personality))
+            if any(event.type == "error" for event in events):
+                logger.warning(f"Skipping '{prompt}' ({personality}): the run emitted an error")
+                continue
+            answers[personality][normalize_question(prompt)] = {
+                "prompt": prompt,
+                "events": [event.model_dump(mode="json") for event in events],
+            }
+            logger.info(f"Pre-generated '{prompt}' ({personality}) in {time.perf_counter() - started:.1f}s")
+    return {
+        "format": ARTIFACT_FORMAT,
+        "content_version": bundle.version if bundle else None,
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "answers": answers,
+    }
+
+
+def save_artifact(artifact: dict, path: str = PREGENERATED_PATH) -> None:
+    """Write the artifact atomically, so the server never reads a partial file."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(artifact, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def load_artifact(path: str = PREGENERATED_PATH) -> Optional[dict]:
+    """Read an artifact, or None if it is missing, unreadable or of another format."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            artifact = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.error(f"Failed to read pre-generated answers from {path}: {e}")
+        return None
+    if not isinstance(artifact, dict) or artifact.get("format") != ARTIFACT_FORMAT:
+        logger.warning(f"Ignoring pre-generated answers in {path}: unsupported format")
+        return None
+    return artifact
+
+
+class PregeneratedAnswers:
+    """
+    Serves stored starter prompt answers while they match the current content.
+
+    An artifact generated from another content version is never served; a
+    content change (or noticing the version moved on) schedules one
+    background regeneration that replaces the artifact when it finishes.
+    """
+
+    def __init__(self, path: str = PREGENERATED_PATH, answer: Answer = agent_answer,
+                 prompts: Sequence[str] = STARTER_PROMPTS, regenerate_delay: float = REGENERATE_DELAY,
+                 regenerate_on_change: bool = REGENERATE_ON_CHANGE):
+        self.path = path
+        self.answer = answer
+        self.prompts = list(prompts)
+        self.regenerate_delay = regenerate_delay
+        self.regenerate_on_change = regenerate_on_change
+        self.artifact: Optional[dict] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def load(self) -> bool:
+        self.artifact = load_artifact(self.path)
+        if self.artifact is not None:
+            count = sum(len(answers) for answers in self.artifact["answers"].values())
+            logger.info(f"Loaded {count} pre-generated answers (content version {self.artifact['content_version']})")
+        return self.artifact is not None
+
+    @property
+    def version(self) -> Optional[str]:
+        return self.artifact.get("content_version") if self.artifact else None
+
+    def lookup(self, question: str, personality: str) -> Optional[List[dict]]:
+        """Stored events for a normalized opening question, if current."""
+        if self.artifact is None:
+            return None
+        stored = self.artifact["answers"].get(personality, {}).get(question)
+        if stored is None:
+            return None
+        bundle = portfolio_bundle.current
+        if bundle is None:
+            # Not fetched yet, so the artifact cannot be checked against it
+            PREGENERATED_LOOKUPS.inc(outcome="unverified")
+            return None
+        if bundle.version != self.version:
+            PREGENERATED_LOOKUPS.inc(outcome="outdated")
+            self.schedule_regeneration()
+            return None
+        PREGENERATED_LOOKUPS.inc(outcome="hit")
+        return stored["events"]
+
+    def schedule_regeneration(self, delay: Optional[float] = None) -> Optional[asyncio.Task]:
+        """Start one background regeneration unless one is already pending."""
+        if not self.regenerate_on_change:
+            return None
+        if self._task is not None and not self._task.done():
+            return self._task
+        try:
+            self._task = asyncio.get_running_loop().create_task(
+                self.regenerate(self.regenerate_delay if delay is None else delay)
+            )
+        except RuntimeError:
+            return None
+        return self._task
+
+    async def regenerate(self, delay: float = 0.0) -> bool:
+        """Generate a fresh artifact, save it and start serving it."""
+        if delay:
+            await asyncio.sleep(delay)
+        try:
+            artifact = await generate(self.prompts, answer=self.answer)
+            await asyncio.to_thread(save_artifact, artifact, self.path)
+        except Exception as e:
+            logger.error(f"Regenerating pre-generated answers failed: {e}")
+            return False
+        self.artifact = artifact
+        logger.info(f"Pre-generated answers regenerated for content version {artifact['content_version']}")
+        return True
+
+    def on_content_change(self, change: ContentChange) -> None:
+        if self.artifact is not None:
+            self.schedule_regeneration()
+
+
+# Global pre-generated answers, loaded at startup
+pregenerated_answers = PregeneratedAnswers()
+content_changes.subscribe(pregenerated_answers.on_content_change)
+
+
+async def _main(prompts: Sequence[str], personalities: Optional[Sequence[str]], output: str) -> None:
+    from document_store import load_configured_mirror
+    from sanity_client import close_sanity_clients
+
+    load_configured_mirror()
+    try:
+        artifact = await generate(prompts, personalities)
+    finally:
+        await close_sanity_clients()
+    save_artifact(artifact, output)
+    count = sum(len(answers) for answers in artifact["answers"].values())
+    print(f"Wrote {count} answers for content version {artifact['content_version']} to {output}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pre-generate answers for the chat UI's starter prompts")
+    parser.add_argument("--prompt", action="append", dest="prompts", help="Prompt to answer (repeatable)")
+    parser.add_argument("--personality", action="append", dest="personalities", help="Personality (repeatable)")
+    parser.add_argument("--output", default=PREGENERATED_PATH)
+    args = parser.parse_args()
+
+    asyncio.run(_main(args.prompts or STARTER_PROMPTS, args.personalities, args.output))
@@ -0,0 +1,251 @@
+"""
+Named GROQ query templates.
+Every query the tools run is registered here once, with `$param` bindings
+instead of interpolated arguments, so the query text never varies. Each
+template is validated and compiled for the local engine at import time and
+gets cache keys derived from its ID and bound params.
+"""
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+from cache_config import normalize_query, extract_doc_types
+from groq_engine import compile_query, GroqUnsupportedError, QueryPlan
+from groq_validator import groq_validator
+
+# Set up logging
+from logging_config import get_logger
+logger = get_logger(__name__)
+
+_PARAM = re.compile(r'"(?:[^"\\]|\\.)*"|\$([A-Za-z_][A-Za-z0-9_]*)')
+
+
+def _param_names(query: str) -> Tuple[str, ...]:
+    """Names of the `$params` a query uses (ignoring `$` inside string literals)."""
+    names = []
+    for match in _PARAM.finditer(query):
+        name = match.group(1)
+        if name and name not in names:
+            names.append(name)
+    return tuple(names)
+
+
+@dataclass(frozen=True)
+class QueryTemplate:
+    id: str
+    text: str
+    params: Tuple[str, ...]
+    doc_types: frozenset
+    # Compiled plan for the local mirror; None if the engine cannot evaluate it
+    plan: Optional[QueryPlan] = field(default=None, compare=False, repr=False)
+
+    def bind(self, params: Optional[dict] = None) -> Dict[str, Any]:
+        """
+        Check params against the template's `$param` names.
+
+        Raises:
+            ValueError: If a param is missing or not used by the template
+        """
+        params = dict(params or {})
+        missing = [name for name in self.params if name not in params]
+        unexpected = [name for name in params if name not in self.params]
+        if missing or unexpected:
+            raise ValueError(
+                f"Query '{self.id}' expects params {list(self.params)}; "
+                f"missing={missing} unexpected={unexpected}"
+            )
+        return params
+
+    def cache_key(self, params: Optional[dict] = None, use_cdn: bool = True) -> Tuple:
+        """Stable result-cache key from the template ID and bound params."""
+        return (f"template:{self.id}", json.dumps(params or {}, sort_keys=True, default=str), use_cdn)
+
+
+class QueryRegistry:
+    """Registry of validated, precompiled query templates keyed by ID."""
+
+    def __init__(self):
+        self._templates: Dict[str, QueryTemplate] = {}
+
+    def register(self, template_id: str, query: str) -> QueryTemplate:
+        """
+        Validate, compile and register a query template.
+
+        Args:
+            template_id: Unique template name (e.g. "skills.by_category")
+            query: GROQ text using `$name` bindings for every argument
+
+        Returns:
+            The registered QueryTemplate
+
+        Raises:
+            ValueError: If the ID is taken or the query fails validation
+        """
+        if template_id in self._templates:
+            raise ValueError(f"Query template '{template_id}' is already registered")
+
+        text = normalize_query(query)
+        validation = groq_validator.validate_query(text)
+        if not (validation["is_valid"] and validation["is_safe"]):
+            raise ValueError(f"Query template '{template_id}' failed validation: {validation['errors']}")
+
+        try:
+            plan = compile_query(text)
+        except GroqUnsupportedError as e:
+            logger.warning(f"Query template '{template_id}' will always use the Sanity API: {e}")
+            plan = None
+
+        template = QueryTemplate(
+            id=template_id,
+            text=text,
+            params=_param_names(text),
+            doc_types=extract_doc_types(text),
+            plan=plan,
+        )
+        self._templates[template_id] = template
+        return template
+
+    def __getitem__(self, template_id: str) -> QueryTemplate:
+        return self._templates[template_id]
+
+    def __contains__(self, template_id: str) -> bool:
+        return template_id in self._templates
+
+    def __iter__(self):
+        return iter(self._templates.values())
+
+
+# Global registry of every query the tools run
+queries = QueryRegistry()
+
+_PROFILE_FIELDS = '''
+    firstName,
+    lastName,
+    headline,
+    shortBio,
+    email,
+    phone,
+    location,
+    availability,
+    yearsOfExperience,
+    "profileImageUrl": profileImage.asset->url,
+    socialLinks
+'''
+
+_SKILL_FIELDS = '''
+    _id,
+    name,
+    category,
+    proficiency,
+    percentage,
+    yearsOfExperience
+'''
+
+_PROJECT_FIELDS = '''
+    _id,
+    title,
+    tagline,
+    featured,
+    "technologies": technologies[]->name,
+    githubUrl,
+    liveUrl,
+    "imageUrl": coverImage.asset->url
+'''
+
+_EXPERIENCE_FIELDS = '''
+    _id,
+    company,
+    position,
+    startDate,
+    endDate,
+    current,
+    "technologies": technologies[]->name,
+    responsibilities,
+    achievements
+'''
+
+_SERVICE_FIELDS = '''
+    title,
+    shortDescription,
+    pricing
+'''
+
+queries.register("profile.singleton", f'''
+*[_id == "singleton-profile" && !(_id in path("drafts.**"))][0]{{{_PROFILE_FIELDS}}}
+''')
+
+queries.register("profile.by_type", '''
+*[_type == "profile" && !(_id in path("drafts.**"))][0]
+''')
+
+queries.register("skills.all", f'''
+*[_type == "skill" && !(_id in path("drafts.**"))] | order(percentage desc) {{{_SKILL_FIELDS}}}
+''')
+
+queries.register("skills.by_category", f'''
+*[_type == "skill" && category == $category && !(_id in path("drafts.**"))] | order(percentage desc) {{{_SKILL_FIELDS}}}
+''')
+
+queries.register("projects.all", f'''
+*[_type == "project" && !(_id in path("drafts.**"))] | order(order asc) {{{_PROJECT_FIELDS}}}
+''')
+
+queries.register("projects.featured", f'''
+*[_type == "project" && featured == true && !(_id in path("drafts.**"))] | order(order asc) {{{_PROJECT_FIELDS}}}
+''')
+
+queries.register("experience.all", f'''
+*[_type == "experience" && !(_id in path("drafts.**"))] | order(startDate desc) {{{_EXPERIENCE_FIELDS}}}
+''')
+
+# $pattern is the search term with a trailing `*` for prefix matching
+queries.register("experience.search", f'''
+*[_type == "experience" && !(_id in path("drafts.**")) && (
+    company match $pattern ||
+    position match $pattern
+)] | order(startDate desc) {{{_EXPERIENCE_FIELDS}}}
+''')
+
+queries.register("availability", f'''
+*[_id == "singleton-profile" || (_type == "profile" && !(_id in path("drafts.**")))][0]{{
+    availability,
+    email,
+    "services": *[_type == "service" && !(_id in path("drafts.**"))] | order(order asc){{{_SERVICE_FIELDS}}}
+}}
+''')
+
+queries.register("portfolio.bundle", f'''
+{{
+    "profile": coalesce(
+        *[_id == "singleton-profile"][0],
+        *[_type == "profile" && !(_id in path("drafts.**"))][0]
+    ){{{_PROFILE_FIELDS}}},
+    "skills": *[_type == "skill" && !(_id in path("drafts.**"))] | order(percentage desc) {{{_SKILL_FIELDS}}},
+    "projects": *[_type == "project" && !(_id in path("drafts.**"))] | order(order asc) {{{_PROJECT_FIELDS}}},
+    "experience": *[_type == "experience" && !(_id in path("drafts.**"))] | order(startDate desc) {{{_EXPERIENCE_FIELDS}}},
+    "services": *[_type == "service" && !(_id in path("drafts.**"))] | order(order asc) {{{_SERVICE_FIELDS}}}
+}}
+''')
+
+# Prose the retrieval index chunks; portable-text fields are flattened in Python
+queries.register("retrieval.corpus", '''
+{
+    "profile": coalesce(
+        *[_id == "singleton-profile"][0],
+        *[_type == "profile" && !(_id in path("drafts.**"))][0]
+    ){_id, firstName, lastName, headline, shortBio, fullBio},
+    "projects": *[_type == "project" && !(_id in path("drafts.**"))] | order(order asc) {
+        _id, title, tagline, category, description, "technologies": technologies[]->name
+    },
+    "experience": *[_type == "experience" && !(_id in path("drafts.**"))] | order(startDate desc) {
+        _id, company, position, description, "technologies": technologies[]->name, responsibilities, achievements
+    },
+    "blog": *[_type == "blog" && !(_id in path("drafts.**"))] | order(publishedAt desc) {
+        _id, title, excerpt, category, tags
+    },
+    "testimonials": *[_type == "testimonial" && !(_id in path("drafts.**"))] | order(order asc) {
+        _id, name, position, company, testimonial
+    }
+}
+''')
@@ -0,0 +1,246 @@
+"""
+Tail-latency and failure protection for redundant upstream endpoints.
+Tracks per-endpoint latency to derive a hedging deadline, keeps a circuit
+breaker per endpoint, and races a hedged request against a slow primary.
+Used by sanity_client for the CDN (apicdn) and live (api) Sanity hosts.
+"""
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Optional, Sequence
+
+# Set up logging
+from logging_config import get_logger
+logger = get_logger(__name__)
+
+# Circuit breaker states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when every endpoint's circuit breaker is open."""
+
+
+class LatencyTracker:
+    """
+    Sliding window of recent successful latencies.
+
+    Until `min_samples` have been observed the hedging deadline falls back to
+    `initial_delay`, so a cold process does not hedge on noise.
+    """
+
+    def __init__(self, window: int = 100, min_samples: int = 20,
+                 initial_delay: float = 1.0, min_delay: float = 0.05, max_delay: float = 10.0):
+        self.min_samples = min_samples
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self._samples: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Return the q-quantile (0..1) of the window, or None if it is empty."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, max(0, math.ceil(q * len(samples)) - 1))
+        return samples[index]
+
+    def deadline(self, q: float = 0.95) -> float:
+        """Seconds to wait on this endpoint before hedging."""
+        with self._lock:
+            warm = len(self._samples) >= self.min_samples
+        delay = self.percentile(q) if warm else self.initial_delay
+        return min(self.max_delay, max(self.min_delay, delay))
+
+
+class CircuitBreaker:
+    """
+    Per-endpoint circuit breaker.
+
+    Opens after `failure_threshold` consecutive failures. After
+    `reset_timeout` seconds the breaker goes half-open and lets traffic
+    through; the next success closes it and the next failure re-opens it.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a request may be sent to this endpoint now."""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                logger.info(f"Circuit '{self.name}' half-open, probing endpoint")
+            return self.state != OPEN
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != CLOSED:
+                logger.info(f"Circuit '{self.name}' closed")
+            self.state = CLOSED
+            self.failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    logger.warning(f"Circuit '{self.name}' opened after {self.failures} failures")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+
+class Endpoint:
+    """An upstream endpoint with its own latency window and circuit breaker."""
+
+    def __init__(self, name: str, url: str, latency: Optional[LatencyTracker] = None,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.name = name
+        self.url = url
+        self.latency = latency or LatencyTracker()
+        self.breaker = breaker or CircuitBreaker(name)
+        # Requests on this endpoint that ran past their deadline and were hedged
+        self.hedges = 0
+
+    def status(self) -> dict:
+        return {
+            "url": self.url,
+            "circuit": self.breaker.state,
+            "failures": self.breaker.failures,
+            "p95_ms": round((self.latency.percentile(0.95) or 0.0) * 1000, 1),
+            "hedges": self.hedges,
+        }
+
+
+async def hedged_call(
+    endpoints: Sequence[Endpoint],
+    call: Callable[[Endpoint], Awaitable[Any]],
+    is_failure: Callable[[BaseException], bool] = lambda e: True,
+    percentile: float = 0.95,
+    hedge: bool = True,
+) -> Any:
+    """
+    Call the first available endpoint, hedging to the next one if it is slow.
+
+    The primary gets until its latency percentile deadline to answer; after
+    that (or as soon as it fails) the request is also sent to the next
+    endpoint whose breaker allows traffic, and the first success wins.
+
+    Args:
+        endpoints: Endpoints in preference order
+        call: Coroutine function performing the request against one endpoint
+        is_failure: Whether an exception reflects endpoint health (e.g. a
+            timeout or 5xx) rather than a bad request that would fail anywhere
+        percentile: Latency quantile used as the hedging deadline
+        hedge: If False, only fail over after an error (never race)
+
+    Raises:
+        CircuitOpenError: If every endpoint's breaker is open
+    """
+    candidates = [ep for ep in endpoints if ep.breaker.allow()]
+    if not candidates:
+        raise CircuitOpenError(f"All endpoints unavailable: {[ep.name for ep in endpoints]}")
+
+    async def attempt(endpoint: Endpoint) -> Any:
+        started = time.perf_counter()
+        try:
+            result = await call(endpoint)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if is_failure(e):
+                endpoint.breaker.record_failure()
+            else:
+                endpoint.breaker.record_success()
+            raise
+        endpoint.latency.observe(time.perf_counter() - started)
+        endpoint.breaker.record_success()
+        return result
+
+    backups = list(candidates[1:])
+    running = {asyncio.ensure_future(attempt(candidates[0])): candidates[0]}
+    deadline = candidates[0].latency.deadline(percentile) if hedge else None
+    error: Optional[BaseException] = None
+    try:
+        while running:
+            done, _ = await asyncio.wait(
+                set(running),
+                timeout=deadline if backups else None,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if not done:
+                # Deadline passed: hedge to the next endpoint, keep the primary running
+                backup = backups.pop(0)
+                candidates[0].hedges += 1
+                logger.debug(f"Hedging slow request on '{candidates[0].name}' to '{backup.name}'")
+                running[asyncio.ensure_future(attempt(backup))] = backup
+                continue
+
+            for task in done:
+                running.pop(task)
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+                if not is_failure(error):
+                    raise error
+
+            if not running and backups:
+                # Primary failed outright: fail over without waiting
+                backup = backups.pop(0)
+                running[asyncio.ensure_future(attempt(backup))] = backup
+        raise error
+    finally:
+        for task in running:
+            task.cancel()
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+
+
+def failover_call(
+    endpoints: Sequence[Endpoint],
+    call: Callable[[Endpoint], Any],
+    is_failure: Callable[[BaseException], bool] = lambda e: True,
+) -> Any:
+    """
+    Blocking counterpart of hedged_call: try endpoints in order, moving on
+    only when one fails.
+
+    Raises:
+        CircuitOpenError: If every endpoint's breaker is open
+    """
+    candidates = [ep for ep in endpoints if ep.breaker.allow()]
+    if not candidates:
+        raise CircuitOpenError(f"All endpoints unavailable: {[ep.name for ep in endpoints]}")
+
+    error: Optional[BaseException] = None
+    for endpoint in candidates:
+        started = time.perf_counter()
+        try:
+            result = call(endpoint)
+        except Exception as e:
+            if not is_failure(e):
+                endpoint.breaker.record_success()
+                raise
+            endpoint.breaker.record_failure()
+            error = e
+            continue
+        endpoint.latency.observe(time.perf_counter() - started)
+        endpoint.breaker.record_success()
+        return result
+    raise error
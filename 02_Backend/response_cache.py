@@ -0,0 +1,200 @@
+"""
+Cache of complete responses to repeated visitor questions.
+Most visitors open with the same handful of questions, so the stream
+events of an opening answer are stored under the normalized question,
+the personality and the dataset revision. A repeat of the question in a new
+thread replays those events (with fresh item ids) through the normal
+ChatKit streaming path without running the agent. Entries expire after
+RESPONSE_CACHE_TTL, the cache is bounded LRU, and any content change
+clears it.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Sequence, Tuple
+
+from chatkit.types import ThreadStreamEvent, UserMessageItem
+from decouple import config
+from pydantic import TypeAdapter
+
+from invalidation import content_changes, ContentChange
+from metrics import metrics
+
+# Set up logging
+from logging_config import get_logger
+logger = get_logger(__name__)
+
+RESPONSE_CACHE_ENABLED = config("RESPONSE_CACHE_ENABLED", default=True, cast=bool)
+RESPONSE_CACHE_TTL = config("RESPONSE_CACHE_TTL", default=3600.0, cast=float)
+RESPONSE_CACHE_MAX_ENTRIES = config("RESPONSE_CACHE_MAX_ENTRIES", default=256, cast=int)
+# Responses with more stream events than this are not cached
+RESPONSE_CACHE_MAX_EVENTS = config("RESPONSE_CACHE_MAX_EVENTS", default=2000, cast=int)
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_event_adapter = TypeAdapter(ThreadStreamEvent)
+
+# ChatKit store item type used to generate ids for replayed items
+STORE_ITEM_TYPES = {
+    "client_tool_call": "tool_call",
+    "task": "task",
+    "workflow": "workflow",
+    "sdk_hidden_context": "sdk_hidden_context",
+}
+
+
+def normalize_question(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    return " ".join(_PUNCTUATION.sub(" ", text.lower()).split())
+
+
+def question_text(item: Optional[UserMessageItem]) -> Optional[str]:
+    """The plain text of a cacheable user message, or None if it carries more than text."""
+    if item is None or item.attachments or item.quoted_text:
+        return None
+    parts = []
+    for part in item.content:
+        if getattr(part, "type", None) != "input_text":
+            return None
+        parts.append(part.text)
+    text = normalize_question(" ".join(parts))
+    return text or None
+
+
+@dataclass
+class CachedResponse:
+    events: List[dict]
+    expires_at: float
+    hits: int = 0
+
+
+@dataclass
+class ResponseCacheStats:
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+    def as_dict(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def _remap(value: Any, ids: Dict[str, str], thread_id: str, now: datetime) -> Any:
+    if isinstance(value, dict):
+        remapped = {}
+        for key, field in value.items():
+            if key in ("id", "item_id") and isinstance(field, str) and field in ids:
+                remapped[key] = ids[field]
+            elif key == "thread_id":
+                remapped[key] = thread_id
+            elif key == "created_at":
+                remapped[key] = now
+            else:
+                remapped[key] = _remap(field, ids, thread_id, now)
+        return remapped
+    if isinstance(value, list):
+        return [_remap(field, ids, thread_id, now) for field in value]
+    return value
+
+
+class ResponseCache:
+    """Bounded LRU of recorded stream events with a TTL per entry."""
+
+    def __init__(self, ttl: float = RESPONSE_CACHE_TTL, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES,
+                 max_events: int = RESPONSE_CACHE_MAX_EVENTS):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_events = max_events
+        self.stats = ResponseCacheStats()
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def make_key(question: str, personality: str, revision: Any) -> Tuple:
+        return (question, personality, revision)
+
+    def lookup(self, key: Hashable) -> Optional[List[dict]]:
+        """Recorded events for a key, or None on a miss or an expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() >= entry.expires_at:
+                if entry is not None:
+                    del self._entries[key]
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            entry.hits += 1
+            self.stats.hits += 1
+            return entry.events
+
+    def store(self, key: Hashable, events: Sequence[ThreadStreamEvent]) -> bool:
+        """Record a complete response; returns False if it is not cacheable."""
+        if not events or len(events) > self.max_events:
+            return False
+        if any(event.type in ("error", "thread.created", "thread.updated") for event in events):
+            return False
+        recorded = [event.model_dump() for event in events]
+        with self._lock:
+            self._entries[key] = CachedResponse(recorded, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            self.stats.stores += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            if self._entries:
+                self.stats.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def on_content_change(self, change: ContentChange) -> None:
+        # Any document can appear in an answer, so every change clears the cache
+        self.clear()
+
+
+def replay(events: Sequence[dict], thread_id: str, new_id: Callable[[str], str]) -> Iterator[ThreadStreamEvent]:
+    """
+    Rebuild recorded events for another thread.
+
+    Every item gets a new id (from `new_id(store_item_type)`), the thread id
+    and timestamps are replaced, and updates follow their item's new id.
+    """
+    ids: Dict[str, str] = {}
+    now = datetime.now()
+    for event in events:
+        item = event.get("item")
+        if isinstance(item, dict) and item.get("id") not in ids:
+            ids[item["id"]] = new_id(STORE_ITEM_TYPES.get(item.get("type"), "message"))
+        yield _event_adapter.validate_python(_remap(event, ids, thread_id, now))
+
+
+# Global response cache, cleared whenever Sanity content changes
+response_cache = ResponseCache()
+content_changes.subscribe(response_cache.on_content_change)
+
+metrics.callback(
+    "response_cache_lookups_total", "Response cache lookups by outcome", "counter",
+    lambda: {(outcome,): getattr(response_cache.stats, outcome) for outcome in ("hits", "misses")},
+    ("outcome",),
+)
+metrics.callback(
+    "response_cache_hit_ratio", "Share of response cache lookups that replayed a stored answer", "gauge",
+    lambda: {(): response_cache.stats.as_dict()["hit_ratio"]},
+)
+metrics.callback("response_cache_entries", "Responses currently cached", "gauge", lambda: {(): len(response_cache)})
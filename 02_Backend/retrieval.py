@@ -0,0 +1,277 @@
+"""
+Local lexical retrieval over portfolio prose.
+Profile, project, experience, blog and testimonial documents are split into
+short chunks (a paragraph, a responsibility, a testimonial) and scored with
+BM25 held as a dense NumPy weight matrix, so a batch of queries is scored
+with one matrix product and needs no network model. The index rebuilds
+when the corpus content changes.
+"""
+import asyncio
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from decouple import config
+
+from invalidation import content_changes, ContentChange
+from portfolio_bundle import content_version
+from query_registry import queries
+from sanity_client import aquery_sanity
+from search_index import tokenize
+
+# Set up logging
+from logging_config import get_logger
+logger = get_logger(__name__)
+
+CORPUS_QUERY = queries["retrieval.corpus"]
+# Types whose changes can alter the corpus (including dereferenced skills)
+CORPUS_TYPES = CORPUS_QUERY.doc_types
+
+# BM25 parameters
+K1 = config("RETRIEVAL_BM25_K1", default=1.2, cast=float)
+B = config("RETRIEVAL_BM25_B", default=0.75, cast=float)
+MAX_CHUNK_WORDS = config("RETRIEVAL_MAX_CHUNK_WORDS", default=60, cast=int)
+# Re-check the corpus at most this often when no change has been published
+MAX_AGE = config("RETRIEVAL_MAX_AGE", default=300.0, cast=float)
+DEFAULT_TOP_K = 5
+
+STOP_WORDS = frozenset(
+    "a about an and are as at be by can do does for from has have how i in is it its me my of on or "
+    "that the their this to was what when where which who why with you your".split()
+)
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def plain_text(value) -> List[str]:
+    """Paragraphs of a string or a portable-text block list."""
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [value]
+    paragraphs = []
+    for block in value:
+        if isinstance(block, str):
+            paragraphs.append(block)
+        elif isinstance(block, dict):
+            text = "".join(span.get("text", "") for span in block.get("children") or [] if isinstance(span, dict))
+            if text.strip():
+                paragraphs.append(text)
+    return paragraphs
+
+
+def _split(paragraph: str, max_words: int) -> List[str]:
+    """Split a long paragraph on sentence ends into pieces of at most ~max_words words."""
+    if len(paragraph.split()) <= max_words:
+        return [paragraph]
+    pieces, current = [], []
+    for sentence in _SENTENCE_END.split(paragraph):
+        if current and len(" ".join(current + [sentence]).split()) > max_words:
+            pieces.append(" ".join(current))
+            current = []
+        current.append(sentence)
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+def terms(text: str) -> List[str]:
+    """Index terms of a text: lowercase alphanumeric tokens without stop words."""
+    return [token for token in tokenize(text) if token not in STOP_WORDS]
+
+
+@dataclass(frozen=True)
+class Chunk:
+    kind: str
+    doc_id: str
+    title: str
+    text: str
+
+
+@dataclass(frozen=True)
+class Snippet:
+    chunk: Chunk
+    score: float
+
+
+def chunk_corpus(data: dict, max_words: int = MAX_CHUNK_WORDS) -> List[Chunk]:
+    """Split the corpus query result into titled chunks."""
+    chunks: List[Chunk] = []
+
+    def add(kind: str, doc: dict, title: str, texts: Sequence[str]) -> None:
+        for paragraph in texts:
+            for piece in _split(" ".join(paragraph.split()), max_words):
+                if piece:
+                    chunks.append(Chunk(kind, doc.get("_id") or title, title, piece))
+
+    profile = data.get("profile") or {}
+    if profile:
+        name = f"{profile.get('firstName', '')} {profile.get('lastName', '')}".strip() or "Profile"
+        add("profile", profile, name, [profile.get("headline") or "", profile.get("shortBio") or ""])
+        add("profile", profile, name, plain_text(profile.get("fullBio")))
+
+    for project in data.get("projects") or []:
+        technologies = ", ".join(project.get("technologies") or [])
+        summary = " ".join(part for part in [
+            project.get("tagline") or "",
+            f"Category: {project['category']}." if project.get("category") else "",
+            f"Built with {technologies}." if technologies else "",
+        ] if part)
+        add("project", project, project.get("title") or "Project", [summary] + plain_text(project.get("description")))
+
+    for job in data.get("experience") or []:
+        title = f"{job.get('position', '')} at {job.get('company', '')}"
+        technologies = ", ".join(job.get("technologies") or [])
+        texts = plain_text(job.get("description")) + list(job.get("responsibilities") or []) + list(job.get("achievements") or [])
+        if technologies:
+            texts.append(f"Technologies: {technologies}.")
+        add("experience", job, title, texts)
+
+    for post in data.get("blog") or []:
+        tags = ", ".join(post.get("tags") or [])
+        add("blog", post, post.get("title") or "Blog post", [" ".join(part for part in [
+            post.get("excerpt") or "", f"Tags: {tags}." if tags else "",
+        ] if part)])
+
+    for testimonial in data.get("testimonials") or []:
+        author = ", ".join(part for part in [
+            testimonial.get("name"), testimonial.get("position"), testimonial.get("company"),
+        ] if part)
+        add("testimonial", testimonial, author or "Testimonial", [testimonial.get("testimonial") or ""])
+
+    return chunks
+
+
+class BM25Matrix:
+    """
+    BM25 term weights as a dense (vocabulary x chunks) float32 matrix.
+
+    Scoring a batch of queries gathers the rows of the query terms and
+    multiplies them by the queries' term counts.
+    """
+
+    def __init__(self, documents: Sequence[List[str]], k1: float = K1, b: float = B):
+        self.vocabulary: Dict[str, int] = {}
+        for tokens in documents:
+            for token in tokens:
+                self.vocabulary.setdefault(token, len(self.vocabulary))
+
+        counts = np.zeros((len(self.vocabulary), len(documents)), dtype=np.float32)
+        for column, tokens in enumerate(documents):
+            for token in tokens:
+                counts[self.vocabulary[token], column] += 1
+
+        lengths = counts.sum(axis=0)
+        average = lengths.mean() if len(documents) else 0.0
+        document_frequency = (counts > 0).sum(axis=1)
+        idf = np.log1p((len(documents) - document_frequency + 0.5) / (document_frequency + 0.5))
+        norm = k1 * (1 - b + b * lengths / average) if average else np.ones_like(lengths)
+        self.weights = (idf[:, None] * counts * (k1 + 1) / (counts + norm[None, :])).astype(np.float32)
+
+    @property
+    def size(self) -> int:
+        return self.weights.shape[1]
+
+    def score(self, queries: Sequence[List[str]]) -> np.ndarray:
+        """BM25 scores of every chunk for each query, shape (queries, chunks)."""
+        rows = sorted({self.vocabulary[t] for tokens in queries for t in tokens if t in self.vocabulary})
+        if not rows:
+            return np.zeros((len(queries), self.size), dtype=np.float32)
+        position = {row: i for i, row in enumerate(rows)}
+        query_counts = np.zeros((len(queries), len(rows)), dtype=np.float32)
+        for i, tokens in enumerate(queries):
+            for token in tokens:
+                row = self.vocabulary.get(token)
+                if row is not None:
+                    query_counts[i, position[row]] += 1
+        return query_counts @ self.weights[rows]
+
+
+class RetrievalIndex:
+    """BM25 index over the corpus chunks, rebuilt when the corpus content changes."""
+
+    def __init__(self, max_age: float = MAX_AGE):
+        self.max_age = max_age
+        self.version: Optional[str] = None
+        self.chunks: List[Chunk] = []
+        self.checked_at = 0.0
+        self._matrix: Optional[BM25Matrix] = None
+        self._stale = True
+        self._refresh_lock: Optional[asyncio.Lock] = None
+
+    @property
+    def stale(self) -> bool:
+        return self._stale or time.monotonic() - self.checked_at > self.max_age
+
+    def build(self, data: dict) -> bool:
+        """
+        Index a corpus query result unless that content is already indexed.
+
+        Returns:
+            True if the index was rebuilt
+        """
+        self.checked_at = time.monotonic()
+        self._stale = False
+        version = content_version(data)
+        if version == self.version:
+            return False
+        started = time.perf_counter()
+        chunks = chunk_corpus(data)
+        matrix = BM25Matrix([terms(f"{chunk.title} {chunk.text}") for chunk in chunks])
+        # Swap both together so searches never see a half-built index
+        self.chunks, self._matrix, self.version = chunks, matrix, version
+        logger.info(
+            f"Retrieval index built: {len(chunks)} chunks, {len(matrix.vocabulary)} terms "
+            f"in {(time.perf_counter() - started) * 1000:.1f}ms (version {version})"
+        )
+        return True
+
+    async def refresh(self, force: bool = False) -> bool:
+        """Fetch the corpus and rebuild if it changed; concurrent callers share one fetch."""
+        if not (force or self.stale):
+            return False
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        async with self._refresh_lock:
+            if not (force or self.stale):
+                return False
+            # A change published while the fetch is in flight sets the flag
+            # again, so the index stays stale and the next call refetches
+            self._stale = False
+            data = await aquery_sanity(CORPUS_QUERY, use_cdn=False)
+            changed = self._stale
+            if not isinstance(data, dict):
+                logger.warning("Retrieval corpus unavailable, keeping the current index")
+                self._stale = True
+                return False
+            rebuilt = self.build(data)
+            self._stale = changed
+            return rebuilt
+
+    def search(self, query: str, top_k: int = DEFAULT_TOP_K) -> List[Snippet]:
+        """Top-k chunks for one query, best first."""
+        return self.search_many([query], top_k)[0]
+
+    def search_many(self, queries: Sequence[str], top_k: int = DEFAULT_TOP_K) -> List[List[Snippet]]:
+        """Top-k chunks for each of a batch of queries, scored in one matrix product."""
+        matrix, chunks = self._matrix, self.chunks
+        if matrix is None or not chunks or not queries:
+            return [[] for _ in queries]
+        scores = matrix.score([terms(query) for query in queries])
+        k = max(1, min(top_k, len(chunks)))
+        results = []
+        for row in scores:
+            top = np.argpartition(-row, k - 1)[:k] if k < len(chunks) else np.arange(len(chunks))
+            top = top[np.argsort(-row[top], kind="stable")]
+            results.append([Snippet(chunks[i], float(row[i])) for i in top if row[i] > 0])
+        return results
+
+    def on_content_change(self, change: ContentChange) -> None:
+        if change.doc_type is None or change.doc_type in CORPUS_TYPES:
+            self._stale = True
+
+
+# Global retrieval index, marked stale by published content changes
+retrieval_index = RetrievalIndex()
+content_changes.subscribe(retrieval_index.on_content_change)
@@ -1,6 +1,23 @@
 from decouple import config
+import asyncio
+import json
+import threading
+import time
 import httpx
-from typing import Optional, Any
+from typing import Optional, Any, Tuple, Union
+
+from cache_config import query_cache, extract_doc_types, FRESH, STALE
+from singleflight import SingleFlight
+from document_store import OFFLINE_MODE, document_store
+from invalidation import content_changes
+from groq_engine import compile_query, GroqUnsupportedError
+from query_registry import QueryTemplate
+from resilience import CircuitBreaker, Endpoint, LatencyTracker, hedged_call, failover_call
+from metrics import metrics
+
+# Set up logging
+from logging_config import get_logger
+logger = get_logger(__name__)
 
 PROJECT_ID = config("SANITY_PROJECT_ID")
 DATASET = config("SANITY_DATASET", default="production")
@@ -11,27 +28,442 @@ TOKEN = config("SANITY_API_TOKEN")
 BASE_URL = f"https://{PROJECT_ID}.apicdn.sanity.io/{API_VERSION}/data/query/{DATASET}"
 BASE_URL_LIVE = f"https://{PROJECT_ID}.api.sanity.io/{API_VERSION}/data/query/{DATASET}"
 
-def query_sanity(query: str, params: Optional[dict] = None, use_cdn: bool = True) -> Any:
-    """Execute a GROQ query via httpx directly."""
-    url = BASE_URL if use_cdn else BASE_URL_LIVE
-    
+# Connection pool settings (shared by every query for the lifetime of the app)
+HTTP_TIMEOUT = config("SANITY_HTTP_TIMEOUT", default=10.0, cast=float)
+CONNECT_TIMEOUT = config("SANITY_CONNECT_TIMEOUT", default=5.0, cast=float)
+MAX_CONNECTIONS = config("SANITY_MAX_CONNECTIONS", default=20, cast=int)
+MAX_KEEPALIVE_CONNECTIONS = config("SANITY_MAX_KEEPALIVE_CONNECTIONS", default=10, cast=int)
+KEEPALIVE_EXPIRY = config("SANITY_KEEPALIVE_EXPIRY", default=30.0, cast=float)
+USE_HTTP2 = config("SANITY_HTTP2", default=True, cast=bool)
+
+# Hedging between the CDN and live API: if the preferred endpoint has not
+# answered by its recent latency percentile, also ask the other one
+HEDGE_ENABLED = config("SANITY_HEDGE_ENABLED", default=True, cast=bool)
+HEDGE_PERCENTILE = config("SANITY_HEDGE_PERCENTILE", default=0.95, cast=float)
+HEDGE_INITIAL_DELAY = config("SANITY_HEDGE_INITIAL_DELAY", default=1.0, cast=float)
+HEDGE_MIN_DELAY = config("SANITY_HEDGE_MIN_DELAY", default=0.05, cast=float)
+# Per-endpoint circuit breaker
+BREAKER_THRESHOLD = config("SANITY_BREAKER_THRESHOLD", default=5, cast=int)
+BREAKER_RESET = config("SANITY_BREAKER_RESET", default=30.0, cast=float)
+
+QUERY_SECONDS = metrics.histogram(
+    "sanity_query_seconds", "Time to answer a GROQ query, by where the answer came from", ("source",)
+)
+REQUEST_SECONDS = metrics.histogram(
+    "sanity_request_seconds", "Sanity HTTP request latency per endpoint", ("endpoint", "outcome")
+)
+RESPONSE_BYTES = metrics.counter("sanity_response_bytes_total", "Response bytes fetched from Sanity", ("endpoint",))
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 support in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class SanityOfflineError(RuntimeError):
+    """Raised when a network query is attempted in offline mode."""
+
+
+def _check_online() -> None:
+    if OFFLINE_MODE:
+        raise SanityOfflineError("Sanity network access is disabled (SANITY_OFFLINE=true)")
+
+
+def _build_headers() -> dict:
     headers = {}
     if TOKEN:
         headers["Authorization"] = f"Bearer {TOKEN}"
-        
+    return headers
+
+
+def _build_timeout(timeout: float) -> httpx.Timeout:
+    return httpx.Timeout(timeout, connect=min(CONNECT_TIMEOUT, timeout))
+
+
+def _build_query_params(query: str, params: Optional[dict]) -> dict:
+    """Encode `$param` bindings the way the Sanity HTTP API expects (JSON values)."""
+    encoded = {"query": query}
+    for name, value in (params or {}).items():
+        encoded[f"${name}"] = json.dumps(value)
+    return encoded
+
+
+def _build_endpoint(name: str, url: str) -> Endpoint:
+    return Endpoint(
+        name,
+        url,
+        latency=LatencyTracker(
+            initial_delay=HEDGE_INITIAL_DELAY, min_delay=HEDGE_MIN_DELAY, max_delay=HTTP_TIMEOUT
+        ),
+        breaker=CircuitBreaker(f"sanity-{name}", BREAKER_THRESHOLD, BREAKER_RESET),
+    )
+
+
+def _observe_request(endpoint: Endpoint, started: float, response: Optional[httpx.Response]) -> None:
+    outcome = "ok" if response is not None and response.is_success else "error"
+    REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint.name, outcome=outcome)
+    if response is not None:
+        RESPONSE_BYTES.inc(len(response.content), endpoint=endpoint.name)
+
+
+def _is_endpoint_failure(error: BaseException) -> bool:
+    """Timeouts, connection errors, 429 and 5xx count against an endpoint; other 4xx do not."""
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    return True
+
+
+def _build_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=MAX_CONNECTIONS,
+        max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=KEEPALIVE_EXPIRY,
+    )
+
+
+class AsyncSanityClient:
+    """
+    Async GROQ client backed by one shared keep-alive connection pool.
+
+    The underlying httpx.AsyncClient is created lazily on first use and
+    reused by every query, so tool calls no longer pay a TCP+TLS handshake
+    each time. HTTP/2 is used when the optional `h2` package is installed.
+
+    The CDN and live API are treated as redundant endpoints: a slow CDN
+    request is hedged to the live API, and an endpoint whose circuit breaker
+    is open is skipped until it recovers. Live queries (which must not read
+    cached CDN data) are never hedged; they use the CDN only once live fails.
+    """
+
+    def __init__(
+        self,
+        timeout: float = HTTP_TIMEOUT,
+        http2: bool = USE_HTTP2,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        cdn_url: str = BASE_URL,
+        live_url: str = BASE_URL_LIVE,
+        hedge: bool = HEDGE_ENABLED,
+    ):
+        self.timeout = timeout
+        self.http2 = http2 and HTTP2_AVAILABLE and transport is None
+        self.transport = transport
+        self.hedge = hedge
+        self.cdn = _build_endpoint("cdn", cdn_url)
+        self.live = _build_endpoint("live", live_url)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return the pooled client, recreating it if it belongs to another event loop."""
+        loop = asyncio.get_running_loop()
+        if self._client is not None and self._loop is not loop:
+            self._discard_client(self._client, self._loop)
+            self._client = None
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=_build_timeout(self.timeout),
+                limits=_build_limits(),
+                http2=self.http2,
+                headers=_build_headers(),
+                transport=self.transport,
+            )
+            self._loop = loop
+            logger.info(f"Opened Sanity connection pool (http2={self.http2}, max_connections={MAX_CONNECTIONS})")
+        return self._client
+
+    @staticmethod
+    def _discard_client(client: httpx.AsyncClient, loop: asyncio.AbstractEventLoop) -> None:
+        """Close a pool left behind by another event loop instead of leaking its connections."""
+        if client.is_closed:
+            return
+        if not loop.is_closed():
+            asyncio.run_coroutine_threadsafe(_close_client(client), loop)
+            return
+        # Its loop is gone, so close from this one: the sockets cannot be shut
+        # down gracefully any more, but the pool still drops its connections
+        task = asyncio.get_running_loop().create_task(_close_client(client))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+    def endpoints(self, use_cdn: bool = True) -> Tuple[Endpoint, Endpoint]:
+        """Endpoints in preference order for a CDN or live query."""
+        return (self.cdn, self.live) if use_cdn else (self.live, self.cdn)
+
+    async def _request(self, endpoint: Endpoint, query: str, params: Optional[dict]) -> Any:
+        started = time.perf_counter()
+        response = None
+        try:
+            response = await self._get_client().get(
+                endpoint.url,
+                params=_build_query_params(query, params),
+            )
+        finally:
+            _observe_request(endpoint, started, response)
+        response.raise_for_status()
+        data = response.json()
+        return data.get("result", [])
+
+    async def fetch(self, query: str, params: Optional[dict] = None, use_cdn: bool = True) -> Any:
+        """Execute a GROQ query over the shared connection pool, raising on failure."""
+        _check_online()
+        return await hedged_call(
+            self.endpoints(use_cdn),
+            lambda endpoint: self._request(endpoint, query, params),
+            is_failure=_is_endpoint_failure,
+            percentile=HEDGE_PERCENTILE,
+            # A slow live query waits for live rather than racing the (possibly stale) CDN
+            hedge=self.hedge and use_cdn,
+        )
+
+    async def query(self, query: str, params: Optional[dict] = None, use_cdn: bool = True) -> Any:
+        """Execute a GROQ query over the shared connection pool."""
+        try:
+            return await self.fetch(query, params=params, use_cdn=use_cdn)
+        except Exception as e:
+            logger.error(f"Sanity Query Error: {e}")
+            return []
+
+    async def aclose(self) -> None:
+        """Close the connection pool (called on application shutdown)."""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+        self._loop = None
+
+    def status(self) -> dict:
+        """Circuit and latency state of both endpoints."""
+        return {"cdn": self.cdn.status(), "live": self.live.status()}
+
+
+async def _close_client(client: httpx.AsyncClient) -> None:
     try:
-        with httpx.Client(timeout=10.0) as client:
-            response = client.get(
-                url,
-                params={"query": query, **(params or {})},
-                headers=headers
+        await client.aclose()
+    except Exception as e:
+        logger.debug(f"Closing a previous Sanity connection pool failed: {e}")
+
+
+# Global async client instance shared by all tools
+sanity = AsyncSanityClient()
+
+# Shared sync client for scripts and other non-async callers
+_sync_client: Optional[httpx.Client] = None
+
+
+def _get_sync_client() -> httpx.Client:
+    global _sync_client
+    if _sync_client is None or _sync_client.is_closed:
+        _sync_client = httpx.Client(
+            timeout=_build_timeout(HTTP_TIMEOUT),
+            limits=_build_limits(),
+            headers=_build_headers(),
+        )
+    return _sync_client
+
+
+def _fetch_sync(query: str, params: Optional[dict] = None, use_cdn: bool = True) -> Any:
+    _check_online()
+
+    def request(endpoint: Endpoint) -> Any:
+        started = time.perf_counter()
+        response = None
+        try:
+            response = _get_sync_client().get(
+                endpoint.url,
+                params=_build_query_params(query, params),
             )
-            response.raise_for_status()
-            data = response.json()
-            return data.get("result", [])
+        finally:
+            _observe_request(endpoint, started, response)
+        response.raise_for_status()
+        data = response.json()
+        return data.get("result", [])
+
+    # Blocking callers fail over between endpoints but do not race them
+    return failover_call(sanity.endpoints(use_cdn), request, is_failure=_is_endpoint_failure)
+
+
+# Coalesces identical concurrent queries into one Sanity request
+sanity_flight = SingleFlight("sanity")
+
+# Keys currently being revalidated in the background (shared by both paths)
+_refreshing: set = set()
+_refreshing_lock = threading.Lock()
+_background_tasks: set = set()
+
+
+def _claim_refresh(key) -> bool:
+    with _refreshing_lock:
+        if key in _refreshing:
+            return False
+        _refreshing.add(key)
+        return True
+
+
+def _release_refresh(key) -> None:
+    with _refreshing_lock:
+        _refreshing.discard(key)
+
+
+def _store_if_current(key, result: Any, doc_types: frozenset, revision: int) -> None:
+    """
+    Cache a fetched result unless content changed while it was in flight.
+
+    A fetch that started before an invalidation may carry the old content;
+    storing it would keep that content fresh for a whole TTL.
+    """
+    if content_changes.revision != revision:
+        logger.debug(f"Not caching a result fetched across content revision {revision} -> {content_changes.revision}")
+        return
+    query_cache.store(key, result, doc_types)
+
+
+async def _refresh_async(key, query: str, params: Optional[dict], use_cdn: bool, doc_types: frozenset) -> None:
+    try:
+        revision = content_changes.revision
+        result = await sanity.fetch(query, params=params, use_cdn=use_cdn)
+        _store_if_current(key, result, doc_types, revision)
+        query_cache.stats.refreshes += 1
+    except Exception as e:
+        query_cache.stats.refresh_errors += 1
+        logger.warning(f"Background Sanity refresh failed, serving stale data: {e}")
+    finally:
+        _release_refresh(key)
+
+
+def _refresh_sync(key, query: str, params: Optional[dict], use_cdn: bool, doc_types: frozenset) -> None:
+    try:
+        revision = content_changes.revision
+        result = _fetch_sync(query, params=params, use_cdn=use_cdn)
+        _store_if_current(key, result, doc_types, revision)
+        query_cache.stats.refreshes += 1
     except Exception as e:
-        print(f"Sanity Query Error: {e}")
-        return []
+        query_cache.stats.refresh_errors += 1
+        logger.warning(f"Background Sanity refresh failed, serving stale data: {e}")
+    finally:
+        _release_refresh(key)
+
+
+_NOT_LOCAL = object()
+
+
+def _query_mirror(query: str, params: Optional[dict], template: Optional[QueryTemplate] = None) -> Any:
+    """Evaluate a query against the local mirror, or return _NOT_LOCAL to use HTTP."""
+    if not document_store.serving:
+        return _NOT_LOCAL
+    try:
+        if template is not None:
+            if template.plan is None:
+                raise GroqUnsupportedError(f"template '{template.id}' is not supported locally")
+            return template.plan.execute(document_store, params)
+        return compile_query(query).execute(document_store, params)
+    except GroqUnsupportedError as e:
+        if OFFLINE_MODE:
+            logger.error(f"Offline mode cannot evaluate query locally: {e}")
+            return []
+        logger.debug(f"Query not supported by local engine, using Sanity API: {e}")
+        return _NOT_LOCAL
+
+
+def _serve_last_known(key, error: Exception) -> Any:
+    """After a failed fetch, fall back to an expired cached result if there is one."""
+    entry = query_cache.last_known(key)
+    if entry is not None:
+        logger.warning(f"Sanity unavailable ({error}), serving cached result from {entry.fetched_at:.0f}")
+        return entry.value
+    logger.error(f"Sanity Query Error: {error}")
+    return []
+
+
+def _resolve(query: Union[str, QueryTemplate], params: Optional[dict], use_cdn: bool):
+    """Return (text, params, cache key, doc types, template) for raw text or a registered template."""
+    if isinstance(query, QueryTemplate):
+        params = query.bind(params)
+        return query.text, params, query.cache_key(params, use_cdn), query.doc_types, query
+    return query, params, query_cache.make_key(query, params, use_cdn), extract_doc_types(query), None
+
+
+async def aquery_sanity(query: Union[str, QueryTemplate], params: Optional[dict] = None, use_cdn: bool = True) -> Any:
+    """Execute a GROQ query without blocking the event loop, served from the result cache when possible."""
+    started = time.perf_counter()
+    result, source = await _aquery(query, params, use_cdn)
+    QUERY_SECONDS.observe(time.perf_counter() - started, source=source)
+    return result
+
+
+async def _aquery(query: Union[str, QueryTemplate], params: Optional[dict], use_cdn: bool) -> Tuple[Any, str]:
+    text, params, key, doc_types, template = _resolve(query, params, use_cdn)
+    local = _query_mirror(text, params, template)
+    if local is not _NOT_LOCAL:
+        return local, "mirror"
+
+    entry, state = query_cache.lookup(key)
+    if state == FRESH:
+        return entry.value, "cache"
+    if state == STALE:
+        # Serve stale immediately and revalidate in the background
+        if _claim_refresh(key):
+            task = asyncio.create_task(_refresh_async(key, text, params, use_cdn, doc_types))
+            _background_tasks.add(task)
+            task.add_done_callback(_background_tasks.discard)
+        return entry.value, "stale"
+
+    async def fetch_and_store():
+        revision = content_changes.revision
+        result = await sanity.fetch(text, params=params, use_cdn=use_cdn)
+        _store_if_current(key, result, doc_types, revision)
+        return result
+
+    try:
+        return await sanity_flight.do_async(key, fetch_and_store), "api"
+    except Exception as e:
+        return _serve_last_known(key, e), "fallback"
+
+
+def query_sanity(query: Union[str, QueryTemplate], params: Optional[dict] = None, use_cdn: bool = True) -> Any:
+    """Execute a GROQ query via httpx directly (blocking), served from the result cache when possible."""
+    started = time.perf_counter()
+    result, source = _query(query, params, use_cdn)
+    QUERY_SECONDS.observe(time.perf_counter() - started, source=source)
+    return result
+
+
+def _query(query: Union[str, QueryTemplate], params: Optional[dict], use_cdn: bool) -> Tuple[Any, str]:
+    text, params, key, doc_types, template = _resolve(query, params, use_cdn)
+    local = _query_mirror(text, params, template)
+    if local is not _NOT_LOCAL:
+        return local, "mirror"
+
+    entry, state = query_cache.lookup(key)
+    if state == FRESH:
+        return entry.value, "cache"
+    if state == STALE:
+        if _claim_refresh(key):
+            threading.Thread(
+                target=_refresh_sync, args=(key, text, params, use_cdn, doc_types), daemon=True
+            ).start()
+        return entry.value, "stale"
+
+    def fetch_and_store():
+        revision = content_changes.revision
+        result = _fetch_sync(text, params=params, use_cdn=use_cdn)
+        _store_if_current(key, result, doc_types, revision)
+        return result
+
+    try:
+        return sanity_flight.do(key, fetch_and_store), "api"
+    except Exception as e:
+        return _serve_last_known(key, e), "fallback"
+
+
+async def close_sanity_clients() -> None:
+    """Release the shared connection pools."""
+    global _sync_client
+    await sanity.aclose()
+    if _sync_client is not None:
+        _sync_client.close()
+        _sync_client = None
+
 
 def get_profile():
     query = '*[_type == "profile"][0]'
@@ -43,4 +475,4 @@ def get_projects():
 
 def get_experience():
     query = '*[_type == "experience"] | order(startDate desc)'
-    return query_sanity(query)
\ No newline at end of file
+    return query_sanity(query)
@@ -0,0 +1,229 @@
+"""
+Live subscription to Sanity's `/listen` API.
+A background task holds the server-sent event stream open for the portfolio
+`_type`s, applies each mutation to the local mirror, publishes it on the
+content-change bus (dropping affected cached results) and re-warms the
+portfolio bundle, so chat turns never wait on Sanity after startup.
+"""
+import asyncio
+import json
+import random
+from contextlib import aclosing
+from typing import AsyncIterator, Optional, Tuple
+
+import httpx
+from decouple import config
+
+from sanity_client import (
+    PROJECT_ID, DATASET, API_VERSION, _build_headers, _check_online, sanity,
+)
+from document_store import document_store
+from invalidation import content_changes
+from portfolio_bundle import portfolio_bundle
+from query_registry import queries
+
+# Set up logging
+from logging_config import get_logger
+logger = get_logger(__name__)
+
+LISTEN_URL = f"https://{PROJECT_ID}.api.sanity.io/{API_VERSION}/data/listen/{DATASET}"
+LISTEN_ENABLED = config("SANITY_LISTEN_ENABLED", default=False, cast=bool)
+# Reconnect backoff: doubles from the base up to the max, with jitter
+LISTEN_BACKOFF_BASE = config("SANITY_LISTEN_BACKOFF_BASE", default=1.0, cast=float)
+LISTEN_BACKOFF_MAX = config("SANITY_LISTEN_BACKOFF_MAX", default=60.0, cast=float)
+# Sanity sends keepalive comments; a stream silent for longer than this is dead
+LISTEN_READ_TIMEOUT = config("SANITY_LISTEN_READ_TIMEOUT", default=90.0, cast=float)
+# Coalesce bursts of mutations into one bundle refresh
+REFRESH_DEBOUNCE = config("SANITY_LISTEN_REFRESH_DEBOUNCE", default=0.5, cast=float)
+
+# Every `_type` a registered query reads, so no cached result misses a change
+PORTFOLIO_TYPES = sorted(set().union(*(template.doc_types for template in queries)))
+LISTEN_QUERY = '*[_type in $types && !(_id in path("drafts.**"))]'
+
+
+async def parse_sse(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[str, str]]:
+    """Yield (event, data) pairs from server-sent event lines."""
+    event, data = "message", []
+    async for line in lines:
+        if not line:
+            if data:
+                yield event, "\n".join(data)
+            event, data = "message", []
+        elif line.startswith(":"):
+            continue  # keepalive comment
+        else:
+            field, _, value = line.partition(":")
+            value = value[1:] if value.startswith(" ") else value
+            if field == "event":
+                event = value
+            elif field == "data":
+                data.append(value)
+
+
+class SanityListener:
+    """
+    Keeps the `/listen` stream open and turns mutations into cache updates.
+
+    After a dropped connection the listener reconnects with exponential
+    backoff. Mutations missed while disconnected are recovered by a resync
+    once the new stream's `welcome` event arrives.
+    """
+
+    def __init__(
+        self,
+        url: str = LISTEN_URL,
+        types: Optional[list] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        backoff_base: float = LISTEN_BACKOFF_BASE,
+        backoff_max: float = LISTEN_BACKOFF_MAX,
+        refresh_debounce: float = REFRESH_DEBOUNCE,
+    ):
+        self.url = url
+        self.types = types or PORTFOLIO_TYPES
+        self.transport = transport
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.refresh_debounce = refresh_debounce
+        self.connected = False
+        self.connections = 0
+        self.mutations = 0
+        self._task: Optional[asyncio.Task] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._refresh_pending = False
+
+    def start(self) -> asyncio.Task:
+        """Start the background subscription (idempotent)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self) -> None:
+        for task in (self._task, self._refresh_task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = None
+        self._refresh_task = None
+        self._refresh_pending = False
+        self.connected = False
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.0)
+
+    async def run(self) -> None:
+        """Subscribe until cancelled, reconnecting with backoff on any failure."""
+        _check_online()
+        attempt = 0
+        async with httpx.AsyncClient(
+            headers={**_build_headers(), "Accept": "text/event-stream"},
+            timeout=httpx.Timeout(10.0, read=LISTEN_READ_TIMEOUT),
+            transport=self.transport,
+        ) as client:
+            while True:
+                try:
+                    async with aclosing(self._stream(client)) as events:
+                        async for event, data in events:
+                            if event == "welcome":
+                                attempt = 0
+                                await self._on_welcome()
+                            elif event == "mutation":
+                                self._on_mutation(json.loads(data))
+                            elif event in ("disconnect", "channelError"):
+                                logger.warning(f"Sanity listen stream closed by server: {event} {data}")
+                                break
+                    logger.info("Sanity listen stream ended, reconnecting")
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning(f"Sanity listen stream failed: {e}")
+                finally:
+                    self.connected = False
+
+                delay = self._backoff(attempt)
+                attempt += 1
+                await asyncio.sleep(delay)
+
+    async def _stream(self, client: httpx.AsyncClient) -> AsyncIterator[Tuple[str, str]]:
+        params = {
+            "query": LISTEN_QUERY,
+            "$types": json.dumps(self.types),
+            "includeResult": "true",
+            "visibility": "query",
+        }
+        async with client.stream("GET", self.url, params=params) as response:
+            response.raise_for_status()
+            async for event in parse_sse(response.aiter_lines()):
+                yield event
+
+    async def _on_welcome(self) -> None:
+        self.connected = True
+        self.connections += 1
+        logger.info(f"Subscribed to Sanity listen stream (connection {self.connections})")
+        if self.connections > 1:
+            # Mutations may have been missed while disconnected
+            await self.resync()
+
+    def _on_mutation(self, mutation: dict) -> None:
+        doc_id = mutation.get("documentId") or ""
+        if doc_id.startswith("drafts."):
+            return
+        result = mutation.get("result")
+        doc_type = (result or {}).get("_type")
+        if document_store.is_loaded:
+            if mutation.get("transition") == "disappear" or result is None:
+                removed = document_store.delete(doc_id)
+                doc_type = doc_type or (removed or {}).get("_type")
+            else:
+                document_store.upsert(result)
+        self.mutations += 1
+        content_changes.publish(doc_type=doc_type, doc_id=doc_id, source="listen")
+        self._schedule_refresh()
+
+    async def resync(self) -> None:
+        """Reload the portfolio types into the mirror and drop every cached result."""
+        if document_store.is_loaded:
+            try:
+                documents = await sanity.fetch(LISTEN_QUERY, params={"types": self.types}, use_cdn=False)
+            except Exception as e:
+                logger.error(f"Sanity resync failed, mirror may be out of date: {e}")
+            else:
+                fetched = {doc["_id"] for doc in documents}
+                for doc_type in self.types:
+                    for doc in document_store.documents(doc_type):
+                        if doc["_id"] not in fetched and not doc["_id"].startswith("drafts."):
+                            document_store.delete(doc["_id"])
+                for doc in documents:
+                    document_store.upsert(doc)
+        content_changes.publish(source="listen")
+        self._schedule_refresh()
+
+    def _schedule_refresh(self) -> None:
+        self._refresh_pending = True
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh())
+
+    async def _refresh(self) -> None:
+        # Mutations arriving once the fetch has started re-run the refresh,
+        # so the bundle never stays warmed with pre-mutation content
+        while self._refresh_pending:
+            await asyncio.sleep(self.refresh_debounce)
+            self._refresh_pending = False
+            bundle = await portfolio_bundle.get()
+            if bundle is not None:
+                logger.info(f"Portfolio bundle re-warmed after content change (version {bundle.version})")
+
+    def status(self) -> dict:
+        return {
+            "enabled": LISTEN_ENABLED,
+            "connected": self.connected,
+            "connections": self.connections,
+            "mutations": self.mutations,
+        }
+
+
+# Global listener started by the app lifespan when SANITY_LISTEN_ENABLED is set
+sanity_listener = SanityListener()
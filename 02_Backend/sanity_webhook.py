@@ -0,0 +1,168 @@
+"""
+Sanity document-change webhooks.
+Verifies the `sanity-webhook-signature` header, refetches changed documents
+into the local mirror (when one is loaded) and turns webhook payloads into
+invalidation events on the content-change bus.
+
+Run as a script to replay a recorded payload against a local server:
+
+    python sanity_webhook.py payload.json --url http://localhost:8000/webhooks/sanity
+"""
+import base64
+import hashlib
+import hmac
+import time
+from typing import Any, List, Optional
+from decouple import config
+
+from document_store import document_store, OFFLINE_MODE
+from invalidation import content_changes, ContentChange
+from sanity_client import sanity
+
+# Set up logging
+from logging_config import get_logger
+logger = get_logger(__name__)
+
+SIGNATURE_HEADER = "sanity-webhook-signature"
+WEBHOOK_SECRET = config("SANITY_WEBHOOK_SECRET", default="")
+# Reject signatures older than this to limit replay of captured requests
+SIGNATURE_TOLERANCE = config("SANITY_WEBHOOK_TOLERANCE", default=300, cast=int)
+
+MIRROR_DOCUMENT_QUERY = '*[_id == $id][0]'
+
+
+def _encode_signature(body: bytes, timestamp: str, secret: str) -> str:
+    digest = hmac.new(secret.encode(), f"{timestamp}.".encode() + body, hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).decode().rstrip("=")
+
+
+def sign_payload(body: bytes, secret: str, timestamp: Optional[int] = None) -> str:
+    """
+    Build a `sanity-webhook-signature` header value for a payload.
+
+    Args:
+        body: Raw request body
+        secret: Shared webhook secret
+        timestamp: Milliseconds since epoch (defaults to now)
+
+    Returns:
+        Header value in Sanity's `t=<ms>,v1=<signature>` format
+    """
+    ts = str(timestamp if timestamp is not None else int(time.time() * 1000))
+    return f"t={ts},v1={_encode_signature(body, ts, secret)}"
+
+
+def verify_signature(body: bytes, header: str, secret: str,
+                     tolerance: int = SIGNATURE_TOLERANCE, now: Optional[float] = None) -> bool:
+    """
+    Verify a Sanity webhook signature header.
+
+    Args:
+        body: Raw request body
+        header: Value of the `sanity-webhook-signature` header
+        secret: Shared webhook secret
+        tolerance: Maximum signature age in seconds
+        now: Current time in seconds (for testing)
+
+    Returns:
+        True if the signature is valid and recent, False otherwise
+    """
+    if not secret or not header:
+        return False
+
+    parts = dict(
+        part.split("=", 1) for part in header.split(",") if "=" in part
+    )
+    timestamp, signature = parts.get("t"), parts.get("v1")
+    if not timestamp or not signature or not timestamp.isdigit():
+        return False
+
+    current = now if now is not None else time.time()
+    if abs(current - int(timestamp) / 1000) > tolerance:
+        logger.warning("Rejected Sanity webhook with expired signature timestamp")
+        return False
+
+    expected = _encode_signature(body, timestamp, secret)
+    return hmac.compare_digest(expected, signature.rstrip("="))
+
+
+def _published_documents(payload: Any) -> List[dict]:
+    """The documents in a payload (one document or a list), without drafts."""
+    documents = []
+    for doc in payload if isinstance(payload, list) else [payload]:
+        if not isinstance(doc, dict):
+            continue
+        doc_id = doc.get("_id")
+        if doc_id and doc_id.startswith("drafts."):
+            logger.debug(f"Ignoring webhook for draft document {doc_id}")
+            continue
+        if doc_id or doc.get("_type"):
+            documents.append(doc)
+    return documents
+
+
+async def sync_mirror(payload: Any) -> int:
+    """
+    Refetch the documents in a webhook payload into the loaded mirror.
+
+    Run before publishing the changes, so queries answered from the mirror
+    after the invalidation see the new content. A document that no longer
+    exists is removed from the mirror.
+
+    Returns:
+        Number of mirror documents updated or removed
+    """
+    if not document_store.is_loaded or OFFLINE_MODE:
+        return 0
+    updated = 0
+    for doc in _published_documents(payload):
+        doc_id = doc.get("_id")
+        if not doc_id:
+            continue
+        try:
+            current = await sanity.fetch(MIRROR_DOCUMENT_QUERY, params={"id": doc_id}, use_cdn=False)
+        except Exception as e:
+            logger.error(f"Failed to refetch {doc_id} for the mirror, it may be out of date: {e}")
+            continue
+        if isinstance(current, dict):
+            document_store.upsert(current)
+        else:
+            document_store.delete(doc_id)
+        updated += 1
+    return updated
+
+
+def handle_webhook_payload(payload: Any) -> List[ContentChange]:
+    """
+    Publish invalidations for the documents in a webhook payload.
+
+    Accepts a single document (the default webhook projection) or a list of
+    documents; each needs at least `_id` or `_type`. Draft documents are
+    ignored because published queries never read them.
+
+    Returns:
+        The published changes
+    """
+    return [
+        content_changes.publish(doc_type=doc.get("_type"), doc_id=doc.get("_id"), source="webhook")
+        for doc in _published_documents(payload)
+    ]
+
+if __name__ == "__main__":
+    import argparse
+    import httpx
+
+    parser = argparse.ArgumentParser(description="Replay a recorded Sanity webhook payload")
+    parser.add_argument("payload", help="Path to a JSON payload file")
+    parser.add_argument("--url", default="http://localhost:8000/webhooks/sanity")
+    parser.add_argument("--secret", default=WEBHOOK_SECRET)
+    args = parser.parse_args()
+
+    with open(args.payload, "rb") as f:
+        raw = f.read()
+    response = httpx.post(
+        args.url,
+        content=raw,
+        headers={"content-type": "application/json", SIGNATURE_HEADER: sign_payload(raw, args.secret)},
+    )
+    print(response.status_code, response.text)
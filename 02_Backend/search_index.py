@@ -0,0 +1,266 @@
+"""
+In-process full-text index over portfolio experience, projects and skills.
+Tokens are kept in an inverted index and a prefix trie, so a query token
+matches documents by exact token, by prefix, or within a small edit
+distance (typos). The index is synced from the portfolio bundle and only
+re-indexes documents whose content changed.
+"""
+import hashlib
+import json
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Set up logging
+from logging_config import get_logger
+logger = get_logger(__name__)
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+# Fields indexed per bundle section, with their ranking weight
+INDEXED_FIELDS = {
+    "experience": {"company": 3, "position": 3, "technologies": 2, "responsibilities": 1, "achievements": 1},
+    "projects": {"title": 3, "tagline": 1, "technologies": 2},
+    "skills": {"name": 3, "category": 1},
+}
+
+# Match quality multipliers
+EXACT, PREFIX, FUZZY = 3, 2, 1
+
+# Query-token expansions remembered until the index changes
+MAX_CACHED_EXPANSIONS = 1024
+
+
+def tokenize(text) -> List[str]:
+    """Lowercase alphanumeric tokens of a string or list of strings."""
+    if text is None:
+        return []
+    if isinstance(text, list):
+        return [token for item in text for token in tokenize(item)]
+    return _TOKEN.findall(str(text).lower())
+
+
+def max_edits(token: str) -> int:
+    """Typo budget for a query token: none for short tokens, up to two for long ones."""
+    if len(token) < 4:
+        return 0
+    return 1 if len(token) < 8 else 2
+
+
+class _TrieNode:
+    __slots__ = ("children", "terminal")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.terminal = False
+
+
+class TokenTrie:
+    """Prefix trie of indexed tokens supporting prefix and bounded edit-distance lookups."""
+
+    def __init__(self):
+        self.root = _TrieNode()
+
+    def add(self, token: str) -> None:
+        node = self.root
+        for char in token:
+            node = node.children.setdefault(char, _TrieNode())
+        node.terminal = True
+
+    def remove(self, token: str) -> None:
+        path = [self.root]
+        for char in token:
+            node = path[-1].children.get(char)
+            if node is None:
+                return
+            path.append(node)
+        path[-1].terminal = False
+        # Prune branches that no longer lead to any token
+        for depth in range(len(token), 0, -1):
+            node = path[depth]
+            if node.terminal or node.children:
+                break
+            del path[depth - 1].children[token[depth - 1]]
+
+    def with_prefix(self, prefix: str) -> List[str]:
+        node = self.root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        found = []
+        stack = [(node, prefix)]
+        while stack:
+            node, token = stack.pop()
+            if node.terminal:
+                found.append(token)
+            stack.extend((child, token + char) for char, child in node.children.items())
+        return found
+
+    def within_distance(self, word: str, max_distance: int) -> List[Tuple[str, int]]:
+        """Tokens within `max_distance` Levenshtein edits of `word`, with their distance."""
+        found = []
+        first_row = list(range(len(word) + 1))
+        stack = [(child, char, char, first_row) for char, child in self.root.children.items()]
+        while stack:
+            node, char, token, previous = stack.pop()
+            row = [previous[0] + 1]
+            for i in range(1, len(word) + 1):
+                cost = 0 if word[i - 1] == char else 1
+                row.append(min(row[i - 1] + 1, previous[i] + 1, previous[i - 1] + cost))
+            if node.terminal and row[-1] <= max_distance:
+                found.append((token, row[-1]))
+            # Only descend while some alignment can still finish within budget
+            if min(row) <= max_distance:
+                stack.extend((child, c, token + c, row) for c, child in node.children.items())
+        return found
+
+
+@dataclass
+class SearchHit:
+    kind: str
+    id: str
+    score: float
+    fields: Set[str] = field(default_factory=set)
+
+
+class PortfolioSearchIndex:
+    """
+    Inverted index: token -> {document key: {field, ...}}.
+
+    Documents are keyed by (section, `_id`). sync() diffs a bundle against
+    what is indexed using per-document content hashes, so a content change
+    re-indexes only the documents that actually changed.
+    """
+
+    def __init__(self, fields: Optional[Dict[str, Dict[str, int]]] = None):
+        self.fields = fields or INDEXED_FIELDS
+        self.version: Optional[str] = None
+        self._postings: Dict[str, Dict[Tuple[str, str], Set[str]]] = {}
+        self._doc_tokens: Dict[Tuple[str, str], Dict[str, Set[str]]] = {}
+        self._doc_hashes: Dict[Tuple[str, str], str] = {}
+        self._trie = TokenTrie()
+        self._expansions: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._doc_tokens)
+
+    def sync(self, version: str, data: dict) -> int:
+        """
+        Bring the index up to date with a bundle's data.
+
+        Args:
+            version: Bundle content version (a no-op if already indexed)
+            data: Bundle data with `experience`, `projects` and `skills` lists
+
+        Returns:
+            Number of documents (re)indexed or removed
+        """
+        with self._lock:
+            if version == self.version:
+                return 0
+            seen = set()
+            changed = 0
+            for kind in self.fields:
+                for doc in data.get(kind) or []:
+                    key = (kind, doc.get("_id") or json.dumps(doc, sort_keys=True, default=str))
+                    seen.add(key)
+                    digest = hashlib.sha1(json.dumps(doc, sort_keys=True, default=str).encode()).hexdigest()
+                    if self._doc_hashes.get(key) != digest:
+                        self._remove(key)
+                        self._add(key, doc)
+                        self._doc_hashes[key] = digest
+                        changed += 1
+            for key in [key for key in self._doc_tokens if key not in seen]:
+                self._remove(key)
+                changed += 1
+            self.version = version
+            if changed:
+                self._expansions.clear()
+        if changed:
+            logger.debug(f"Search index synced to {version}: {changed} documents updated, {len(self)} total")
+        return changed
+
+    def _add(self, key: Tuple[str, str], doc: dict) -> None:
+        tokens_by_field: Dict[str, Set[str]] = {}
+        for field_name in self.fields[key[0]]:
+            for token in tokenize(doc.get(field_name)):
+                tokens_by_field.setdefault(token, set()).add(field_name)
+        for token, field_names in tokens_by_field.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                self._trie.add(token)
+            postings[key] = field_names
+        self._doc_tokens[key] = tokens_by_field
+
+    def _remove(self, key: Tuple[str, str]) -> None:
+        for token in self._doc_tokens.pop(key, {}):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(key, None)
+            if not postings:
+                del self._postings[token]
+                self._trie.remove(token)
+        self._doc_hashes.pop(key, None)
+
+    def _expand(self, query_token: str) -> Dict[str, int]:
+        """Indexed tokens matching a query token, mapped to their match quality."""
+        matches = self._expansions.get(query_token)
+        if matches is None:
+            matches = self._match_tokens(query_token)
+            if len(self._expansions) < MAX_CACHED_EXPANSIONS:
+                self._expansions[query_token] = matches
+        return matches
+
+    def _match_tokens(self, query_token: str) -> Dict[str, int]:
+        # The trie walk costs milliseconds for long tokens, hence the expansion cache
+        matches = {token: FUZZY for token, _ in self._trie.within_distance(query_token, max_edits(query_token))}
+        for token in self._trie.with_prefix(query_token):
+            matches[token] = PREFIX
+        if query_token in self._postings:
+            matches[query_token] = EXACT
+        return matches
+
+    def search(self, query: str, kinds: Optional[Iterable[str]] = None) -> List[SearchHit]:
+        """
+        Find documents matching every token of `query`, best first.
+
+        Each query token may match a document token exactly, as a prefix, or
+        within max_edits() typos; scores weight match quality by field.
+        """
+        query_tokens = tokenize(query)
+        if not query_tokens:
+            return []
+        kinds = set(kinds) if kinds else None
+
+        with self._lock:
+            scores: Optional[Dict[Tuple[str, str], float]] = None
+            matched_fields: Dict[Tuple[str, str], Set[str]] = {}
+            for query_token in query_tokens:
+                token_scores: Dict[Tuple[str, str], float] = {}
+                for token, quality in self._expand(query_token).items():
+                    for key, field_names in self._postings[token].items():
+                        if kinds is not None and key[0] not in kinds:
+                            continue
+                        weight = max(self.fields[key[0]][name] for name in field_names)
+                        token_scores[key] = max(token_scores.get(key, 0), quality * weight)
+                        matched_fields.setdefault(key, set()).update(field_names)
+                if scores is None:
+                    scores = token_scores
+                else:
+                    scores = {key: score + token_scores[key] for key, score in scores.items() if key in token_scores}
+                if not scores:
+                    return []
+
+        hits = [SearchHit(kind=key[0], id=key[1], score=score, fields=matched_fields[key])
+                for key, score in scores.items()]
+        hits.sort(key=lambda hit: -hit.score)
+        return hits
+
+
+# Global index over the current portfolio bundle
+portfolio_index = PortfolioSearchIndex()
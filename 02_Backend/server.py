@@ -4,8 +4,10 @@ Provides the official protocol handshake for the AI Twin.
 
 from __future__ import annotations
 from typing import Any, AsyncIterator
+import asyncio
 import json
 import logging
+import time
 
 from chatkit.server import ChatKitServer
 from chatkit.agents import AgentContext, simple_to_agent_input, stream_agent_response
@@ -14,10 +16,27 @@ from chatkit.types import ThreadMetadata, ThreadStreamEvent, UserMessageItem
 from agents import Runner
 
 # Import your agent creation logic
-from agent import create_portfolio_agent, GEMINI_MODEL_NAME
+from agent import agent_cache, GEMINI_MODEL_NAME
+from portfolio_bundle import portfolio_bundle
+from step_timing import StepTimingHooks
+from history_window import HISTORY_MAX_ITEMS
+from summarizer import summarizer, history_with_summary, SUMMARY_ENABLED
+from response_cache import response_cache, question_text, replay, RESPONSE_CACHE_ENABLED
+from invalidation import content_changes
+from pregenerate import pregenerated_answers, PREGENERATED_ENABLED
+from metrics import metrics, SIZE_BUCKETS
 
 logger = logging.getLogger(__name__)
 
+TURN_SECONDS = metrics.histogram("chat_turn_seconds", "Wall-clock time of a chat turn, from request to last event")
+TIME_TO_FIRST_TOKEN = metrics.histogram(
+    "chat_time_to_first_token_seconds", "Time from starting the agent run to the first streamed assistant text"
+)
+TURN_EVENTS = metrics.histogram("chat_turn_events", "Stream events yielded per turn", buckets=SIZE_BUCKETS)
+TURN_ERRORS = metrics.counter("chat_turn_errors_total", "Turns that failed while streaming")
+
+TEXT_DELTA = "assistant_message.content_part.text_delta"
+
 class PortfolioChatServer(ChatKitServer[dict[str, Any]]):
     """Server implementation that tracks AI Twin sessions."""
 
@@ -33,12 +52,17 @@ class PortfolioChatServer(ChatKitServer[dict[str, Any]]):
         context: dict[str, Any],
     ) -> AsyncIterator[ThreadStreamEvent]:
         """Handle incoming messages and stream the Gemini response."""
-        
+        turn_started = time.perf_counter()
+
+        # 0. Start the portfolio bundle fetch so it overlaps history loading;
+        # agent priming and every tool call this turn read from it
+        prefetch = portfolio_bundle.prefetch()
+
         # 1. Fetch conversation history
         items_page = await self.store.load_thread_items(
             thread.id,
             after=None,
-            limit=50, # Increased limit for better context
+            limit=HISTORY_MAX_ITEMS,
             order="desc",
             context=context
         )
@@ -51,38 +75,73 @@ class PortfolioChatServer(ChatKitServer[dict[str, Any]]):
             text_preview = (itm.text[:30] + "...") if hasattr(itm, 'text') and itm.text else "N/A"
             logger.info(f"History[{i}]: ID={itm.id} ROLE={role} TEXT={text_preview}")
 
-        # 2. Convert to format the Agent understands
+        personality = thread.metadata.get("personality", "clear")
+
+        # 2. Replay a pre-generated or cached answer to an opening question without running the agent
+        cache_key = None
+        question = question_text(item) if len(items) == 1 else None
+        if question:
+            # Stored answers are tied to a content version, so the bundle must be loaded first
+            await asyncio.wait([prefetch])
+            cached = pregenerated_answers.lookup(question, personality) if PREGENERATED_ENABLED else None
+            if cached is None and RESPONSE_CACHE_ENABLED:
+                bundle = portfolio_bundle.current
+                revision = (content_changes.revision, bundle.version if bundle else None)
+                cache_key = response_cache.make_key(question, personality, revision)
+                cached = response_cache.lookup(cache_key)
+            if cached is not None:
+                logger.info(f"Stored answer for '{question}' ({personality}), replaying {len(cached)} events")
+                new_id = lambda item_type: self.store.generate_item_id(item_type, thread, context)
+                for event in replay(cached, thread.id, new_id):
+                    yield event
+                TURN_EVENTS.observe(len(cached))
+                TURN_SECONDS.observe(time.perf_counter() - turn_started)
+                return
+
+        # 3. Convert to format the Agent understands
         if item:
             logger.info(f"Incoming item ID: {item.id}, Text: '{item.text if hasattr(item, 'text') else 'N/A'}'")
         
-        agent_input = await simple_to_agent_input(items)
+        # Send the thread summary plus the newest items within the history token budget
+        # (counts cached by the store)
+        summary = self.store.load_summary(thread.id)
+        history = history_with_summary(items, summary, self.store.token_counts(thread.id))
+        agent_input = await simple_to_agent_input(history)
         
-        # 3. Create the Portfolio Agent
-        personality = thread.metadata.get("personality", "clear")
-        agent = create_portfolio_agent(personality=personality)
+        # 4. Get the cached Portfolio Agent (rebuilt in the background when the profile changes)
+        agent = await agent_cache.get(personality)
 
-        # 4. Prepare Context
+        # 5. Prepare Context
         agent_context = AgentContext(
             thread=thread,
             store=self.store,
             request_context=context,
         )
 
-        # 5. Run the Agent
+        # 6. Run the Agent (tool calls within a model step run concurrently)
         logger.info(f"Runner start: model={GEMINI_MODEL_NAME}, personality={personality}")
+        step_timing = StepTimingHooks()
+        run_started = time.perf_counter()
         result = Runner.run_streamed(
             agent,
             agent_input,
             context=agent_context,
+            hooks=step_timing,
         )
 
-        # 6. Stream back to ChatKit UI
+        # 7. Stream back to ChatKit UI
         yielded_count = 0
         last_item_id = None
+        first_token_seen = False
+        recorded = [] if cache_key is not None else None
         
         try:
             async for event in stream_agent_response(agent_context, result):
                 yielded_count += 1
+
+                if not first_token_seen and getattr(getattr(event, 'update', None), 'type', None) == TEXT_DELTA:
+                    first_token_seen = True
+                    TIME_TO_FIRST_TOKEN.observe(time.perf_counter() - run_started)
                 
                 # Capture the ID of the assistant message we are sending
                 if event.type == "thread.item.created" or event.type == "thread.item.updated":
@@ -91,9 +150,21 @@ class PortfolioChatServer(ChatKitServer[dict[str, Any]]):
                 if yielded_count % 10 == 0:
                     logger.debug(f"Streaming in progress... yielded {yielded_count} events")
                 
+                if recorded is not None:
+                    recorded.append(event)
                 yield event
             
+            step_timing.finish_turn()
+            if recorded is not None:
+                response_cache.store(cache_key, recorded)
+            # Fold older turns into the thread summary in the background
+            if SUMMARY_ENABLED and summarizer.due(items, summary):
+                summarizer.schedule(self.store, thread.id)
             logger.info(f"--- Turn End: Response finished for ID {last_item_id}. Total events: {yielded_count} ---")
         except Exception as e:
+            TURN_ERRORS.inc()
             logger.exception(f"Error during stream_agent_response: {str(e)}")
             # Don't re-raise, maybe we yielded something useful
+        finally:
+            TURN_EVENTS.observe(yielded_count)
+            TURN_SECONDS.observe(time.perf_counter() - turn_started)
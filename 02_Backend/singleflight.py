@@ -0,0 +1,111 @@
+"""
+Single-flight request coalescing.
+Concurrent callers asking for the same key share one in-flight execution
+and its result (or exception) instead of each doing the work.
+"""
+import asyncio
+import threading
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+# Set up logging
+from logging_config import get_logger
+logger = get_logger(__name__)
+
+
+@dataclass
+class SingleFlightStats:
+    calls: int = 0
+    executions: int = 0
+    coalesced: int = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "coalesced_ratio": self.coalesced / self.calls if self.calls else 0.0,
+        }
+
+
+class _SyncCall:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls, for both coroutines and threads.
+
+    The first caller for a key executes the function; callers arriving while
+    it is in flight wait for and share its outcome. Nothing is cached once
+    the call completes.
+    """
+
+    def __init__(self, name: str = "singleflight"):
+        self.name = name
+        self.stats = SingleFlightStats()
+        self._lock = threading.Lock()
+        self._async_calls: Dict[Hashable, Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = {}
+        self._sync_calls: Dict[Hashable, _SyncCall] = {}
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run `fn` once for all coroutines concurrently requesting `key`.
+
+        The shared call runs in its own task, so a cancelled caller does not
+        cancel the work other callers are waiting on.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self.stats.calls += 1
+            in_flight = self._async_calls.get(key)
+            if in_flight is not None and in_flight[0] is loop:
+                self.stats.coalesced += 1
+                task = in_flight[1]
+            else:
+                self.stats.executions += 1
+                task = loop.create_task(fn())
+                self._async_calls[key] = (loop, task)
+                task.add_done_callback(lambda _t, k=key: self._forget_async(k, _t))
+
+        return await asyncio.shield(task)
+
+    def _forget_async(self, key: Hashable, task: asyncio.Future) -> None:
+        with self._lock:
+            current = self._async_calls.get(key)
+            if current is not None and current[1] is task:
+                del self._async_calls[key]
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"{self.name}: shared call for {key!r} failed: {task.exception()}")
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Run `fn` once for all threads concurrently requesting `key`."""
+        with self._lock:
+            self.stats.calls += 1
+            call = self._sync_calls.get(key)
+            leader = call is None
+            if leader:
+                self.stats.executions += 1
+                call = _SyncCall()
+                self._sync_calls[key] = call
+            else:
+                self.stats.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+        else:
+            try:
+                call.result = fn()
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._sync_calls[key]
+                call.done.set()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
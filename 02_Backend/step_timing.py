@@ -0,0 +1,159 @@
+"""
+Per-step timing for agent runs.
+A "step" is one model call plus the tool calls it requested. The Agents SDK
+runs the tool calls of a step concurrently, so a step's tool phase should
+cost about max(tool latency) rather than sum(tool latency); these hooks
+record both so that can be checked from the logs. Steps per turn are also
+aggregated across turns, since every extra step is another model round trip.
+"""
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from agents import RunHooks
+
+from metrics import metrics, SIZE_BUCKETS
+
+# Set up logging
+from logging_config import get_logger
+logger = get_logger(__name__)
+
+TOOL_SECONDS = metrics.histogram("tool_call_seconds", "Tool call latency", ("tool",))
+MODEL_STEP_SECONDS = metrics.histogram("llm_step_seconds", "Model call latency per agent step")
+TURN_MODEL_STEPS = metrics.histogram("turn_model_steps", "Model steps (LLM round trips) per turn", buckets=SIZE_BUCKETS)
+TURN_TOOL_CALLS = metrics.histogram("turn_tool_calls", "Tool calls per turn", buckets=SIZE_BUCKETS)
+
+
+@dataclass
+class StepTiming:
+    index: int
+    model_seconds: float = 0.0
+    # (tool name, seconds) in completion order
+    tools: List[Tuple[str, float]] = field(default_factory=list)
+    tools_wall_seconds: float = 0.0
+
+    @property
+    def tools_sum_seconds(self) -> float:
+        return sum(seconds for _, seconds in self.tools)
+
+    @property
+    def tools_max_seconds(self) -> float:
+        return max((seconds for _, seconds in self.tools), default=0.0)
+
+    def as_dict(self) -> dict:
+        return {
+            "step": self.index,
+            "model_ms": round(self.model_seconds * 1000, 1),
+            "tools": [name for name, _ in self.tools],
+            "tools_wall_ms": round(self.tools_wall_seconds * 1000, 1),
+            "tools_sum_ms": round(self.tools_sum_seconds * 1000, 1),
+            "tools_max_ms": round(self.tools_max_seconds * 1000, 1),
+        }
+
+
+@dataclass
+class TurnStepStats:
+    turns: int = 0
+    model_steps: int = 0
+    tool_calls: int = 0
+    # model steps in a turn -> number of turns
+    steps_per_turn: Dict[int, int] = field(default_factory=dict)
+
+    def record(self, steps: List[StepTiming]) -> None:
+        self.turns += 1
+        self.model_steps += len(steps)
+        self.tool_calls += sum(len(step.tools) for step in steps)
+        self.steps_per_turn[len(steps)] = self.steps_per_turn.get(len(steps), 0) + 1
+
+    def as_dict(self) -> dict:
+        return {
+            "turns": self.turns,
+            "model_steps": self.model_steps,
+            "tool_calls": self.tool_calls,
+            "avg_model_steps_per_turn": self.model_steps / self.turns if self.turns else 0.0,
+            "avg_tool_calls_per_turn": self.tool_calls / self.turns if self.turns else 0.0,
+            "steps_per_turn": dict(sorted(self.steps_per_turn.items())),
+        }
+
+
+class StepTimingHooks(RunHooks):
+    """
+    Run hooks that time each model call and the wall-clock span of the tool
+    calls it triggered. Create one instance per turn.
+    """
+
+    def __init__(self):
+        self.steps: List[StepTiming] = []
+        self._model_started: Optional[float] = None
+        self._tool_started: Dict[str, Tuple[str, float]] = {}
+        self._tools_phase_started: Optional[float] = None
+
+    @property
+    def current(self) -> Optional[StepTiming]:
+        return self.steps[-1] if self.steps else None
+
+    async def on_llm_start(self, context, agent, system_prompt, input_items) -> None:
+        self._model_started = time.perf_counter()
+        self._tools_phase_started = None
+        self.steps.append(StepTiming(index=len(self.steps) + 1))
+
+    async def on_llm_end(self, context, agent, response) -> None:
+        if self._model_started is not None and self.current is not None:
+            self.current.model_seconds = time.perf_counter() - self._model_started
+            MODEL_STEP_SECONDS.observe(self.current.model_seconds)
+        self._model_started = None
+
+    async def on_tool_start(self, context, agent, tool) -> None:
+        now = time.perf_counter()
+        if self._tools_phase_started is None:
+            self._tools_phase_started = now
+        self._tool_started[_call_id(context, tool)] = (tool.name, now)
+
+    async def on_tool_end(self, context, agent, tool, result: Any) -> None:
+        now = time.perf_counter()
+        started = self._tool_started.pop(_call_id(context, tool), None)
+        step = self.current
+        if started is None or step is None:
+            return
+        name, started_at = started
+        step.tools.append((name, now - started_at))
+        TOOL_SECONDS.observe(now - started_at, tool=name)
+        step.tools_wall_seconds = now - self._tools_phase_started
+
+    def summary(self) -> List[dict]:
+        return [step.as_dict() for step in self.steps]
+
+    def finish_turn(self, stats: Optional[TurnStepStats] = None) -> None:
+        """Log the turn's steps and add them to the cross-turn step stats."""
+        self.log_summary()
+        stats = stats if stats is not None else turn_step_stats
+        stats.record(self.steps)
+        tool_calls = sum(len(step.tools) for step in self.steps)
+        TURN_MODEL_STEPS.observe(len(self.steps))
+        TURN_TOOL_CALLS.observe(tool_calls)
+        logger.info(
+            f"Turn took {len(self.steps)} model step(s) and {tool_calls} tool call(s); "
+            f"average {stats.as_dict()['avg_model_steps_per_turn']:.2f} steps over {stats.turns} turn(s)",
+            extra={"model_steps": len(self.steps), "tool_calls": tool_calls},
+        )
+
+    def log_summary(self) -> None:
+        for step in self.steps:
+            if step.tools:
+                logger.info(
+                    f"Step {step.index}: model {step.model_seconds * 1000:.0f}ms, "
+                    f"{len(step.tools)} tool call(s) in {step.tools_wall_seconds * 1000:.0f}ms "
+                    f"(sum {step.tools_sum_seconds * 1000:.0f}ms, max {step.tools_max_seconds * 1000:.0f}ms)",
+                    extra={"step_timing": step.as_dict()},
+                )
+            else:
+                logger.info(f"Step {step.index}: model {step.model_seconds * 1000:.0f}ms, no tool calls")
+
+
+# Global model-steps-per-turn stats
+turn_step_stats = TurnStepStats()
+
+
+def _call_id(context, tool) -> str:
+    # Function tools receive a ToolContext carrying the call ID; fall back to the tool name
+    return getattr(context, "tool_call_id", None) or tool.name
@@ -0,0 +1,227 @@
+"""
+Rolling summaries of long threads.
+Once a thread has more unsummarized items than SUMMARY_TRIGGER_ITEMS, a
+background job folds the older turns (all but the last SUMMARY_KEEP_RECENT
+items) into the thread's stored summary, which `respond()` then sends in
+place of those turns. The summary is bounded in size, so prompt size
+plateaus instead of growing with the length of the conversation.
+"""
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, MutableMapping, Optional, Protocol, Sequence, Tuple
+
+from chatkit.types import AssistantMessageItem, ClientToolCallItem, HiddenContextItem, ThreadItem, UserMessageItem
+from decouple import config
+
+from history_window import build_history, item_tokens, HISTORY_TOKEN_BUDGET
+from metrics import metrics
+
+# Set up logging
+from logging_config import get_logger
+logger = get_logger(__name__)
+
+SUMMARY_ENABLED = config("SUMMARY_ENABLED", default=True, cast=bool)
+# Summarize once this many items follow the current summary
+SUMMARY_TRIGGER_ITEMS = config("SUMMARY_TRIGGER_ITEMS", default=20, cast=int)
+# Newest items always sent verbatim
+SUMMARY_KEEP_RECENT = config("SUMMARY_KEEP_RECENT", default=8, cast=int)
+# Target length of the summary
+SUMMARY_MAX_WORDS = config("SUMMARY_MAX_WORDS", default=200, cast=int)
+# Characters of a single message or tool output included in the transcript
+TRANSCRIPT_ITEM_CHARS = 1500
+
+SUMMARY_PROMPT = (
+    "You maintain a running summary of a conversation between a visitor and the AI assistant of a "
+    "professional portfolio. Update the summary with the new turns. Keep what the visitor asked about, "
+    "their stated interests and constraints, and facts the assistant already gave. Write at most "
+    "{max_words} words of plain prose."
+)
+
+SUMMARY_SECONDS = metrics.histogram("chat_summary_seconds", "Time to update a thread's rolling summary")
+SUMMARY_RUNS = metrics.counter("chat_summaries_total", "Rolling summary jobs by outcome", ("outcome",))
+
+
+class SummaryModel(Protocol):
+    async def summarize(self, previous: Optional[str], transcript: str, max_words: int) -> str:
+        ...
+
+
+class LLMSummaryModel:
+    """Summaries from the chat model over the shared LLM client."""
+
+    def __init__(self, client=None, model: Optional[str] = None):
+        self._client = client
+        self._model = model
+
+    async def summarize(self, previous: Optional[str], transcript: str, max_words: int) -> str:
+        if self._client is None:
+            from agent import get_llm_client, GEMINI_MODEL_NAME
+            self._client, self._model = get_llm_client(), self._model or GEMINI_MODEL_NAME
+        content = f"Current summary:\n{previous or '(none)'}\n\nNew turns:\n{transcript}"
+        response = await self._client.chat.completions.create(
+            model=self._model,
+            messages=[
+                {"role": "system", "content": SUMMARY_PROMPT.format(max_words=max_words)},
+                {"role": "user", "content": content},
+            ],
+            max_tokens=max_words * 2,
+        )
+        return (response.choices[0].message.content or "").strip()
+
+
+@dataclass
+class ThreadSummary:
+    """A thread's summary of every item up to and including `through_id`."""
+    item: HiddenContextItem
+    text: str
+    through_id: str
+    covered: int
+    tokens: int
+
+
+def transcript(items: Sequence[ThreadItem]) -> str:
+    """Plain-text transcript of messages and client tool outputs."""
+    lines = []
+    for item in items:
+        if isinstance(item, UserMessageItem):
+            text, speaker = " ".join(getattr(part, "text", "") for part in item.content), "Visitor"
+        elif isinstance(item, AssistantMessageItem):
+            text, speaker = " ".join(part.text for part in item.content), "Assistant"
+        elif isinstance(item, ClientToolCallItem) and item.output is not None:
+            text, speaker = str(item.output), f"Tool {item.name}"
+        else:
+            continue
+        text = " ".join(text.split())
+        if len(text) > TRANSCRIPT_ITEM_CHARS:
+            text = text[:TRANSCRIPT_ITEM_CHARS] + "…"
+        lines.append(f"{speaker}: {text}")
+    return "\n".join(lines)
+
+
+def items_after(items: Sequence[ThreadItem], summary: Optional[ThreadSummary]) -> List[ThreadItem]:
+    """The items (oldest first) not covered by the summary."""
+    if summary is None:
+        return list(items)
+    for i, item in enumerate(items):
+        if item.id == summary.through_id:
+            return list(items[i + 1:])
+    return list(items)
+
+
+def history_with_summary(
+    items: Sequence[ThreadItem],
+    summary: Optional[ThreadSummary],
+    counts: Optional[MutableMapping[str, int]] = None,
+    budget: int = HISTORY_TOKEN_BUDGET,
+) -> List[ThreadItem]:
+    """The summary item followed by the unsummarized items that fit the rest of the budget."""
+    if summary is None:
+        return build_history(items, counts, budget).items
+    window = build_history(items_after(items, summary), counts, max(budget - summary.tokens, 0))
+    return [summary.item] + window.items
+
+
+def _boundary(items: Sequence[ThreadItem], keep_recent: int) -> int:
+    """Number of leading items to summarize, so the kept items start on a user message."""
+    end = max(len(items) - max(keep_recent, 0), 0)
+    # Keeping nothing needs no user message to start on
+    while 0 < end < len(items) and not isinstance(items[end], UserMessageItem):
+        end -= 1
+    return end
+
+
+class ThreadSummarizer:
+    """Runs at most one summary job per thread, off the request path."""
+
+    def __init__(
+        self,
+        model: Optional[SummaryModel] = None,
+        trigger_items: int = SUMMARY_TRIGGER_ITEMS,
+        keep_recent: int = SUMMARY_KEEP_RECENT,
+        max_words: int = SUMMARY_MAX_WORDS,
+    ):
+        self.model = model or LLMSummaryModel()
+        self.trigger_items = trigger_items
+        self.keep_recent = keep_recent
+        self.max_words = max_words
+        self._jobs: Dict[str, asyncio.Task] = {}
+        # Thread -> (first item, last item) of the range last folded in
+        self._done: Dict[str, Tuple[str, str]] = {}
+
+    def due(self, items: Sequence[ThreadItem], summary: Optional[ThreadSummary]) -> bool:
+        return len(items_after(items, summary)) > self.trigger_items
+
+    def schedule(self, store, thread_id: str) -> Optional[asyncio.Task]:
+        """Start a summary job for the thread unless one is already running."""
+        job = self._jobs.get(thread_id)
+        if job is not None and not job.done():
+            return job
+        job = asyncio.create_task(self.run(store, thread_id))
+        self._jobs[thread_id] = job
+
+        def forget(task: asyncio.Task) -> None:
+            if self._jobs.get(thread_id) is task:
+                del self._jobs[thread_id]
+
+        job.add_done_callback(forget)
+        return job
+
+    async def run(self, store, thread_id: str) -> Optional[ThreadSummary]:
+        """
+        Fold the older unsummarized items into the thread's summary.
+
+        Returns:
+            The new summary, or None if nothing was due or the range was already summarized
+        """
+        items = list(store.items.get(thread_id, []))
+        previous = store.load_summary(thread_id)
+        if not self.due(items, previous):
+            return None
+        pending = items_after(items, previous)
+        end = _boundary(pending, self.keep_recent)
+        if end == 0:
+            return None
+        batch = pending[:end]
+        span = (batch[0].id, batch[-1].id)
+        if self._done.get(thread_id) == span:
+            SUMMARY_RUNS.inc(outcome="duplicate")
+            return None
+
+        try:
+            with SUMMARY_SECONDS.time():
+                text = await self.model.summarize(previous.text if previous else None, transcript(batch), self.max_words)
+        except Exception as e:
+            SUMMARY_RUNS.inc(outcome="error")
+            logger.warning(f"Summary of thread {thread_id} failed, keeping raw history: {e}")
+            return None
+        if not text:
+            SUMMARY_RUNS.inc(outcome="empty")
+            return None
+        if store.load_summary(thread_id) is not previous:
+            # Another writer replaced the summary meanwhile; its range wins
+            SUMMARY_RUNS.inc(outcome="superseded")
+            return None
+
+        item = HiddenContextItem(
+            id=f"summary_{thread_id}_{batch[-1].id}",
+            thread_id=thread_id,
+            created_at=getattr(batch[-1], "created_at", None) or datetime.now(),
+            content=f"Summary of the earlier conversation:\n{text}",
+        )
+        summary = ThreadSummary(
+            item=item,
+            text=text,
+            through_id=batch[-1].id,
+            covered=(previous.covered if previous else 0) + len(batch),
+            tokens=item_tokens(item),
+        )
+        store.save_summary(thread_id, summary)
+        self._done[thread_id] = span
+        SUMMARY_RUNS.inc(outcome="saved")
+        logger.info(f"Thread {thread_id} summary now covers {summary.covered} items ({summary.tokens} tokens)")
+        return summary
+
+
+# Global summarizer used by the chat server
+summarizer = ThreadSummarizer()
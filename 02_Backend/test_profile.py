@@ -1,9 +1,9 @@
-from tools import get_profile
+from tools import fetch_profile
 import asyncio
 
 async def test():
-    profile = get_profile()
+    profile = await fetch_profile()
     print(profile)
 
 if __name__ == "__main__":
-    asyncio.run(test())
+    asyncio.run(test())
\ No newline at end of file
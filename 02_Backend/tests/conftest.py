@@ -0,0 +1,239 @@
+"""
+Shared pytest setup for the backend test suite.
+Makes the backend modules importable and provides dummy configuration so
+modules that read settings at import time can load without a .env file.
+"""
+import json
+import os
+import sys
+
+import pytest
+
+# Add backend root to path to allow importing from root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("SANITY_PROJECT_ID", "test-project")
+os.environ.setdefault("SANITY_API_TOKEN", "")
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+
+@pytest.fixture
+def invoke_tool():
+    """Invoke a FunctionTool the way the Runner does and return its output."""
+    from agents.tool_context import ToolContext
+
+    async def _invoke(tool, **arguments):
+        payload = json.dumps(arguments)
+        ctx = ToolContext(
+            context=None,
+            tool_name=tool.name,
+            tool_call_id=f"call_{tool.name}",
+            tool_arguments=payload,
+        )
+        return await tool.on_invoke_tool(ctx, payload)
+
+    return _invoke
+
+
+class LocalServer:
+    """Serves a Starlette app from `_app()` with uvicorn on a random local port, in a thread."""
+
+    base_url = ""
+    _server = None
+    _thread = None
+
+    def _app(self):
+        raise NotImplementedError
+
+    def start(self):
+        import socket
+        import threading
+        import time
+        import uvicorn
+
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        self.base_url = f"http://127.0.0.1:{sock.getsockname()[1]}"
+        self._server = uvicorn.Server(uvicorn.Config(self._app(), log_level="warning"))
+        self._thread = threading.Thread(target=self._server.run, kwargs={"sockets": [sock]}, daemon=True)
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return self
+
+    def stop(self) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
+
+
+class FakeSanityServer(LocalServer):
+    """
+    Local stand-in for the Sanity query API, served by uvicorn on a random port.
+
+    `/cdn/...` and `/live/...` play the apicdn and api hosts. Per-host
+    `delays` (seconds) and `statuses` can be changed while it runs, and
+    every request is recorded in `calls` as (host, query).
+
+    `/live/data/listen/...` is a stand-in for the `/listen` SSE stream:
+    each connection gets a `welcome` event, then whatever `emit()` sends;
+    `disconnect()` ends every open stream.
+    """
+
+    def __init__(self):
+        self.delays = {"cdn": 0.0, "live": 0.0}
+        self.statuses = {"cdn": 200, "live": 200}
+        self.results = {"cdn": [{"source": "cdn"}], "live": [{"source": "live"}]}
+        self.calls = []
+        self.listen_connections = 0
+        self._streams = []
+        self._loop = None
+
+    def url(self, host: str) -> str:
+        return f"{self.base_url}/{host}/data/query/production"
+
+    def listen_url(self) -> str:
+        return f"{self.base_url}/live/data/listen/production"
+
+    def emit(self, event: str, data) -> None:
+        """Send an SSE event to every open listen stream."""
+        message = f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        for stream in list(self._streams):
+            self._loop.call_soon_threadsafe(stream.put_nowait, message)
+
+    def disconnect(self) -> None:
+        """Close every open listen stream from the server side."""
+        for stream in list(self._streams):
+            self._loop.call_soon_threadsafe(stream.put_nowait, None)
+
+    def _app(self):
+        import asyncio as _asyncio
+        from starlette.applications import Starlette
+        from starlette.responses import JSONResponse, StreamingResponse
+        from starlette.routing import Route
+
+        async def query(request):
+            host = request.path_params["host"]
+            self.calls.append((host, request.query_params.get("query")))
+            await _asyncio.sleep(self.delays[host])
+            status = self.statuses[host]
+            body = {"result": self.results[host]} if status == 200 else {"error": "injected failure"}
+            return JSONResponse(body, status_code=status)
+
+        async def listen(request):
+            self._loop = _asyncio.get_running_loop()
+            self.listen_connections += 1
+            stream = _asyncio.Queue()
+            self._streams.append(stream)
+
+            async def events():
+                try:
+                    yield 'event: welcome\ndata: {"listenerName": "fake"}\n\n'
+                    while True:
+                        message = await stream.get()
+                        if message is None:
+                            return
+                        yield message
+                finally:
+                    self._streams.remove(stream)
+
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        return Starlette(routes=[
+            Route("/{host}/data/query/{dataset}", query),
+            Route("/live/data/listen/{dataset}", listen),
+        ])
+
+    def stop(self) -> None:
+        self.disconnect()
+        super().stop()
+
+@pytest.fixture
+def fake_sanity():
+    """A running FakeSanityServer, stopped after the test."""
+    server = FakeSanityServer().start()
+    yield server
+    server.stop()
+
+
+class FakeLLMServer(LocalServer):
+    """
+    Local stand-in for an OpenAI-compatible chat completions API (base URL `.../v1`).
+
+    Responses are chosen per API key (the bearer token): `statuses[key]`
+    (default 200), `delays[key]` in seconds and `retry_after[key]` for the
+    Retry-After header of error responses. Every completion request is
+    recorded in `calls` as (key, stream), and `in_flight` / `peak_in_flight`
+    count concurrent requests per key. Streams send one content chunk per
+    word of `reply`.
+    """
+
+    def __init__(self, reply: str = "Hello from the stub"):
+        self.reply = reply
+        self.statuses = {}
+        self.delays = {}
+        self.retry_after = {}
+        self.calls = []
+        self.in_flight = {}
+        self.peak_in_flight = {}
+
+    def _app(self):
+        import asyncio as _asyncio
+        import time
+        from starlette.applications import Starlette
+        from starlette.responses import JSONResponse, StreamingResponse
+        from starlette.routing import Route
+
+        def chunk(model, delta, finish_reason=None):
+            return {"id": "chatcmpl-stub", "object": "chat.completion.chunk", "created": int(time.time()),
+                    "model": model, "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+
+        async def completions(request):
+            key = request.headers.get("authorization", "").removeprefix("Bearer ")
+            body = await request.json()
+            stream = bool(body.get("stream"))
+            self.calls.append((key, stream))
+            self.in_flight[key] = self.in_flight.get(key, 0) + 1
+            self.peak_in_flight[key] = max(self.peak_in_flight.get(key, 0), self.in_flight[key])
+            try:
+                await _asyncio.sleep(self.delays.get(key, 0.0))
+            finally:
+                self.in_flight[key] -= 1
+            status = self.statuses.get(key, 200)
+            if status != 200:
+                headers = {"retry-after": str(self.retry_after[key])} if key in self.retry_after else None
+                return JSONResponse({"error": {"message": "injected failure", "code": status}},
+                                    status_code=status, headers=headers)
+            model = body.get("model", "stub")
+            if not stream:
+                return JSONResponse({
+                    "id": "chatcmpl-stub", "object": "chat.completion", "created": int(time.time()), "model": model,
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": self.reply}}],
+                    "usage": {"prompt_tokens": 5, "completion_tokens": 4, "total_tokens": 9},
+                })
+
+            async def events():
+                yield f"data: {json.dumps(chunk(model, {'role': 'assistant', 'content': ''}))}\n\n"
+                for i, word in enumerate(self.reply.split()):
+                    yield f"data: {json.dumps(chunk(model, {'content': (' ' if i else '') + word}))}\n\n"
+                yield f"data: {json.dumps(chunk(model, {}, 'stop'))}\n\n"
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        async def models(request):
+            return JSONResponse({"object": "list", "data": [{"id": "stub", "object": "model", "created": 0,
+                                                             "owned_by": "stub"}]})
+
+        return Starlette(routes=[
+            Route("/v1/chat/completions", completions, methods=["POST"]),
+            Route("/v1/models", models),
+        ])
+
+
+@pytest.fixture
+def fake_llm():
+    """A running FakeLLMServer, stopped after the test."""
+    server = FakeLLMServer().start()
+    yield server
+    server.stop()
@@ -0,0 +1,89 @@
+"""
+Test to verify that tool calls requested in one model step run concurrently.
+"""
+import asyncio
+
+import pytest
+from agents import Agent, Runner
+from agents.items import ModelResponse
+from agents.models.interface import Model
+from agents.usage import Usage
+from openai.types.responses import ResponseFunctionToolCall, ResponseOutputMessage, ResponseOutputText
+
+from document_store import DocumentStore, DEFAULT_EXPORT_PATH
+from groq_engine import evaluate
+from portfolio_bundle import BUNDLE_QUERY, PortfolioBundle
+from step_timing import StepTimingHooks
+
+TOOL_LATENCY = 0.3
+
+
+class ScriptedModel(Model):
+    """Asks for three tools in its first step, then answers."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def get_response(self, system_instructions, input, model_settings, tools, output_schema,
+                           handoffs, tracing, **kwargs):
+        self.calls += 1
+        if self.calls == 1:
+            output = [
+                ResponseFunctionToolCall(id=f"fc_{i}", call_id=f"call_{i}", name=name,
+                                         arguments=arguments, type="function_call")
+                for i, (name, arguments) in enumerate([
+                    ("get_skills", '{"category": "frontend"}'),
+                    ("get_projects", "{}"),
+                    ("search_experience", '{"query_param": "Tech"}'),
+                ])
+            ]
+        else:
+            output = [ResponseOutputMessage(
+                id="msg_1", role="assistant", status="completed", type="message",
+                content=[ResponseOutputText(text="done", type="output_text", annotations=[])],
+            )]
+        return ModelResponse(output=output, usage=Usage(), response_id=None)
+
+    def stream_response(self, *args, **kwargs):
+        raise NotImplementedError
+
+
+@pytest.mark.asyncio
+async def test_step_tool_calls_cost_max_not_sum(monkeypatch):
+    """
+    Verify that three slow tools in one step finish in about one tool's latency,
+    with outputs returned in call order.
+    """
+    import tools
+
+    store = DocumentStore()
+    store.load(DEFAULT_EXPORT_PATH)
+    bundle = PortfolioBundle(evaluate(BUNDLE_QUERY.text, store))
+
+    class SlowBundle:
+        async def get(self):
+            await asyncio.sleep(TOOL_LATENCY)
+            return bundle
+
+    monkeypatch.setattr(tools, "portfolio_bundle", SlowBundle())
+    agent = Agent(
+        name="Portfolio AI Assistant",
+        instructions="test",
+        model=ScriptedModel(),
+        tools=[tools.get_skills, tools.get_projects, tools.search_experience],
+    )
+    hooks = StepTimingHooks()
+
+    result = await Runner.run(agent, "What do you build?", hooks=hooks)
+
+    assert result.final_output == "done"
+    step = hooks.steps[0]
+    assert sorted(name for name, _ in step.tools) == ["get_projects", "get_skills", "search_experience"]
+    assert step.tools_sum_seconds >= 3 * TOOL_LATENCY * 0.9
+    assert step.tools_wall_seconds < 2 * TOOL_LATENCY, step.as_dict()
+
+    outputs = [item.output for item in result.new_items if item.type == "tool_call_output_item"]
+    assert outputs[0].startswith("Skills (")
+    assert outputs[1].startswith("Projects (")
+    assert outputs[2].startswith("Work Experience (")
+    assert len(hooks.steps) == 2 and hooks.steps[1].tools == []
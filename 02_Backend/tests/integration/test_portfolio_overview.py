@@ -0,0 +1,117 @@
+"""
+Test to verify that get_portfolio_overview answers broad questions in fewer model steps.
+"""
+import json
+
+import pytest
+from agents import Agent, Runner
+from agents.items import ModelResponse
+from agents.models.interface import Model
+from agents.usage import Usage
+from openai.types.responses import ResponseFunctionToolCall, ResponseOutputMessage, ResponseOutputText
+
+from document_store import DocumentStore, DEFAULT_EXPORT_PATH
+from groq_engine import evaluate
+from portfolio_bundle import BUNDLE_QUERY, PortfolioBundle
+from step_timing import StepTimingHooks, TurnStepStats
+
+
+class ScriptedModel(Model):
+    """Requests one tool call per step from a script, then answers."""
+
+    def __init__(self, script):
+        self.script = list(script)
+
+    async def get_response(self, system_instructions, input, model_settings, tools, output_schema,
+                           handoffs, tracing, **kwargs):
+        if self.script:
+            name, arguments = self.script.pop(0)
+            output = [ResponseFunctionToolCall(id=f"fc_{name}", call_id=f"call_{name}", name=name,
+                                               arguments=json.dumps(arguments), type="function_call")]
+        else:
+            output = [ResponseOutputMessage(
+                id="msg_1", role="assistant", status="completed", type="message",
+                content=[ResponseOutputText(text="done", type="output_text", annotations=[])],
+            )]
+        return ModelResponse(output=output, usage=Usage(), response_id=None)
+
+    def stream_response(self, *args, **kwargs):
+        raise NotImplementedError
+
+
+@pytest.fixture
+def tools_on_bundle(monkeypatch):
+    """Serve the tools from the local export and count bundle reads."""
+    import tools
+
+    store = DocumentStore()
+    store.load(DEFAULT_EXPORT_PATH)
+    bundle = PortfolioBundle(evaluate(BUNDLE_QUERY.text, store))
+
+    class CountingBundle:
+        gets = 0
+
+        async def get(self):
+            CountingBundle.gets += 1
+            return bundle
+
+    monkeypatch.setattr(tools, "portfolio_bundle", CountingBundle())
+    return tools, CountingBundle
+
+
+async def _run_turn(tools, script, stats):
+    agent = Agent(
+        name="Portfolio AI Assistant",
+        instructions="test",
+        model=ScriptedModel(script),
+        tools=[tools.get_profile, tools.get_skills, tools.get_projects, tools.search_experience,
+               tools.check_availability, tools.get_portfolio_overview],
+    )
+    hooks = StepTimingHooks()
+    result = await Runner.run(agent, "Tell me about yourself", hooks=hooks)
+    hooks.finish_turn(stats)
+    return result
+
+
+@pytest.mark.asyncio
+async def test_overview_cuts_model_steps(tools_on_bundle, invoke_tool):
+    """
+    Verify that a broad question answered by the overview takes two model
+    steps instead of five, with the same sections in the tool output.
+    """
+    tools, _ = tools_on_bundle
+
+    chained, overview = TurnStepStats(), TurnStepStats()
+    await _run_turn(tools, [
+        ("get_profile", {}), ("get_skills", {}), ("get_projects", {}), ("search_experience", {}),
+    ], chained)
+    result = await _run_turn(tools, [
+        ("get_portfolio_overview", {"sections": ["profile", "skills", "projects", "experience"]}),
+    ], overview)
+
+    assert chained.as_dict()["avg_model_steps_per_turn"] == 5
+    assert overview.as_dict()["avg_model_steps_per_turn"] == 2
+    assert overview.steps_per_turn == {2: 1} and overview.tool_calls == 1
+
+    output = next(item.output for item in result.new_items if item.type == "tool_call_output_item")
+    for section in [await tools.fetch_profile(), await tools.fetch_skills(),
+                    await tools.fetch_projects(), await tools.fetch_experience()]:
+        assert section in output
+    assert "Availability Status" not in output
+
+
+@pytest.mark.asyncio
+async def test_overview_sections(tools_on_bundle, invoke_tool):
+    """
+    Verify section selection, ordering and that unknown sections fall back to all.
+    """
+    tools, counter = tools_on_bundle
+
+    output = await invoke_tool(tools.get_portfolio_overview, sections=["availability", "skills"])
+    assert output.index("Skills (") < output.index("Availability Status")
+    assert "Profile Information" not in output
+    assert counter.gets == 2, "Each section reads the shared bundle once"
+
+    everything = await invoke_tool(tools.get_portfolio_overview, sections=["hobbies"])
+    for heading in ["Profile Information", "Skills (", "Projects (", "Work Experience (", "Availability Status"]:
+        assert heading in everything
@@ -0,0 +1,162 @@
+"""
+Test to verify the `/listen` subscription against a local stand-in SSE server.
+"""
+import asyncio
+
+import pytest
+import pytest_asyncio
+
+from document_store import DocumentStore, DEFAULT_EXPORT_PATH
+
+
+async def wait_for(condition, timeout: float = 5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("Condition not met before timeout")
+        await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+def store(monkeypatch):
+    import sanity_listener
+
+    s = DocumentStore()
+    s.load(DEFAULT_EXPORT_PATH)
+    monkeypatch.setattr(sanity_listener, "document_store", s)
+    return s
+
+
+@pytest.fixture
+def refreshes(monkeypatch):
+    """Count bundle re-warms instead of querying Sanity."""
+    import sanity_listener
+
+    calls = []
+
+    class FakeBundle:
+        async def get(self):
+            calls.append(1)
+
+    monkeypatch.setattr(sanity_listener, "portfolio_bundle", FakeBundle())
+    return calls
+
+
+@pytest_asyncio.fixture
+async def listener(fake_sanity):
+    from sanity_listener import SanityListener
+
+    subscription = SanityListener(url=fake_sanity.listen_url(), backoff_base=0.05, refresh_debounce=0.05)
+    subscription.start()
+    await wait_for(lambda: subscription.connected)
+    yield subscription
+    await subscription.stop()
+
+
+@pytest.mark.asyncio
+async def test_mutations_update_mirror_and_invalidate(fake_sanity, store, refreshes, listener):
+    """
+    Verify that update and disappear mutations are applied to the mirror and published.
+    """
+    from invalidation import content_changes
+
+    changes = []
+    content_changes.subscribe(changes.append)
+
+    updated = {**store.get("skill-react"), "percentage": 99}
+    fake_sanity.emit("mutation", {"documentId": "skill-react", "transition": "update", "result": updated})
+    fake_sanity.emit("mutation", {"documentId": "drafts.skill-vue", "transition": "update",
+                                  "result": {"_id": "drafts.skill-vue", "_type": "skill"}})
+    fake_sanity.emit("mutation", {"documentId": "service-1", "transition": "disappear"})
+
+    await wait_for(lambda: store.get("service-1") is None)
+    assert store.get("skill-react")["percentage"] == 99
+    assert store.get("drafts.skill-vue") is None, "Draft mutations are ignored"
+    assert [(c.doc_type, c.doc_id, c.source) for c in changes[-2:]] == [
+        ("skill", "skill-react", "listen"),
+        ("service", "service-1", "listen"),
+    ]
+
+    await wait_for(lambda: refreshes)
+    await asyncio.sleep(0.1)
+    assert len(refreshes) == 1, "A burst of mutations re-warms the bundle once"
+
+
+@pytest.mark.asyncio
+async def test_mutation_during_rewarm_triggers_another(monkeypatch, fake_sanity, store, listener):
+    """
+    Verify that a mutation landing while the bundle fetch is in flight
+    re-warms the bundle again once that fetch finishes.
+    """
+    import sanity_listener
+
+    started, release = asyncio.Event(), asyncio.Event()
+    calls = []
+
+    class SlowBundle:
+        async def get(self):
+            calls.append(1)
+            started.set()
+            await release.wait()
+
+    monkeypatch.setattr(sanity_listener, "portfolio_bundle", SlowBundle())
+    updated = {**store.get("skill-react"), "percentage": 99}
+
+    fake_sanity.emit("mutation", {"documentId": "skill-react", "transition": "update", "result": updated})
+    await started.wait()
+    fake_sanity.emit("mutation", {"documentId": "skill-react", "transition": "update",
+                                  "result": {**updated, "percentage": 100}})
+    await wait_for(lambda: listener.mutations == 2)
+    release.set()
+
+    await wait_for(lambda: len(calls) == 2)
+    await asyncio.sleep(0.1)
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_reconnects_with_backoff_and_resyncs(monkeypatch, fake_sanity, store, refreshes, listener):
+    """
+    Verify that a dropped stream reconnects and resyncs the mirror from the live API.
+    """
+    import sanity_listener
+    from sanity_client import AsyncSanityClient
+
+    client = AsyncSanityClient(http2=False, cdn_url=fake_sanity.url("cdn"), live_url=fake_sanity.url("live"))
+    monkeypatch.setattr(sanity_listener, "sanity", client)
+    skills = [{**doc, "name": doc["name"].upper()} for doc in store.documents("skill")]
+    fake_sanity.results["live"] = skills
+
+    fake_sanity.disconnect()
+    await wait_for(lambda: listener.connections == 2)
+    await wait_for(lambda: store.get("skill-react")["name"] == "REACT")
+
+    assert fake_sanity.listen_connections == 2
+    assert store.documents("profile") == [], "Types missing from the resync are removed"
+    assert len(store.documents("skill")) == len(skills)
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_parse_sse_handles_comments_and_multiline_data():
+    """
+    Verify SSE framing: keepalive comments, multi-line data and event names.
+    """
+    from sanity_listener import parse_sse
+
+    async def lines():
+        for line in [": keepalive", "event: mutation", 'data: {"a":', "data: 1}", "", "data: x", ""]:
+            yield line
+
+    assert [event async for event in parse_sse(lines())] == [("mutation", '{"a":\n1}'), ("message", "x")]
+
+
+def test_subscribes_to_every_type_the_queries_read():
+    """
+    Verify that the listen stream covers every `_type` a registered query reads, including the retrieval corpus.
+    """
+    from query_registry import queries
+    from sanity_listener import PORTFOLIO_TYPES
+
+    assert {"blog", "testimonial"} <= set(PORTFOLIO_TYPES)
+    assert all(template.doc_types <= set(PORTFOLIO_TYPES) for template in queries)
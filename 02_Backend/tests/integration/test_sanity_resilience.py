@@ -0,0 +1,126 @@
+"""
+Test to verify hedged requests and circuit breaking between the Sanity CDN
+and live API against a local fake Sanity server with injected delays.
+"""
+import time
+
+import httpx
+import pytest
+import pytest_asyncio
+
+from resilience import OPEN
+
+
+@pytest_asyncio.fixture
+async def client(fake_sanity):
+    from sanity_client import AsyncSanityClient
+
+    c = AsyncSanityClient(http2=False, cdn_url=fake_sanity.url("cdn"), live_url=fake_sanity.url("live"))
+    c.cdn.latency.initial_delay = 0.1
+    c.live.latency.initial_delay = 0.1
+    yield c
+    await c.aclose()
+
+
+@pytest.mark.asyncio
+async def test_slow_cdn_is_hedged_to_live(fake_sanity, client):
+    """
+    Verify that a CDN request slower than the deadline is raced against the live API.
+    """
+    fake_sanity.delays["cdn"] = 2.0
+
+    started = time.perf_counter()
+    result = await client.fetch('*[_type == "skill"]')
+    elapsed = time.perf_counter() - started
+
+    assert result == [{"source": "live"}]
+    assert elapsed < 1.0, "The hedged live response should win long before the slow CDN"
+    assert client.cdn.hedges == 1
+    assert [host for host, _ in fake_sanity.calls] == ["cdn", "live"]
+
+
+@pytest.mark.asyncio
+async def test_slow_live_query_is_not_hedged_to_cdn(fake_sanity, client):
+    """
+    Verify that a live query slower than the deadline waits for the live API
+    instead of racing the CDN, and only fails over once live errors.
+    """
+    fake_sanity.delays["live"] = 0.5
+
+    assert await client.fetch('*[_type == "skill"]', use_cdn=False) == [{"source": "live"}]
+    assert client.live.hedges == 0
+    assert [host for host, _ in fake_sanity.calls] == ["live"]
+
+    fake_sanity.delays["live"] = 0.0
+    fake_sanity.statuses["live"] = 503
+    assert await client.fetch('*[_type == "skill"]', use_cdn=False) == [{"source": "cdn"}]
+
+
+@pytest.mark.asyncio
+async def test_fast_primary_is_not_hedged(fake_sanity, client):
+    """
+    Verify that responses inside the deadline never trigger a hedge, and the
+    deadline tightens to the observed p95 once enough samples exist.
+    """
+    for _ in range(client.cdn.latency.min_samples):
+        assert await client.fetch('*[_type == "skill"]', use_cdn=False) == [{"source": "live"}]
+
+    assert {host for host, _ in fake_sanity.calls} == {"live"}
+    assert client.live.hedges == 0
+    assert client.live.latency.deadline() < client.live.latency.initial_delay
+
+
+@pytest.mark.asyncio
+async def test_failing_endpoint_opens_breaker_and_is_skipped(fake_sanity, client):
+    """
+    Verify that 5xx responses fail over immediately and open the endpoint's circuit.
+    """
+    fake_sanity.statuses["cdn"] = 503
+    threshold = client.cdn.breaker.failure_threshold
+
+    for _ in range(threshold):
+        assert await client.fetch('*[_type == "skill"]') == [{"source": "live"}]
+    assert client.cdn.breaker.state == OPEN
+
+    fake_sanity.calls.clear()
+    assert await client.fetch('*[_type == "skill"]') == [{"source": "live"}]
+    assert [host for host, _ in fake_sanity.calls] == ["live"], "Open circuit should skip the CDN"
+
+
+@pytest.mark.asyncio
+async def test_bad_request_is_not_retried_elsewhere(fake_sanity, client):
+    """
+    Verify that a 4xx query error is raised without failover or tripping the breaker.
+    """
+    fake_sanity.statuses["cdn"] = 400
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await client.fetch('*[_type == "skill"')
+
+    assert [host for host, _ in fake_sanity.calls] == ["cdn"]
+    assert client.cdn.breaker.failures == 0
+
+
+@pytest.mark.asyncio
+async def test_expired_cache_is_served_while_sanity_is_down(monkeypatch, fake_sanity, client):
+    """
+    Verify that aquery_sanity falls back to an expired cached result when both endpoints fail.
+    """
+    import cache_config
+    import sanity_client
+    from cache_config import QueryResultCache, cache_manager
+
+    cache = QueryResultCache(cache_manager)
+    monkeypatch.setattr(sanity_client, "query_cache", cache)
+    monkeypatch.setattr(sanity_client, "sanity", client)
+    monkeypatch.setattr(sanity_client.document_store, "serving", False)
+    query = '*[_type == "skill"]'
+
+    assert await sanity_client.aquery_sanity(query) == [{"source": "cdn"}]
+
+    now = time.time() + 24 * 3600
+    monkeypatch.setattr(cache_config.time, "time", lambda: now)
+    fake_sanity.statuses.update(cdn=503, live=503)
+
+    assert await sanity_client.aquery_sanity(query) == [{"source": "cdn"}]
+    assert cache.stats.fallbacks == 1
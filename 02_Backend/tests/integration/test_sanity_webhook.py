@@ -0,0 +1,122 @@
+"""
+Test to verify that signed Sanity webhooks invalidate cached query results.
+Posts recorded webhook payloads from tests/fixtures/webhooks.
+"""
+import os
+import time
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from cache_config import query_cache
+from sanity_webhook import SIGNATURE_HEADER, sign_payload, verify_signature
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(__file__)), "fixtures", "webhooks")
+SECRET = "test-webhook-secret"
+
+
+def _load(name: str) -> bytes:
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        return f.read()
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, "WEBHOOK_SECRET", SECRET)
+    query_cache.invalidate()
+    return TestClient(main.app)
+
+
+def _post(client, body: bytes, signature: str):
+    return client.post(
+        "/webhooks/sanity",
+        content=body,
+        headers={"content-type": "application/json", SIGNATURE_HEADER: signature},
+    )
+
+
+def test_signature_verification():
+    """
+    Verify signatures are checked against body, secret and timestamp.
+    """
+    body = _load("skill_update.json")
+    header = sign_payload(body, SECRET)
+
+    assert verify_signature(body, header, SECRET)
+    assert not verify_signature(body + b" ", header, SECRET)
+    assert not verify_signature(body, header, "other-secret")
+    assert not verify_signature(body, header, "")
+    stale = sign_payload(body, SECRET, timestamp=int((time.time() - 3600) * 1000))
+    assert not verify_signature(body, stale, SECRET)
+
+
+def test_webhook_rejects_unsigned_requests(client):
+    """
+    Verify that requests without a valid signature are rejected.
+    """
+    response = _post(client, _load("skill_update.json"), "t=1,v1=bogus")
+    assert response.status_code == 401
+
+
+def test_webhook_invalidates_cached_results_by_type(client):
+    """
+    Verify that a skill change drops skill queries but keeps project queries.
+    """
+    skills_key = query_cache.make_key('*[_type == "skill"]')
+    projects_key = query_cache.make_key('*[_type == "project"]')
+    query_cache.store(skills_key, ["React"], {"skill"})
+    query_cache.store(projects_key, ["Portfolio"], {"project"})
+
+    body = _load("skill_update.json")
+    response = _post(client, body, sign_payload(body, SECRET))
+
+    assert response.status_code == 200
+    assert response.json()["invalidated"] == [{"_type": "skill", "_id": "skill-react"}]
+    assert query_cache.lookup(skills_key)[0] is None
+    assert query_cache.lookup(projects_key)[0] is not None
+
+
+def test_webhook_ignores_drafts(client):
+    """
+    Verify that draft edits do not invalidate published data.
+    """
+    key = query_cache.make_key('*[_type == "project"]')
+    query_cache.store(key, ["Portfolio"], {"project"})
+
+    body = _load("draft_update.json")
+    response = _post(client, body, sign_payload(body, SECRET))
+
+    assert response.status_code == 200
+    assert response.json()["invalidated"] == []
+    assert query_cache.lookup(key)[0] is not None
+
+
+def test_webhook_refreshes_loaded_mirror(client, monkeypatch):
+    """
+    Verify that after a webhook, queries answered from a loaded mirror return the edited document.
+    """
+    import sanity_client
+    import sanity_webhook
+    from document_store import DocumentStore, DEFAULT_EXPORT_PATH
+    from query_registry import queries
+
+    store = DocumentStore()
+    store.load(DEFAULT_EXPORT_PATH)
+    store.serving = True
+    monkeypatch.setattr(sanity_client, "document_store", store)
+    monkeypatch.setattr(sanity_webhook, "document_store", store)
+
+    class FakeSanity:
+        async def fetch(self, query, params=None, use_cdn=True):
+            assert use_cdn is False, "The mirror is refreshed from the live API"
+            return {**store.get(params["id"]), "name": "React 19"}
+
+    monkeypatch.setattr(sanity_webhook, "sanity", FakeSanity())
+    names = lambda: [skill["name"] for skill in sanity_client.query_sanity(queries["skills.all"])]
+    assert "React" in names()
+
+    body = _load("skill_update.json")
+    response = _post(client, body, sign_payload(body, SECRET))
+
+    assert response.status_code == 200
+    assert "React 19" in names() and "React" not in names()
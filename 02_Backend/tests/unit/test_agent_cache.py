@@ -0,0 +1,123 @@
+"""
+Test to verify that portfolio agents are cached per personality and rebuilt off the request path.
+"""
+import asyncio
+
+import pytest
+
+from invalidation import ContentChange
+
+
+@pytest.fixture
+def profile(monkeypatch):
+    """Serve a controllable profile and bundle version to the agent cache."""
+    import agent
+    import tools
+
+    state = {"profile": "Jane Doe, engineer", "version": "v1", "fetches": 0}
+
+    async def fake_fetch_profile():
+        state["fetches"] += 1
+        return state["profile"]
+
+    class FakeBundle:
+        @property
+        def version(self):
+            return state["version"]
+
+    class FakeBundleCache:
+        current = FakeBundle()
+
+    monkeypatch.setattr(tools, "fetch_profile", fake_fetch_profile)
+    monkeypatch.setattr(agent, "portfolio_bundle", FakeBundleCache())
+    return state
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_agent_is_reused_across_turns(profile):
+    """
+    Verify that a warm cache returns the same agent without fetching the profile.
+    """
+    from agent import PortfolioAgentCache
+
+    cache = PortfolioAgentCache()
+    first = await cache.get("crisp")
+    assert profile["fetches"] == 1 and "Jane Doe, engineer" in first.instructions
+
+    assert await cache.get("crisp") is first
+    assert await cache.get("crisp") is first
+    await _settle()
+    assert profile["fetches"] == 1 and cache.builds == 1 and cache.hits == 2
+    assert await cache.get("unknown") is await cache.get("clear"), "Unknown personalities share 'clear'"
+
+
+@pytest.mark.asyncio
+async def test_profile_change_rebuilds_in_background(profile):
+    """
+    Verify that a new bundle version serves the old agent once while a
+    replacement is built, and that unchanged instructions keep the agent.
+    """
+    from agent import PortfolioAgentCache
+
+    cache = PortfolioAgentCache()
+    old = await cache.get("clear")
+
+    profile["version"] = "v2"
+    assert await cache.get("clear") is old, "The request path never waits for a rebuild"
+    await _settle()
+    assert await cache.get("clear") is old and cache.builds == 1, "Same profile text keeps the agent"
+
+    profile["version"], profile["profile"] = "v3", "Jane Doe, staff engineer"
+    assert await cache.get("clear") is old
+    await _settle()
+    new = await cache.get("clear")
+    assert new is not old and "staff engineer" in new.instructions
+    assert cache.builds == 2
+
+
+@pytest.mark.asyncio
+async def test_published_profile_change_triggers_rebuild(profile):
+    """
+    Verify that a published profile change rebuilds cached agents while other types are ignored.
+    """
+    from agent import PortfolioAgentCache
+
+    cache = PortfolioAgentCache()
+    await cache.warm()
+    assert cache.builds == 3
+    fetches = profile["fetches"]
+
+    cache.on_content_change(ContentChange("project", "p-1", 1, "test", 0.0))
+    await _settle()
+    assert profile["fetches"] == fetches
+
+    profile["profile"] = "Jane Doe, principal engineer"
+    cache.on_content_change(ContentChange("profile", "profile-1", 2, "test", 0.0))
+    await _settle()
+    assert profile["fetches"] == fetches + 3
+    assert "principal engineer" in (await cache.get("chatty")).instructions
+
+
+@pytest.mark.asyncio
+async def test_current_waits_for_the_rebuild(profile):
+    """
+    Verify that current() returns the agent for the changed profile, waiting
+    for the rebuild that get() leaves running in the background.
+    """
+    from agent import PortfolioAgentCache
+
+    cache = PortfolioAgentCache()
+    old = await cache.get("clear")
+
+    profile["profile"] = "Jane Doe, staff engineer"
+    cache.on_content_change(ContentChange("profile", "profile-1", 1, "test", 0.0))
+    assert await cache.get("clear") is old
+
+    new = await cache.current("clear")
+    assert new is not old and "staff engineer" in new.instructions
+    assert await cache.current("clear") is new and cache.builds == 2
@@ -0,0 +1,73 @@
+"""
+Test to verify the local document mirror loads NDJSON exports and keeps its indexes consistent.
+"""
+import io
+import json
+import tarfile
+import pytest
+
+from document_store import DocumentStore, DEFAULT_EXPORT_PATH
+
+
+@pytest.fixture(scope="module")
+def store():
+    s = DocumentStore()
+    s.load(DEFAULT_EXPORT_PATH)
+    return s
+
+
+def test_loads_shipped_dataset(store):
+    """
+    Verify that the NDJSON files in 01_Frontend/Data are indexed by type and id.
+    """
+    assert store.is_loaded
+    assert len(store.documents("skill")) == 38
+    assert store.get("singleton-profile")["_type"] == "profile"
+    assert not store.dangling_references()
+
+
+def test_references_are_resolved(store):
+    """
+    Verify that references resolve to documents and reverse dependencies are known.
+    """
+    project = store.get("proj-1")
+    technologies = [store.deref(ref)["name"] for ref in project["technologies"]]
+
+    assert "React" in technologies
+    assert "proj-1" in store.dependents("skill-react")
+
+
+def test_upsert_and_delete_keep_indexes_consistent(tmp_path):
+    """
+    Verify incremental updates maintain the type, id and reference indexes.
+    """
+    path = tmp_path / "data.ndjson"
+    path.write_text("\n".join(json.dumps(d) for d in [
+        {"_id": "skill-a", "_type": "skill", "name": "A"},
+        {"_id": "proj-1", "_type": "project", "technologies": [{"_ref": "skill-a"}]},
+    ]))
+    s = DocumentStore()
+    assert s.load(str(path)) == 2
+
+    s.upsert({"_id": "proj-1", "_type": "project", "technologies": []})
+    assert s.dependents("skill-a") == set()
+
+    s.delete("skill-a")
+    assert s.documents("skill") == []
+    assert s.get("skill-a") is None
+
+
+def test_loads_dataset_export_tarball(tmp_path):
+    """
+    Verify that `sanity dataset export` tarballs are supported.
+    """
+    data = json.dumps({"_id": "skill-a", "_type": "skill", "name": "A"}).encode()
+    archive_path = tmp_path / "production.tar.gz"
+    with tarfile.open(archive_path, "w:gz") as archive:
+        info = tarfile.TarInfo("production-export/data.ndjson")
+        info.size = len(data)
+        archive.addfile(info, io.BytesIO(data))
+
+    s = DocumentStore()
+    assert s.load(str(archive_path)) == 1
+    assert s.get("skill-a")["name"] == "A"
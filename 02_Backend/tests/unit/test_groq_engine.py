@@ -0,0 +1,110 @@
+"""
+Test to verify the GROQ subset evaluator against the local document mirror.
+"""
+import pytest
+
+from document_store import DocumentStore, DEFAULT_EXPORT_PATH
+from groq_engine import compile_query, evaluate, GroqUnsupportedError
+
+
+@pytest.fixture(scope="module")
+def store():
+    s = DocumentStore()
+    s.load(DEFAULT_EXPORT_PATH)
+    s.upsert({"_id": "drafts.skill-react", "_type": "skill", "name": "React (draft)", "category": "frontend"})
+    return s
+
+
+def test_type_filter_excludes_drafts_and_orders(store):
+    """
+    Verify `_type` filters, drafts exclusion and multi-key ordering.
+    """
+    skills = evaluate(
+        '*[_type == "skill" && !(_id in path("drafts.**"))] | order(percentage desc, name asc){name, percentage}',
+        store,
+    )
+    assert len(skills) == 38
+    assert "React (draft)" not in [s["name"] for s in skills]
+    percentages = [s["percentage"] for s in skills]
+    assert percentages == sorted(percentages, reverse=True)
+
+
+def test_index_projection_and_dereference(store):
+    """
+    Verify `[0]`, aliases, `->` dereferences and `[]` traversal.
+    """
+    project = evaluate(
+        '*[_type == "project" && featured == true] | order(order asc)[0]'
+        '{title, "technologies": technologies[]->name, "slug": slug.current}',
+        store,
+    )
+    assert project["title"] == "AI-Powered Content Generator"
+    assert project["slug"] == "ai-content-generator"
+    assert project["technologies"][:2] == ["React", "Next.js"]
+
+
+def test_nested_subquery_in_projection(store):
+    """
+    Verify the check_availability shape: a subquery inside a projection.
+    """
+    result = evaluate(
+        '*[_id == "singleton-profile" || (_type == "profile" && !(_id in path("drafts.**")))][0]{'
+        ' availability, "services": *[_type == "service"] | order(order asc){title} }',
+        store,
+    )
+    assert result["availability"] == "open"
+    assert result["services"][0] == {"title": "Full-Stack Web Development"}
+
+
+def test_match_params_and_slices(store):
+    """
+    Verify `match` with prefix wildcards, `$params`, `in` arrays and slices.
+    """
+    jobs = evaluate('*[_type == "experience" && company match $q]{company}', store, {"q": "tech*"})
+    assert {"company": "TechCorp Global"} in jobs
+
+    top = evaluate('*[_type == "skill" && category in ["backend", "database"]] | order(percentage desc)[0..2]{name}', store)
+    assert len(top) == 3
+
+    with_color = [d for d in store.documents("skill") if d.get("color") is not None]
+    assert evaluate('count(*[_type == "skill" && defined(color)])', store) == len(with_color)
+
+
+def test_plans_are_compiled_once():
+    """
+    Verify that formatting-only differences reuse the same compiled plan.
+    """
+    a = compile_query('*[_type == "skill"] { name }')
+    b = compile_query('*[_type == "skill"]\n    {\n        name }\n')
+    assert a is b
+
+
+def test_unsupported_syntax_raises():
+    """
+    Verify that unsupported GROQ is rejected so callers can fall back to HTTP.
+    """
+    with pytest.raises(GroqUnsupportedError):
+        compile_query('*[_type == "skill"] | score(name match "react")')
+    with pytest.raises(GroqUnsupportedError):
+        compile_query('*[_type == "skill"]{name} + 1 |')
+
+
+@pytest.mark.asyncio
+async def test_tools_serve_from_mirror_without_network(monkeypatch, store, invoke_tool):
+    """
+    Verify that tools are answered from the mirror with zero HTTP requests.
+    """
+    import sanity_client
+    import tools
+
+    async def no_network(*args, **kwargs):
+        raise AssertionError("Tools must not hit the network when serving from the mirror")
+
+    monkeypatch.setattr(sanity_client, "document_store", store)
+    monkeypatch.setattr(store, "serving", True)
+    monkeypatch.setattr(sanity_client.sanity, "fetch", no_network)
+
+    assert "John Doe" in await tools.fetch_profile()
+    assert "Skills (" in await invoke_tool(tools.get_skills, category="frontend")
+    assert "TechCorp Global" in await invoke_tool(tools.search_experience, query_param="TechCorp")
+    assert "Full-Stack Web Development" in await invoke_tool(tools.check_availability)
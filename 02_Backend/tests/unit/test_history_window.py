@@ -0,0 +1,115 @@
+"""
+Test to verify the token-budgeted conversation history window.
+"""
+from datetime import datetime
+
+import pytest
+from chatkit.agents import simple_to_agent_input
+from chatkit.types import (
+    AssistantMessageContent,
+    AssistantMessageItem,
+    ClientToolCallItem,
+    HiddenContextItem,
+    InferenceOptions,
+    UserMessageItem,
+    UserMessageTextContent,
+)
+
+import history_window
+from history_window import ELIDED_OUTPUT, build_history, item_tokens
+from memory_store import MemoryStore
+
+NOW = datetime(2026, 1, 1)
+
+
+def user(item_id, text):
+    return UserMessageItem(id=item_id, thread_id="t", created_at=NOW, inference_options=InferenceOptions(),
+                           content=[UserMessageTextContent(text=text)])
+
+
+def assistant(item_id, text):
+    return AssistantMessageItem(id=item_id, thread_id="t", created_at=NOW,
+                                content=[AssistantMessageContent(text=text)])
+
+
+def tool_call(item_id, output):
+    return ClientToolCallItem(id=item_id, thread_id="t", created_at=NOW, status="completed",
+                              call_id=f"call_{item_id}", name="get_projects", arguments={}, output=output)
+
+
+def conversation():
+    return [
+        user("u1", "What projects have you built?"),
+        tool_call("c1", "Project details " * 200),
+        assistant("a1", "I built an e-commerce platform and a healthcare system."),
+        HiddenContextItem(id="h1", thread_id="t", created_at=NOW, content="context " * 100),
+        user("u2", "Tell me more about the healthcare one."),
+        assistant("a2", "It is a HIPAA-compliant appointment system. " * 5),
+        user("u3", "Which stack did it use?"),
+    ]
+
+
+def test_everything_fits_within_budget():
+    """
+    Verify that a conversation under budget is passed through untouched.
+    """
+    items = conversation()
+    window = build_history(items, budget=10_000)
+
+    assert window.items == items
+    assert window.tokens == window.total_tokens == sum(item_tokens(item) for item in items)
+    assert window.dropped == window.elided == 0
+
+
+def test_old_tool_outputs_go_first():
+    """
+    Verify that old tool outputs are elided and hidden items dropped before any message.
+    """
+    items = conversation()
+    messages = sum(item_tokens(item) for item in items if item.type in ("user_message", "assistant_message"))
+    window = build_history(items, budget=messages + 40)
+
+    assert [item.id for item in window.items] == ["u1", "c1", "a1", "u2", "a2", "u3"]
+    assert window.items[1].output == ELIDED_OUTPUT and items[1].output != ELIDED_OUTPUT
+    assert window.elided == 1 and window.dropped == 1
+    assert window.tokens <= messages + 40 < window.total_tokens
+
+
+@pytest.mark.asyncio
+async def test_oldest_turns_dropped_and_current_turn_kept():
+    """
+    Verify that a tight budget drops whole old turns, starts on a user message
+    and always keeps the newest user message.
+    """
+    items = conversation()
+    window = build_history(items, budget=item_tokens(items[-1]) + item_tokens(items[-2]) + item_tokens(items[-3]))
+
+    assert [item.id for item in window.items] == ["u2", "a2", "u3"]
+
+    window = build_history(items, budget=1)
+    assert [item.id for item in window.items] == ["u3"]
+
+    agent_input = await simple_to_agent_input(window.items)
+    assert agent_input[-1]["role"] == "user"
+
+
+@pytest.mark.asyncio
+async def test_token_counts_are_cached_on_the_store(monkeypatch):
+    """
+    Verify that each stored item is tokenized once across turns and recounted after it changes.
+    """
+    calls = []
+    monkeypatch.setattr(history_window, "count_tokens", lambda text: calls.append(text) or len(text) // 4)
+
+    store = MemoryStore()
+    for item in conversation():
+        await store.add_thread_item("t", item, {})
+
+    build_history(store.items["t"], store.token_counts("t"), budget=10_000)
+    assert len(calls) == 7
+    window = build_history(store.items["t"], store.token_counts("t"), budget=10_000)
+    assert len(calls) == 7 and window.counted == 0
+
+    await store.save_item("t", assistant("a2", "Short now."), {})
+    window = build_history(store.items["t"], store.token_counts("t"), budget=10_000)
+    assert len(calls) == 8 and window.counted == 1
@@ -0,0 +1,147 @@
+"""
+Test to verify the multi-key LLM client pool against a local OpenAI-compatible stub.
+"""
+import asyncio
+
+import openai
+import pytest
+
+from llm_pool import KEY_REQUESTS, LLMClientPool, LLMPoolExhausted, configured_api_keys
+
+MESSAGES = [{"role": "user", "content": "Hi"}]
+
+
+def make_pool(fake_llm, keys=("key-a", "key-b"), **kwargs):
+    return LLMClientPool([(key, key) for key in keys], base_url=f"{fake_llm.base_url}/v1", **kwargs)
+
+
+def test_keys_are_read_from_the_environment(monkeypatch):
+    """
+    Verify that keys come from GEMINI_API_KEYS and the numbered variables, skipping placeholders and duplicates.
+    """
+    monkeypatch.setenv("GEMINI_API_KEYS", "k1, k2,")
+    monkeypatch.setenv("GEMINI_API_KEY", "k2")
+    monkeypatch.setenv("GEMINI_API_KEY_2", "YOUR_GEMINI_KEY")
+    monkeypatch.setenv("GEMINI_API_KEY_3", "k3")
+
+    assert configured_api_keys() == [("GEMINI_API_KEYS[1]", "k1"), ("GEMINI_API_KEYS[2]", "k2"),
+                                     ("GEMINI_API_KEY_3", "k3")]
+
+
+@pytest.mark.asyncio
+async def test_requests_spread_over_least_loaded_keys(fake_llm):
+    """
+    Verify that concurrent requests are spread evenly across keys by the number in flight.
+    """
+    fake_llm.delays = {"key-a": 0.2, "key-b": 0.2}
+    pool = make_pool(fake_llm)
+
+    results = await asyncio.gather(
+        *(pool.chat.completions.create(model="stub", messages=MESSAGES) for _ in range(4))
+    )
+
+    assert all(result.choices[0].message.content == fake_llm.reply for result in results)
+    assert fake_llm.peak_in_flight == {"key-a": 2, "key-b": 2}
+    assert all(status["in_flight"] == 0 for status in pool.status().values())
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_key_fails_over_and_cools_down(fake_llm):
+    """
+    Verify that a 429 is retried on another key without surfacing to the
+    caller, and the limited key is skipped until its Retry-After passes.
+    """
+    fake_llm.statuses["key-a"] = 429
+    fake_llm.retry_after["key-a"] = 30
+    pool = make_pool(fake_llm)
+    limited_before = KEY_REQUESTS.value(key="key-a", outcome="rate_limited")
+
+    for _ in range(3):
+        result = await pool.chat.completions.create(model="stub", messages=MESSAGES)
+        assert result.choices[0].message.content == fake_llm.reply
+
+    assert [key for key, _ in fake_llm.calls] == ["key-a", "key-b", "key-b", "key-b"]
+    assert pool.status()["key-a"]["cooling_down_for"] > 25
+    assert KEY_REQUESTS.value(key="key-a", outcome="rate_limited") == limited_before + 1
+
+
+@pytest.mark.asyncio
+async def test_errors_surface_when_every_key_fails(fake_llm):
+    """
+    Verify that the last provider error is raised once every key has
+    failed, and that client errors are not retried on other keys.
+    """
+    fake_llm.statuses = {"key-a": 503, "key-b": 503}
+    pool = make_pool(fake_llm, acquire_timeout=0.2)
+    with pytest.raises(openai.InternalServerError):
+        await pool.chat.completions.create(model="stub", messages=MESSAGES)
+    assert sorted(key for key, _ in fake_llm.calls) == ["key-a", "key-b"]
+
+    fake_llm.calls.clear()
+    fake_llm.statuses = {"key-a": 400, "key-b": 400}
+    pool = make_pool(fake_llm)
+    with pytest.raises(openai.BadRequestError):
+        await pool.chat.completions.create(model="stub", messages=MESSAGES)
+    assert len(fake_llm.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_per_key_concurrency_limit(fake_llm):
+    """
+    Verify that a key never exceeds its concurrency limit: extra requests
+    wait for a slot (woken by releases, without spawning tasks), and give
+    up after the acquire timeout.
+    """
+    fake_llm.delays["key-a"] = 0.2
+    pool = make_pool(fake_llm, keys=("key-a",), max_in_flight=2)
+
+    await asyncio.gather(*(pool.chat.completions.create(model="stub", messages=MESSAGES) for _ in range(5)))
+    assert fake_llm.peak_in_flight["key-a"] == 2
+    assert asyncio.all_tasks() == {asyncio.current_task()}
+
+    pool = make_pool(fake_llm, keys=("key-a",), max_in_flight=1, acquire_timeout=0.05)
+    results = await asyncio.gather(
+        *(pool.chat.completions.create(model="stub", messages=MESSAGES) for _ in range(2)), return_exceptions=True
+    )
+    assert sum(isinstance(result, LLMPoolExhausted) for result in results) == 1
+
+
+@pytest.mark.asyncio
+async def test_stream_holds_its_key_until_consumed(fake_llm):
+    """
+    Verify that a streamed completion keeps its key in flight until the
+    stream is read to the end or closed early.
+    """
+    pool = make_pool(fake_llm, keys=("key-a",))
+
+    stream = await pool.chat.completions.create(model="stub", messages=MESSAGES, stream=True)
+    assert pool.status()["key-a"]["in_flight"] == 1
+    assert stream.response.headers.get("content-type", "").startswith("text/event-stream")
+    text = "".join([chunk.choices[0].delta.content or "" async for chunk in stream])
+    assert text == fake_llm.reply
+    assert pool.status()["key-a"]["in_flight"] == 0
+
+    stream = await pool.chat.completions.create(model="stub", messages=MESSAGES, stream=True)
+    await stream.aclose()
+    assert pool.status()["key-a"]["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_agent_model_runs_through_the_pool(fake_llm):
+    """
+    Verify that the agent's chat completions model accepts the pool in place of an AsyncOpenAI client.
+    """
+    from agents import Agent, OpenAIChatCompletionsModel, Runner
+
+    fake_llm.statuses["key-a"] = 429
+    pool = make_pool(fake_llm)
+    agent = Agent(name="Stub", instructions="Be brief.",
+                  model=OpenAIChatCompletionsModel(model="stub", openai_client=pool))
+
+    result = Runner.run_streamed(agent, "Hi")
+    async for _ in result.stream_events():
+        pass
+
+    assert result.final_output == fake_llm.reply
+    assert [key for key, stream in fake_llm.calls] == ["key-a", "key-b"]
+    assert pool.status()["key-b"]["in_flight"] == 0
@@ -0,0 +1,89 @@
+"""
+Test to verify the metrics registry, its instrumentation and the /metrics endpoint.
+"""
+import pytest
+
+from document_store import DocumentStore, DEFAULT_EXPORT_PATH
+from metrics import MetricsRegistry
+
+
+def _sample(text, line_start):
+    return next(float(line.rsplit(" ", 1)[1]) for line in text.splitlines() if line.startswith(line_start))
+
+
+def test_text_exposition_format():
+    """
+    Verify counters, gauges and cumulative histogram buckets in Prometheus text format.
+    """
+    registry = MetricsRegistry()
+    calls = registry.counter("calls_total", "Calls", ("tool",))
+    latency = registry.histogram("latency_seconds", "Latency", ("tool",), buckets=(0.1, 1.0))
+    registry.callback("ratio", "Ratio", "gauge", lambda: {(): 0.5})
+
+    calls.inc(tool='say "hi"\n')
+    calls.inc(2, tool="get_skills")
+    for value in (0.05, 0.5, 0.7, 3.0):
+        latency.observe(value, tool="get_skills")
+
+    text = registry.render()
+    assert "# TYPE calls_total counter" in text
+    assert 'calls_total{tool="say \\"hi\\"\\n"} 1' in text
+    assert 'calls_total{tool="get_skills"} 2' in text
+    assert 'latency_seconds_bucket{tool="get_skills",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{tool="get_skills",le="1"} 3' in text
+    assert 'latency_seconds_bucket{tool="get_skills",le="+Inf"} 4' in text
+    assert 'latency_seconds_count{tool="get_skills"} 4' in text
+    assert _sample(text, 'latency_seconds_sum{tool="get_skills"}') == pytest.approx(4.25)
+    assert "# TYPE ratio gauge\nratio 0.5" in text
+
+    with pytest.raises(ValueError):
+        calls.inc(category="frontend")
+    assert registry.counter("calls_total", "Calls", ("tool",)) is calls
+    with pytest.raises(ValueError):
+        registry.histogram("calls_total", "Calls", ("tool",))
+
+
+@pytest.mark.asyncio
+async def test_queries_and_tool_outputs_are_instrumented(monkeypatch, invoke_tool):
+    """
+    Verify that Sanity queries are timed by source and tool outputs by token count.
+    """
+    import sanity_client
+    import tools
+    from metrics import metrics
+
+    class NoBundle:
+        async def get(self):
+            return None
+
+    store = DocumentStore()
+    store.load(DEFAULT_EXPORT_PATH)
+    store.serving = True
+    monkeypatch.setattr(sanity_client, "document_store", store)
+    monkeypatch.setattr(tools, "portfolio_bundle", NoBundle())
+
+    queries_before = sanity_client.QUERY_SECONDS.count(source="mirror")
+    tokens = metrics.get("tool_output_tokens")
+    outputs_before = tokens.count(tool="get_skills")
+
+    await invoke_tool(tools.get_skills, category="frontend")
+
+    assert sanity_client.QUERY_SECONDS.count(source="mirror") == queries_before + 1
+    assert tokens.count(tool="get_skills") == outputs_before + 1
+
+
+def test_metrics_endpoint_serves_text_format():
+    """
+    Verify that /metrics serves every registered metric as text exposition.
+    """
+    from fastapi.testclient import TestClient
+    from main import app
+
+    response = TestClient(app).get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    for name in ["sanity_query_seconds", "sanity_request_seconds", "sanity_cache_hit_ratio", "tool_call_seconds",
+                 "tool_output_tokens", "agent_build_seconds", "chat_time_to_first_token_seconds", "chat_turn_events"]:
+        assert f"# TYPE {name} " in response.text
+
@@ -0,0 +1,189 @@
+"""
+Test to verify the per-turn portfolio bundle and its memoized tool outputs.
+"""
+import json
+
+import pytest
+
+from document_store import DocumentStore, DEFAULT_EXPORT_PATH
+from groq_engine import evaluate
+from portfolio_bundle import BUNDLE_QUERY, PortfolioBundle, PortfolioBundleCache
+
+
+@pytest.fixture(scope="module")
+def bundle_data():
+    store = DocumentStore()
+    store.load(DEFAULT_EXPORT_PATH)
+    return evaluate(BUNDLE_QUERY.text, store)
+
+
+@pytest.fixture
+def counted_bundle(monkeypatch, bundle_data):
+    """Route tools through a fresh bundle cache and count Sanity round trips."""
+    import sanity_client
+    import tools
+    from cache_config import QueryResultCache, cache_manager
+
+    calls = []
+
+    async def fake_fetch(query, params=None, use_cdn=True):
+        calls.append(query)
+        return bundle_data
+
+    async def no_tool_queries(*args, **kwargs):
+        raise AssertionError("Tools must read from the bundle instead of querying Sanity")
+
+    cache = PortfolioBundleCache()
+    monkeypatch.setattr(sanity_client, "query_cache", QueryResultCache(cache_manager))
+    monkeypatch.setattr(sanity_client.document_store, "serving", False)
+    monkeypatch.setattr(sanity_client.sanity, "fetch", fake_fetch)
+    monkeypatch.setattr(tools, "portfolio_bundle", cache)
+    monkeypatch.setattr(tools, "aquery_sanity", no_tool_queries)
+    return calls, cache
+
+
+@pytest.mark.asyncio
+async def test_turn_with_all_tools_issues_one_query(counted_bundle, invoke_tool):
+    """
+    Verify that priming plus all five tools cost a single Sanity round trip.
+    """
+    import tools
+
+    calls, cache = counted_bundle
+    await cache.prefetch()
+
+    assert "John Doe" in await tools.fetch_profile()
+    assert "John Doe" in await invoke_tool(tools.get_profile)
+    assert "Skills (" in await invoke_tool(tools.get_skills, category="frontend")
+    assert "Projects (" in await invoke_tool(tools.get_projects, featured_only=True)
+    assert "TechCorp Global" in await invoke_tool(tools.search_experience, query_param="TechCorp")
+    assert "Full-Stack Web Development" in await invoke_tool(tools.check_availability)
+
+    assert calls == [BUNDLE_QUERY.text]
+
+
+def test_bundle_slices_match_per_tool_filters(bundle_data):
+    """
+    Verify that bundle slices reproduce the filters of the per-tool queries.
+    """
+    bundle = PortfolioBundle(bundle_data)
+
+    assert {s["category"] for s in bundle.skills("frontend")} == {"frontend"}
+    assert len(bundle.skills()) == 38
+    assert all(p["featured"] is True for p in bundle.projects(featured_only=True))
+    assert len(bundle.projects(featured_only=True)) < len(bundle.projects())
+    assert [job["company"] for job in bundle.experience("TechCorp")] == ["TechCorp Global"]
+    assert bundle.experience("senior")  # prefix match on position, case-insensitive
+    assert bundle.availability["availability"] == "open"
+
+
+@pytest.mark.asyncio
+async def test_version_changes_only_with_content(monkeypatch, bundle_data):
+    """
+    Verify that the bundle version is stable for identical content and changes with it.
+    """
+    import portfolio_bundle
+
+    current = {"data": bundle_data}
+
+    async def fake_query(query, params=None, use_cdn=True):
+        return current["data"]
+
+    monkeypatch.setattr(portfolio_bundle, "aquery_sanity", fake_query)
+    cache = PortfolioBundleCache()
+
+    first = await cache.get()
+    assert await cache.get() is first
+
+    current["data"] = dict(bundle_data)
+    assert (await cache.get()).version == first.version
+
+    current["data"] = {**bundle_data, "skills": bundle_data["skills"][:1]}
+    assert (await cache.get()).version != first.version
+
+
+@pytest.mark.asyncio
+async def test_tools_fall_back_when_bundle_unavailable(monkeypatch, invoke_tool):
+    """
+    Verify that tools issue their own query when the bundle cannot be fetched.
+    """
+    import portfolio_bundle
+    import tools
+
+    async def unavailable(query, params=None, use_cdn=True):
+        return []
+
+    async def fake_query(query, params=None, use_cdn=True):
+        return [{"name": "Python", "category": "backend", "proficiency": "advanced",
+                 "percentage": 87, "yearsOfExperience": 5}]
+
+    monkeypatch.setattr(portfolio_bundle, "aquery_sanity", unavailable)
+    monkeypatch.setattr(tools, "portfolio_bundle", PortfolioBundleCache())
+    monkeypatch.setattr(tools, "aquery_sanity", fake_query)
+
+    assert "Python (backend)" in await invoke_tool(tools.get_skills)
+
+
+@pytest.mark.asyncio
+async def test_prefetch_is_tracked_until_done(monkeypatch):
+    """
+    Verify that a prefetch task is referenced while it runs and a failed fetch is retrieved, not left unobserved.
+    """
+    import asyncio
+
+    import portfolio_bundle
+
+    release = asyncio.Event()
+
+    async def failing(query, params=None, use_cdn=True):
+        await release.wait()
+        raise RuntimeError("sanity unreachable")
+
+    monkeypatch.setattr(portfolio_bundle, "aquery_sanity", failing)
+    task = PortfolioBundleCache().prefetch()
+    assert task in portfolio_bundle._prefetches
+
+    release.set()
+    await asyncio.wait([task])
+    assert task not in portfolio_bundle._prefetches
+    assert task._log_traceback is False, "The failure was retrieved by the done callback"
+
+
+@pytest.mark.asyncio
+async def test_rendered_outputs_are_memoized_per_content_version(monkeypatch, bundle_data, invoke_tool):
+    """
+    Verify that tool output is rendered once per argument set and content version.
+    """
+    import portfolio_bundle
+    import tools
+
+    current = {"data": bundle_data}
+    renders = []
+    format_skills = tools._format_skills
+
+    async def fake_query(query, params=None, use_cdn=True):
+        return current["data"]
+
+    def counting_format(skills, category, *paging):
+        renders.append(category)
+        return format_skills(skills, category, *paging)
+
+    monkeypatch.setattr(portfolio_bundle, "aquery_sanity", fake_query)
+    monkeypatch.setattr(tools, "portfolio_bundle", PortfolioBundleCache())
+    monkeypatch.setattr(tools, "_format_skills", counting_format)
+
+    first = await invoke_tool(tools.get_skills, category="frontend")
+    assert await invoke_tool(tools.get_skills, category="frontend") == first
+    await invoke_tool(tools.get_skills)
+    assert renders == ["frontend", None]
+
+    # Refetched with identical content: memo survives
+    current["data"] = json.loads(json.dumps(bundle_data))
+    assert await invoke_tool(tools.get_skills, category="frontend") == first
+    assert renders == ["frontend", None]
+
+    # Content changed: rendered again from the new data
+    skills = [s for s in bundle_data["skills"] if s["category"] != "frontend"]
+    current["data"] = {**bundle_data, "skills": skills + [{"name": "Svelte", "category": "frontend"}]}
+    assert "Svelte" in await invoke_tool(tools.get_skills, category="frontend")
+    assert renders == ["frontend", None, "frontend"]
@@ -0,0 +1,136 @@
+"""
+Test to verify offline pre-generation of starter prompt answers and how the server serves them.
+"""
+import json
+from datetime import datetime
+
+import pytest
+from chatkit.types import (
+    AssistantMessageContent,
+    AssistantMessageItem,
+    InferenceOptions,
+    ThreadItemAddedEvent,
+    ThreadItemDoneEvent,
+    ThreadMetadata,
+    UserMessageItem,
+    UserMessageTextContent,
+)
+
+import pregenerate
+from invalidation import ContentChange
+from pregenerate import ARTIFACT_FORMAT, PregeneratedAnswers, generate, load_artifact, save_artifact
+
+NOW = datetime(2026, 1, 1)
+
+
+class FakeBundle:
+    def __init__(self, version):
+        self.version = version
+
+
+class FakeBundleCache:
+    def __init__(self, version="v1"):
+        self.bundle = FakeBundle(version)
+
+    async def get(self):
+        return self.bundle
+
+    @property
+    def current(self):
+        return self.bundle
+
+
+@pytest.fixture
+def bundle(monkeypatch):
+    cache = FakeBundleCache()
+    monkeypatch.setattr(pregenerate, "portfolio_bundle", cache)
+    return cache
+
+
+def fake_answer(calls):
+    async def answer(prompt, personality):
+        calls.append((prompt, personality))
+        item = AssistantMessageItem(id="msg_pre", thread_id="pregenerate", created_at=NOW,
+                                    content=[AssistantMessageContent(text=f"{personality}: I can answer '{prompt}'")])
+        return [ThreadItemAddedEvent(item=item), ThreadItemDoneEvent(item=item)]
+    return answer
+
+
+@pytest.mark.asyncio
+async def test_artifact_is_versioned_and_round_trips(bundle, tmp_path):
+    """
+    Verify that every prompt is answered per personality and the artifact
+    is stamped with the content version and reloads intact.
+    """
+    calls = []
+    artifact = await generate(["What can you do?", "What's your stack?"], ["crisp", "chatty"], fake_answer(calls))
+
+    assert len(calls) == 4
+    assert artifact["format"] == ARTIFACT_FORMAT and artifact["content_version"] == "v1"
+    assert set(artifact["answers"]["crisp"]) == {"what can you do", "what s your stack"}
+
+    path = tmp_path / "answers.json"
+    save_artifact(artifact, str(path))
+    assert load_artifact(str(path)) == json.loads(json.dumps(artifact))
+    assert load_artifact(str(tmp_path / "missing.json")) is None
+
+    path.write_text(json.dumps({"format": 99}))
+    assert load_artifact(str(path)) is None
+
+
+@pytest.mark.asyncio
+async def test_outdated_artifact_is_regenerated(bundle, tmp_path):
+    """
+    Verify that answers are served only for the content version they were
+    generated from, and that a content change regenerates them in the background.
+    """
+    calls = []
+    path = str(tmp_path / "answers.json")
+    save_artifact(await generate(["What can you do?"], ["clear"], fake_answer(calls)), path)
+
+    answers = PregeneratedAnswers(path, fake_answer(calls), ["What can you do?"], regenerate_delay=0)
+    assert answers.load()
+    events = answers.lookup("what can you do", "clear")
+    assert events[-1]["item"]["content"][0]["text"] == "clear: I can answer 'What can you do?'"
+    assert answers.lookup("what can you do", "crisp") is None
+    assert answers.lookup("hello", "clear") is None
+
+    bundle.bundle = FakeBundle("v2")
+    assert answers.lookup("what can you do", "clear") is None, "Outdated answers are never served"
+    await answers._task
+    assert answers.version == "v2" and load_artifact(path)["content_version"] == "v2"
+    assert answers.lookup("what can you do", "clear") is not None
+
+    answers.on_content_change(ContentChange("project", "p-1", 3, "test", 0.0))
+    assert answers._task is not None and not answers._task.done()
+    await answers._task
+    assert len(calls) == 7, "One initial run, then two regenerations of three personalities"
+
+
+@pytest.mark.asyncio
+async def test_server_replays_pregenerated_answer(monkeypatch, bundle, tmp_path):
+    """
+    Verify that a starter prompt opening a thread is streamed from the artifact without running the agent.
+    """
+    import server
+
+    runs = []
+    path = str(tmp_path / "answers.json")
+    save_artifact(await generate(["What can you do?"], ["clear"], fake_answer([])), path)
+    answers = PregeneratedAnswers(path, fake_answer([]), regenerate_on_change=False)
+    answers.load()
+
+    monkeypatch.setattr(server, "pregenerated_answers", answers)
+    monkeypatch.setattr(server.Runner, "run_streamed", lambda *args, **kwargs: runs.append(args))
+
+    chat = server.PortfolioChatServer()
+    thread = ThreadMetadata(id="thr_1", created_at=NOW, metadata={"personality": "clear"})
+    user_item = UserMessageItem(id="u1", thread_id="thr_1", created_at=NOW, inference_options=InferenceOptions(),
+                                content=[UserMessageTextContent(text="What can you do?")])
+    await chat.store.add_thread_item("thr_1", user_item, {})
+
+    events = [event async for event in chat.respond(thread, user_item, {})]
+
+    assert runs == []
+    assert [event.type for event in events] == ["thread.item.added", "thread.item.done"]
+    assert events[-1].item.thread_id == "thr_1" and events[-1].item.id != "msg_pre"
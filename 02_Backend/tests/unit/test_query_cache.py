@@ -0,0 +1,162 @@
+"""
+Test to verify the GROQ result cache (TTL, LRU bound and stale-while-revalidate).
+"""
+import asyncio
+import pytest
+
+import cache_config
+from cache_config import (
+    QueryResultCache, SanityCacheManager, normalize_query, extract_doc_types,
+    FRESH, STALE, MISS,
+)
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(cache_config.time, "time", fake)
+    return fake
+
+
+def test_cache_key_ignores_formatting_but_not_literals():
+    """
+    Verify that whitespace outside string literals does not change the key.
+    """
+    a = QueryResultCache.make_key('*[_type == "skill"]  | order(percentage desc)')
+    b = QueryResultCache.make_key('*[_type == "skill"]\n    | order(percentage desc)\n')
+    c = QueryResultCache.make_key('*[_type == "skill"] | order(percentage desc)', use_cdn=False)
+
+    assert a == b
+    assert a != c
+    assert normalize_query('*[name == "a  b"]') == '*[name == "a  b"]'
+    assert extract_doc_types('*[_type == "profile"]{ "s": *[_type == "service"] }') == {"profile", "service"}
+
+
+def test_entries_go_stale_then_expire(clock):
+    """
+    Verify that entries are fresh for their type TTL, then stale, then missing.
+    """
+    manager = SanityCacheManager()
+    cache = QueryResultCache(manager)
+    ttl = manager.get_ttl({"skill"})
+
+    cache.store("k", ["React"], {"skill"})
+    assert cache.lookup("k")[1] == FRESH
+
+    clock.now += ttl + 1
+    entry, state = cache.lookup("k")
+    assert state == STALE and entry.value == ["React"]
+
+    clock.now += manager.get_stale_window(ttl)
+    assert cache.lookup("k") == (None, MISS)
+    assert cache.stats.as_dict()["hits"] == 1
+    assert cache.stats.as_dict()["stale_hits"] == 1
+
+
+def test_lru_bound_and_type_invalidation(clock):
+    """
+    Verify LRU eviction and invalidation by document type.
+    """
+    cache = QueryResultCache(SanityCacheManager(), max_entries=2)
+    cache.store("skills", [1], {"skill"})
+    cache.store("projects", [2], {"project"})
+    cache.lookup("skills")  # touch so "projects" becomes least recently used
+    cache.store("profile", [3], {"profile"})
+
+    assert cache.lookup("projects")[1] == MISS
+    assert cache.stats.evictions == 1
+
+    assert cache.invalidate("skill") == 1
+    assert cache.lookup("skills")[1] == MISS
+    assert cache.lookup("profile")[1] == FRESH
+
+
+def test_dereferenced_types_invalidate_results(clock):
+    """
+    Verify that a query dereferencing skills depends on the skill type, so a skill rename drops its results.
+    """
+    from query_registry import queries
+
+    projects = '*[_type == "project"]{ title, "technologies": technologies[]->name }'
+    assert extract_doc_types(projects) == {"project", "skill"}
+    assert extract_doc_types('*[_type == "project" && note == "technologies[]->name"]') == {"project"}
+    assert "skill" in queries["experience.all"].doc_types
+
+    cache = QueryResultCache(SanityCacheManager())
+    cache.store("projects", [1], extract_doc_types(projects))
+    assert cache.invalidate("skill") == 1
+
+
+@pytest.mark.asyncio
+async def test_aquery_sanity_serves_stale_and_revalidates(monkeypatch, clock):
+    """
+    Verify that a stale hit returns immediately and refreshes in the background.
+    """
+    import sanity_client
+
+    monkeypatch.setattr(sanity_client, "query_cache", QueryResultCache(SanityCacheManager()))
+    versions = iter([["v1"], ["v2"]])
+    calls = []
+
+    async def fake_fetch(query, params=None, use_cdn=True):
+        calls.append(query)
+        return next(versions)
+
+    monkeypatch.setattr(sanity_client.sanity, "fetch", fake_fetch)
+    query = '*[_type == "skill"]'
+
+    assert await sanity_client.aquery_sanity(query) == ["v1"]
+    assert await sanity_client.aquery_sanity(query) == ["v1"]
+    assert len(calls) == 1, "Second call should be a cache hit"
+
+    cache = sanity_client.query_cache
+    clock.now += cache.manager.get_ttl({"skill"}) + 1
+
+    assert await sanity_client.aquery_sanity(query) == ["v1"], "Stale value is served immediately"
+    await asyncio.sleep(0)
+    await asyncio.gather(*sanity_client._background_tasks)
+
+    assert await sanity_client.aquery_sanity(query) == ["v2"]
+    assert cache.stats.refreshes == 1
+
+
+@pytest.mark.asyncio
+async def test_fetch_in_flight_across_a_change_is_not_cached(monkeypatch, clock):
+    """
+    Verify that a result fetched while content changed is returned but not
+    cached, so the next query refetches instead of serving pre-change data.
+    """
+    import sanity_client
+    from invalidation import InvalidationBus
+
+    bus = InvalidationBus()
+    monkeypatch.setattr(sanity_client, "content_changes", bus)
+    monkeypatch.setattr(sanity_client, "query_cache", QueryResultCache(SanityCacheManager()))
+    versions = iter([["old"], ["new"]])
+    in_flight, release = asyncio.Event(), asyncio.Event()
+
+    async def slow_fetch(query, params=None, use_cdn=True):
+        in_flight.set()
+        await release.wait()
+        return next(versions)
+
+    monkeypatch.setattr(sanity_client.sanity, "fetch", slow_fetch)
+    query = '*[_type == "skill"]'
+
+    pending = asyncio.create_task(sanity_client.aquery_sanity(query))
+    await in_flight.wait()
+    bus.publish("skill", "skill-react", source="test")
+    release.set()
+
+    assert await pending == ["old"]
+    assert len(sanity_client.query_cache) == 0
+    assert await sanity_client.aquery_sanity(query) == ["new"]
+    assert len(sanity_client.query_cache) == 1
@@ -0,0 +1,116 @@
+"""
+Test to verify the parameterized query registry and `$param` handling.
+"""
+import json
+
+import httpx
+import pytest
+
+from query_registry import QueryRegistry, queries
+
+
+def test_every_tool_query_is_registered_and_compiled():
+    """
+    Verify that all templates are validated, compiled and free of interpolation.
+    """
+    for template in queries:
+        assert template.plan is not None, template.id
+        assert "{category}" not in template.text and "{query_param}" not in template.text
+
+    assert queries["skills.by_category"].params == ("category",)
+    assert queries["experience.search"].params == ("pattern",)
+    assert queries["skills.all"].params == ()
+    assert queries["skills.by_category"].doc_types == frozenset({"skill"})
+
+
+def test_cache_key_depends_on_template_and_params_only():
+    """
+    Verify that cache keys are stable per template ID and bound params.
+    """
+    template = queries["skills.by_category"]
+
+    assert template.cache_key({"category": "frontend"}) == template.cache_key({"category": "frontend"})
+    assert template.cache_key({"category": "frontend"}) != template.cache_key({"category": "backend"})
+    assert template.cache_key({"category": "frontend"}) != template.cache_key({"category": "frontend"}, use_cdn=False)
+
+
+def test_bind_rejects_missing_and_unexpected_params():
+    """
+    Verify that binding checks params against the template's `$params`.
+    """
+    template = queries["skills.by_category"]
+
+    assert template.bind({"category": "frontend"}) == {"category": "frontend"}
+    with pytest.raises(ValueError):
+        template.bind({})
+    with pytest.raises(ValueError):
+        template.bind({"category": "frontend", "limit": 3})
+
+
+def test_register_validates_once_and_rejects_unsafe_queries():
+    """
+    Verify that registration rejects duplicates and queries failing validation.
+    """
+    registry = QueryRegistry()
+    registry.register("skills", '*[_type == "skill" && name == $name]{name}')
+
+    with pytest.raises(ValueError):
+        registry.register("skills", '*[_type == "skill"]{name}')
+    with pytest.raises(ValueError):
+        registry.register("unsafe", '*[_type == "skill" /* comment */]{name}')
+    # `$` inside a string literal is not a param
+    assert registry.register("literal", '*[_type == "skill" && name == "$5"]{name}').params == ()
+
+
+@pytest.mark.asyncio
+async def test_params_are_json_encoded_for_sanity(monkeypatch):
+    """
+    Verify that template params are sent as `$name=<json>` query parameters.
+    """
+    import sanity_client
+    from cache_config import QueryResultCache, cache_manager
+
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.params)
+        return httpx.Response(200, json={"result": [{"name": "React"}]})
+
+    monkeypatch.setattr(sanity_client, "query_cache", QueryResultCache(cache_manager))
+    monkeypatch.setattr(sanity_client.document_store, "serving", False)
+    monkeypatch.setattr(sanity_client, "sanity", sanity_client.AsyncSanityClient(transport=httpx.MockTransport(handler)))
+
+    template = queries["skills.by_category"]
+    for _ in range(2):
+        assert await sanity_client.aquery_sanity(template, {"category": "frontend"}) == [{"name": "React"}]
+
+    assert len(calls) == 1
+    assert calls[0]["query"] == template.text
+    assert json.loads(calls[0]["$category"]) == "frontend"
+    await sanity_client.sanity.aclose()
+
+
+@pytest.mark.asyncio
+async def test_templates_evaluate_on_the_mirror(monkeypatch, invoke_tool):
+    """
+    Verify that parameterized templates answer tool fallbacks from the mirror.
+    """
+    import portfolio_bundle
+    import sanity_client
+    import tools
+    from document_store import DocumentStore, DEFAULT_EXPORT_PATH
+
+    store = DocumentStore()
+    store.load(DEFAULT_EXPORT_PATH)
+    store.serving = True
+
+    async def unavailable(query, params=None, use_cdn=True):
+        return []
+
+    monkeypatch.setattr(sanity_client, "document_store", store)
+    monkeypatch.setattr(portfolio_bundle, "aquery_sanity", unavailable)
+    monkeypatch.setattr(tools, "portfolio_bundle", portfolio_bundle.PortfolioBundleCache())
+
+    assert "(frontend)" in await invoke_tool(tools.get_skills, category="frontend")
+    assert "(backend)" not in await invoke_tool(tools.get_skills, category="frontend")
+    assert "TechCorp Global" in await invoke_tool(tools.search_experience, query_param="TechCorp")
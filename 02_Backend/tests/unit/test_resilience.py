@@ -0,0 +1,48 @@
+"""
+Test to verify latency percentiles and circuit breaker state transitions.
+"""
+import resilience
+from resilience import CircuitBreaker, LatencyTracker, CLOSED, OPEN, HALF_OPEN
+
+
+def test_deadline_uses_initial_delay_until_warm_then_p95():
+    """
+    Verify that the hedging deadline switches from the default to the observed p95.
+    """
+    tracker = LatencyTracker(min_samples=20, initial_delay=1.0, min_delay=0.01)
+    for _ in range(19):
+        tracker.observe(0.1)
+    assert tracker.deadline() == 1.0
+
+    tracker.observe(0.1)
+    assert tracker.deadline() == 0.1
+
+    for latency in [0.1] * 75 + [0.5] * 5:
+        tracker.observe(latency)
+    assert tracker.percentile(0.95) == 0.1
+    assert tracker.percentile(1.0) == 0.5
+
+
+def test_breaker_opens_half_opens_and_closes(monkeypatch):
+    """
+    Verify closed -> open after the threshold, half-open after the reset timeout,
+    and closed again on a successful probe.
+    """
+    now = [100.0]
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=30)
+
+    breaker.record_failure()
+    assert breaker.allow() and breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN and not breaker.allow()
+
+    now[0] += 30
+    assert breaker.allow() and breaker.state == HALF_OPEN
+    breaker.record_failure()
+    assert breaker.state == OPEN, "A failed probe re-opens the circuit immediately"
+
+    now[0] += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.failures == 0
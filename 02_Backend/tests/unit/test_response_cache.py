@@ -0,0 +1,144 @@
+"""
+Test to verify the response cache for repeated visitor questions and its replay through respond().
+"""
+from datetime import datetime
+
+import pytest
+from chatkit.types import (
+    AssistantMessageContent,
+    AssistantMessageContentPartTextDelta,
+    AssistantMessageItem,
+    ErrorEvent,
+    InferenceOptions,
+    ThreadItemAddedEvent,
+    ThreadItemDoneEvent,
+    ThreadItemUpdatedEvent,
+    ThreadMetadata,
+    UserMessageItem,
+    UserMessageTextContent,
+)
+
+from invalidation import InvalidationBus
+from response_cache import ResponseCache, normalize_question, question_text, replay
+
+NOW = datetime(2026, 1, 1)
+
+
+def answer_events(thread_id="thr_a", item_id="msg_a", text="React, FastAPI and Sanity."):
+    item = AssistantMessageItem(id=item_id, thread_id=thread_id, created_at=NOW,
+                                content=[AssistantMessageContent(text=text)])
+    return [
+        ThreadItemAddedEvent(item=item.model_copy(update={"content": []})),
+        ThreadItemUpdatedEvent(item_id=item_id, update=AssistantMessageContentPartTextDelta(content_index=0, delta=text)),
+        ThreadItemDoneEvent(item=item),
+    ]
+
+
+def question(item_id, thread_id, text):
+    return UserMessageItem(id=item_id, thread_id=thread_id, created_at=NOW, inference_options=InferenceOptions(),
+                           content=[UserMessageTextContent(text=text)])
+
+
+def test_questions_are_normalized():
+    """
+    Verify that case, punctuation and spacing do not split cache keys, and non-text messages are not cached.
+    """
+    assert normalize_question("  What's your STACK?? ") == normalize_question("what s your stack")
+    assert question_text(question("u1", "t", "Are you available?")) == "are you available"
+    assert question_text(question("u1", "t", "?!")) is None
+    quoted = question("u1", "t", "Explain this").model_copy(update={"quoted_text": "some text"})
+    assert question_text(quoted) is None
+
+
+def test_ttl_size_bound_and_invalidation(monkeypatch):
+    """
+    Verify that entries expire, the LRU is bounded, errors are never cached and content changes clear it.
+    """
+    import response_cache
+
+    clock = {"now": 100.0}
+    monkeypatch.setattr(response_cache.time, "monotonic", lambda: clock["now"])
+    cache = ResponseCache(ttl=60, max_entries=2)
+
+    assert cache.store("a", answer_events()) and cache.store("b", answer_events())
+    assert cache.lookup("a") is not None
+    cache.store("c", answer_events())
+    assert cache.lookup("b") is None, "Least recently used entry is evicted"
+    assert len(cache) == 2 and cache.stats.evictions == 1
+
+    clock["now"] += 61
+    assert cache.lookup("a") is None and len(cache) == 1
+
+    assert not cache.store("d", answer_events() + [ErrorEvent(message="boom", allow_retry=True)])
+
+    bus = InvalidationBus()
+    bus.subscribe(cache.on_content_change)
+    bus.publish("project", "p-1")
+    assert len(cache) == 0
+    assert cache.stats.as_dict()["hit_ratio"] == pytest.approx(1 / 3)
+
+
+def test_replay_remaps_items_to_the_new_thread():
+    """
+    Verify that replayed events carry fresh item ids, the new thread id and consistent update targets.
+    """
+    cache = ResponseCache()
+    cache.store("k", answer_events())
+    ids = iter(["msg_new"])
+
+    events = list(replay(cache.lookup("k"), "thr_b", lambda item_type: next(ids)))
+
+    assert [event.type for event in events] == ["thread.item.added", "thread.item.updated", "thread.item.done"]
+    assert events[0].item.id == events[1].item_id == events[2].item.id == "msg_new"
+    assert events[2].item.thread_id == "thr_b" and events[2].item.created_at > NOW
+    assert events[2].item.content[0].text == "React, FastAPI and Sanity."
+
+
+@pytest.mark.asyncio
+async def test_repeated_opening_question_skips_the_agent(monkeypatch):
+    """
+    Verify that a repeated opening question is answered from the cache
+    without running the agent, while follow-up questions always run it.
+    """
+    import server
+
+    runs = []
+
+    class NoAgent:
+        async def get(self, personality):
+            return None
+
+    def fake_run_streamed(agent, agent_input, **kwargs):
+        runs.append(agent_input)
+        return None
+
+    async def fake_stream(agent_context, result):
+        for event in answer_events(agent_context.thread.id, f"msg_{len(runs)}"):
+            yield event
+
+    monkeypatch.setattr(server, "agent_cache", NoAgent())
+    monkeypatch.setattr(server.Runner, "run_streamed", fake_run_streamed)
+    monkeypatch.setattr(server, "stream_agent_response", fake_stream)
+    monkeypatch.setattr(server, "SUMMARY_ENABLED", False)
+    monkeypatch.setattr(server, "response_cache", ResponseCache())
+
+    chat = server.PortfolioChatServer()
+
+    async def ask(thread_id, item_id, text):
+        thread = ThreadMetadata(id=thread_id, created_at=NOW, metadata={"personality": "crisp"})
+        user_item = question(item_id, thread_id, text)
+        await chat.store.add_thread_item(thread_id, user_item, {})
+        return [event async for event in chat.respond(thread, user_item, {})]
+
+    first = await ask("thr_1", "u1", "What's your stack?")
+    second = await ask("thr_2", "u2", "what's your  stack")
+
+    assert len(runs) == 1, "The repeat is replayed without running the agent"
+    assert [e.type for e in second] == [e.type for e in first]
+    assert second[-1].item.thread_id == "thr_2" and second[-1].item.id != first[-1].item.id
+    assert second[-1].item.content[0].text == first[-1].item.content[0].text
+
+    await chat.store.add_thread_item("thr_2", second[-1].item, {})
+    await ask("thr_2", "u3", "What's your stack?")
+    assert len(runs) == 2, "Questions inside a conversation are not served from the cache"
+    assert server.response_cache.stats.hits == 1
@@ -0,0 +1,148 @@
+"""
+Test to verify the local BM25 retrieval index and the search_portfolio tool.
+"""
+import copy
+import time
+
+import pytest
+
+from document_store import DocumentStore, DEFAULT_EXPORT_PATH
+from groq_engine import evaluate
+from invalidation import ContentChange
+from retrieval import CORPUS_QUERY, RetrievalIndex, chunk_corpus, plain_text
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    store = DocumentStore()
+    store.load(DEFAULT_EXPORT_PATH)
+    return evaluate(CORPUS_QUERY.text, store)
+
+
+@pytest.fixture
+def index(corpus):
+    idx = RetrievalIndex()
+    idx.build(corpus)
+    return idx
+
+
+def _top(index, query):
+    snippets = index.search(query, top_k=3)
+    return (snippets[0].chunk.kind, snippets[0].chunk.title, snippets[0].chunk.text) if snippets else None
+
+
+def test_chunks_cover_every_document_kind(corpus):
+    """
+    Verify that prose is chunked per paragraph or list item, with portable text flattened.
+    """
+    chunks = chunk_corpus(corpus)
+
+    assert {chunk.kind for chunk in chunks} == {"profile", "project", "experience", "blog", "testimonial"}
+    assert plain_text([{"_type": "block", "children": [{"text": "My Approach"}, {"text": ": clean code"}]}]) == [
+        "My Approach: clean code"
+    ]
+    assert any(chunk.text == "Implement CI/CD pipelines reducing deployment time by 60%" for chunk in chunks)
+
+    long_bio = {"profile": {"_id": "p", "firstName": "A", "shortBio": " ".join(["Sentence one is here."] * 40)}}
+    assert all(len(chunk.text.split()) <= 60 for chunk in chunk_corpus(long_bio, max_words=60))
+
+
+def test_bm25_ranks_the_passage_that_answers(index):
+    """
+    Verify that free-form questions surface the single relevant passage first.
+    """
+    kind, title, text = _top(index, "how much did CI/CD cut deployment time?")
+    assert (kind, title) == ("experience", "Senior Full-Stack Developer at TechCorp Global") and "60%" in text
+
+    assert _top(index, "HIPAA")[1] == "Healthcare Appointment System"
+    assert _top(index, "Server Components")[0] == "blog"
+    assert _top(index, "praise for code quality and documentation")[0] == "testimonial"
+    assert index.search("the of and") == [], "Stop words alone match nothing"
+
+
+def test_batched_scoring_is_sub_millisecond(index):
+    """
+    Verify that batched scoring matches single queries and a warm query takes well under a millisecond.
+    """
+    questions = ["react performance", "machine learning models", "kubernetes", "ecommerce payments"]
+    assert index.search_many(questions, top_k=4) == [index.search(q, top_k=4) for q in questions]
+
+    runs = 200
+    started = time.perf_counter()
+    for _ in range(runs):
+        index.search("who led the typescript migration", top_k=5)
+    per_query = (time.perf_counter() - started) / runs
+    assert per_query < 0.0005, f"{per_query * 1e6:.0f}µs per query"
+
+
+@pytest.mark.asyncio
+async def test_rebuilds_on_content_change(monkeypatch, corpus):
+    """
+    Verify that a published change to a corpus type triggers a rebuild with the new content.
+    """
+    import retrieval
+
+    current = {"data": corpus}
+    fetches = []
+
+    async def fake_query(query, params=None, use_cdn=True):
+        fetches.append(query)
+        return current["data"]
+
+    monkeypatch.setattr(retrieval, "aquery_sanity", fake_query)
+    index = RetrievalIndex()
+
+    assert await index.refresh() is True
+    assert await index.refresh() is False and len(fetches) == 1, "Fresh index does not refetch"
+
+    index.on_content_change(ContentChange("navigation", "nav-1", 1, "test", 0.0))
+    assert not index.stale
+
+    changed = copy.deepcopy(corpus)
+    changed["blog"].append({"_id": "blog-new", "title": "Rust for Python developers", "excerpt": "Borrow checker basics."})
+    current["data"] = changed
+    index.on_content_change(ContentChange("blog", "blog-new", 2, "test", 0.0))
+    assert index.stale
+
+    assert await index.refresh() is True
+    assert _top(index, "borrow checker")[1] == "Rust for Python developers"
+
+
+@pytest.mark.asyncio
+async def test_change_during_fetch_keeps_index_stale(monkeypatch, corpus):
+    """
+    Verify that a change published while the corpus fetch is in flight is
+    not cleared by the rebuild, so the next search refetches.
+    """
+    import retrieval
+
+    index = RetrievalIndex()
+    fetches = []
+
+    async def fake_query(query, params=None, use_cdn=True):
+        fetches.append(query)
+        if len(fetches) == 1:
+            index.on_content_change(ContentChange("blog", "blog-new", 1, "test", 0.0))
+        return corpus
+
+    monkeypatch.setattr(retrieval, "aquery_sanity", fake_query)
+
+    assert await index.refresh() is True
+    assert index.stale, "Change published mid-fetch is still pending"
+    assert await index.refresh() is False and len(fetches) == 2
+    assert not index.stale
+
+
+@pytest.mark.asyncio
+async def test_search_portfolio_tool(monkeypatch, index, invoke_tool):
+    """
+    Verify that search_portfolio returns labelled passages from the index.
+    """
+    import tools
+
+    monkeypatch.setattr(tools, "retrieval_index", index)
+
+    output = await invoke_tool(tools.search_portfolio, query="HIPAA compliant", top_k=2)
+    assert output.startswith("Portfolio matches for 'HIPAA compliant' (2):")
+    assert "• [project] Healthcare Appointment System: HIPAA-compliant" in output
+    assert await invoke_tool(tools.search_portfolio, query="zzzz") == "No portfolio content matches 'zzzz'."
@@ -0,0 +1,105 @@
+"""
+Test to verify the async Sanity client reuses one pooled connection per app.
+"""
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+from sanity_client import AsyncSanityClient, BASE_URL, BASE_URL_LIVE
+
+
+def _transport(calls: list, status: int = 200, result=None):
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(status, json={"result": result if result is not None else []})
+    return httpx.MockTransport(handler)
+
+
+@pytest.mark.asyncio
+async def test_queries_share_one_pooled_client():
+    """
+    Verify that consecutive queries go through the same httpx.AsyncClient.
+    """
+    calls = []
+    client = AsyncSanityClient(transport=_transport(calls, result=[{"name": "React"}]))
+
+    first = await client.query('*[_type == "skill"]')
+    pooled = client._client
+    second = await client.query('*[_type == "skill"]', use_cdn=False)
+
+    assert first == [{"name": "React"}]
+    assert second == [{"name": "React"}]
+    assert client._client is pooled, "The pooled client should be reused between queries"
+    assert str(calls[0].url).startswith(BASE_URL)
+    assert str(calls[1].url).startswith(BASE_URL_LIVE)
+    assert calls[0].url.params["query"] == '*[_type == "skill"]'
+
+    await client.aclose()
+    assert client._client is None
+
+
+@pytest.mark.asyncio
+async def test_pool_from_another_loop_is_closed():
+    """
+    Verify that when queries move to a new event loop, the pool opened on the
+    previous loop is closed, whether that loop has finished or still runs.
+    """
+    calls = []
+    client = AsyncSanityClient(transport=_transport(calls))
+
+    await asyncio.to_thread(asyncio.run, client.query('*[_type == "skill"]'))
+    finished = client._client
+    await client.query('*[_type == "skill"]')
+    await asyncio.sleep(0)
+    assert client._client is not finished and finished.is_closed
+
+    other = asyncio.new_event_loop()
+    thread = threading.Thread(target=other.run_forever)
+    thread.start()
+    try:
+        asyncio.run_coroutine_threadsafe(client.query('*[_type == "skill"]'), other).result()
+        running = client._client
+        await client.query('*[_type == "skill"]')
+        for _ in range(100):
+            if running.is_closed:
+                break
+            await asyncio.sleep(0.01)
+        assert running.is_closed
+    finally:
+        other.call_soon_threadsafe(other.stop)
+        thread.join()
+        other.close()
+    assert len(calls) == 4
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_query_errors_return_empty_result():
+    """
+    Verify that HTTP errors are logged and surfaced as an empty result.
+    """
+    calls = []
+    client = AsyncSanityClient(transport=_transport(calls, status=500))
+
+    assert await client.query('*[_type == "skill"]') == []
+    assert len(calls) == 2, "A 5xx from the CDN fails over to the live API once"
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_tools_run_on_the_async_client(monkeypatch, invoke_tool):
+    """
+    Verify that tools await the async client instead of blocking the loop.
+    """
+    import tools
+
+    async def fake_query(query, params=None, use_cdn=True):
+        return [{"name": "Python", "category": "backend", "proficiency": "advanced",
+                 "percentage": 87, "yearsOfExperience": 5}]
+
+    monkeypatch.setattr(tools, "aquery_sanity", fake_query)
+    result = await invoke_tool(tools.get_skills)
+
+    assert "Python (backend)" in result
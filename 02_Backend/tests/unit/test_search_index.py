@@ -0,0 +1,101 @@
+"""
+Test to verify the local inverted index used by search_experience.
+"""
+import copy
+import time
+
+import pytest
+
+from document_store import DocumentStore, DEFAULT_EXPORT_PATH
+from groq_engine import evaluate
+from portfolio_bundle import BUNDLE_QUERY, content_version
+from search_index import PortfolioSearchIndex, TokenTrie, tokenize
+
+
+@pytest.fixture(scope="module")
+def bundle_data():
+    store = DocumentStore()
+    store.load(DEFAULT_EXPORT_PATH)
+    return evaluate(BUNDLE_QUERY.text, store)
+
+
+@pytest.fixture
+def index(bundle_data):
+    idx = PortfolioSearchIndex()
+    idx.sync(content_version(bundle_data), bundle_data)
+    return idx
+
+
+def _experience_ids(index, query):
+    return [hit.id for hit in index.search(query, kinds=("experience",))]
+
+
+def test_prefix_typo_and_body_matches(index):
+    """
+    Verify prefix matching, bounded typo tolerance and matches inside responsibilities.
+    """
+    assert _experience_ids(index, "TechCorp") == ["exp-1"]
+    assert _experience_ids(index, "Tech")[0] == "exp-1"
+    assert _experience_ids(index, "TechCrop") == ["exp-1"], "Two-edit typo on a long token"
+    assert _experience_ids(index, "Startuphb") == ["exp-3"]
+    assert "exp-3" in _experience_ids(index, "MERN")
+    assert set(_experience_ids(index, "tensorflow")) == {"exp-2"}
+    assert _experience_ids(index, "xyz") == []
+    assert _experience_ids(index, "ai") == ["exp-2"], "Short tokens must match exactly or by prefix"
+
+
+def test_all_tokens_must_match_and_titles_rank_first(index):
+    """
+    Verify AND semantics across query tokens and field-weighted ranking.
+    """
+    hits = _experience_ids(index, "full stack developer")
+    assert set(hits) == {"exp-1", "exp-2", "exp-3"}
+    assert _experience_ids(index, "freelance clients")[0] == "exp-5"
+
+    skill_hits = index.search("reakt", kinds=("skills",))
+    assert skill_hits and skill_hits[0].fields == {"name"}
+
+
+def test_sync_is_incremental(index, bundle_data):
+    """
+    Verify that only changed documents are re-indexed and removed ones disappear.
+    """
+    assert index.sync(content_version(bundle_data), bundle_data) == 0
+
+    changed = copy.deepcopy(bundle_data)
+    changed["experience"][0]["company"] = "Globex"
+    del changed["experience"][2]
+    assert index.sync(content_version(changed), changed) == 2
+
+    assert _experience_ids(index, "TechCorp") == []
+    assert _experience_ids(index, "Globex") == ["exp-1"]
+    assert _experience_ids(index, "StartupHub") == []
+    assert "startuphub" not in index._trie.with_prefix("startup"), "Unused tokens are pruned from the trie"
+
+
+def test_trie_edit_distance_is_bounded():
+    """
+    Verify that the trie walk returns only tokens within the edit budget.
+    """
+    trie = TokenTrie()
+    for token in ["react", "redux", "reactive", "ruby"]:
+        trie.add(token)
+
+    assert dict(trie.within_distance("raect", 2)) == {"react": 2}
+    assert sorted(trie.with_prefix("re")) == ["react", "reactive", "redux"]
+    assert tokenize(["Node.js", "CI/CD"]) == ["node", "js", "ci", "cd"]
+
+
+def test_warm_lookups_take_microseconds(index):
+    """
+    Verify that repeat lookups are served from cached token expansions in microseconds.
+    """
+    index.search("react developer", kinds=("experience",))
+
+    runs = 200
+    started = time.perf_counter()
+    for _ in range(runs):
+        index.search("react developer", kinds=("experience",))
+    per_lookup = (time.perf_counter() - started) / runs
+
+    assert per_lookup < 0.0002, f"{per_lookup * 1e6:.0f}µs per lookup"
@@ -0,0 +1,106 @@
+"""
+Test to verify that identical concurrent queries are coalesced into one request.
+"""
+import asyncio
+import threading
+import time
+import pytest
+
+from singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_coroutines_share_one_execution():
+    """
+    Verify that coroutines requesting the same key share one call and result.
+    """
+    flight = SingleFlight()
+    executions = 0
+
+    async def fetch():
+        nonlocal executions
+        executions += 1
+        await asyncio.sleep(0.01)
+        return {"firstName": "John"}
+
+    results = await asyncio.gather(*[flight.do_async("profile", fetch) for _ in range(20)])
+
+    assert executions == 1
+    assert all(r == {"firstName": "John"} for r in results)
+    assert flight.stats.as_dict()["coalesced"] == 19
+
+    # Once complete, the next call executes again (no caching)
+    await flight.do_async("profile", fetch)
+    assert executions == 2
+
+
+@pytest.mark.asyncio
+async def test_errors_propagate_to_every_waiter():
+    """
+    Verify that a failed shared call raises in every coalesced caller.
+    """
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("sanity down")
+
+    results = await asyncio.gather(*[flight.do_async("k", fail) for _ in range(3)], return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_concurrent_threads_share_one_execution():
+    """
+    Verify that threads requesting the same key share one call and result.
+    """
+    flight = SingleFlight()
+    executions = 0
+    started = threading.Barrier(10)
+    results = []
+
+    def fetch():
+        nonlocal executions
+        executions += 1
+        time.sleep(0.05)
+        return ["React"]
+
+    def worker():
+        started.wait()
+        results.append(flight.do("skills", fetch))
+
+    threads = [threading.Thread(target=worker) for _ in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert executions == 1
+    assert results == [["React"]] * 10
+    assert flight.stats.coalesced == 9
+
+
+@pytest.mark.asyncio
+async def test_aquery_sanity_coalesces_identical_queries(monkeypatch):
+    """
+    Verify that concurrent identical cache misses result in one Sanity request.
+    """
+    import sanity_client
+    from cache_config import QueryResultCache, SanityCacheManager
+
+    monkeypatch.setattr(sanity_client, "query_cache", QueryResultCache(SanityCacheManager()))
+    monkeypatch.setattr(sanity_client, "sanity_flight", SingleFlight("sanity"))
+    calls = 0
+
+    async def fake_fetch(query, params=None, use_cdn=True):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"firstName": "John"}
+
+    monkeypatch.setattr(sanity_client.sanity, "fetch", fake_fetch)
+    query = '*[_type == "profile"][0]'
+    results = await asyncio.gather(*[sanity_client.aquery_sanity(query) for _ in range(25)])
+
+    assert calls == 1
+    assert all(r == {"firstName": "John"} for r in results)
+    assert sanity_client.sanity_flight.stats.coalesced == 24
@@ -0,0 +1,149 @@
+"""
+Test to verify background rolling summarization of long threads against a local fake model.
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from chatkit.agents import simple_to_agent_input
+from chatkit.types import (
+    AssistantMessageContent,
+    AssistantMessageItem,
+    InferenceOptions,
+    UserMessageItem,
+    UserMessageTextContent,
+)
+
+from history_window import item_tokens
+from memory_store import MemoryStore
+from summarizer import ThreadSummarizer, history_with_summary
+
+START = datetime(2026, 1, 1)
+
+
+class FakeSummaryModel:
+    """Keeps the last `max_words` words of the previous summary plus the new transcript."""
+
+    def __init__(self, delay=0.0, fail=False):
+        self.calls = []
+        self.delay = delay
+        self.fail = fail
+
+    async def summarize(self, previous, transcript, max_words):
+        self.calls.append(transcript)
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("model unavailable")
+        words = f"{previous or ''} {transcript}".split()
+        return " ".join(words[-max_words:])
+
+
+async def add_turn(store, n):
+    created = START + timedelta(minutes=n)
+    await store.add_thread_item("t", UserMessageItem(
+        id=f"u{n}", thread_id="t", created_at=created, inference_options=InferenceOptions(),
+        content=[UserMessageTextContent(text=f"Question {n} about projects, skills and experience?")],
+    ), {})
+    await store.add_thread_item("t", AssistantMessageItem(
+        id=f"a{n}", thread_id="t", created_at=created,
+        content=[AssistantMessageContent(text=f"Answer {n}: " + "a detailed portfolio answer " * 15)],
+    ), {})
+
+
+def prompt_tokens(store, summary):
+    history = history_with_summary(store.items["t"], summary, store.token_counts("t"), budget=100_000)
+    return sum(item_tokens(item) for item in history), history
+
+
+@pytest.mark.asyncio
+async def test_older_turns_fold_into_summary():
+    """
+    Verify that past the threshold the older turns are replaced by one summary
+    item and the recent turns are sent verbatim, starting on a user message.
+    """
+    store = MemoryStore()
+    model = FakeSummaryModel()
+    summarizer = ThreadSummarizer(model, trigger_items=10, keep_recent=4, max_words=50)
+
+    for n in range(5):
+        await add_turn(store, n)
+    assert not summarizer.due(store.items["t"], None)
+    assert await summarizer.run(store, "t") is None and model.calls == []
+
+    await add_turn(store, 5)
+    summary = await summarizer.run(store, "t")
+
+    assert summary.through_id == "a3" and summary.covered == 8
+    assert "Question 0" in model.calls[0] and "Answer 3" in model.calls[0] and "Question 4" not in model.calls[0]
+    assert len(summary.text.split()) <= 50
+
+    _, history = prompt_tokens(store, store.load_summary("t"))
+    assert [item.id for item in history] == [summary.item.id, "u4", "a4", "u5", "a5"]
+    agent_input = await simple_to_agent_input(history)
+    assert "Summary of the earlier conversation" in agent_input[0]["content"][0]["text"]
+
+
+@pytest.mark.asyncio
+async def test_jobs_are_idempotent_per_range():
+    """
+    Verify that concurrent schedules share one job and a summarized range is never resummarized.
+    """
+    store = MemoryStore()
+    model = FakeSummaryModel(delay=0.01)
+    summarizer = ThreadSummarizer(model, trigger_items=10, keep_recent=4)
+    for n in range(6):
+        await add_turn(store, n)
+
+    first, second = summarizer.schedule(store, "t"), summarizer.schedule(store, "t")
+    assert first is second
+    await first
+    assert await summarizer.run(store, "t") is None
+    assert len(model.calls) == 1
+
+    failing = ThreadSummarizer(FakeSummaryModel(fail=True), trigger_items=10, keep_recent=4)
+    other = MemoryStore()
+    for n in range(6):
+        await add_turn(other, n)
+    assert await failing.run(other, "t") is None and other.load_summary("t") is None
+
+
+@pytest.mark.asyncio
+async def test_keep_nothing_recent_and_bounded_bookkeeping():
+    """
+    Verify that keep_recent=0 summarizes every pending item and only the
+    latest summarized range is remembered per thread.
+    """
+    store = MemoryStore()
+    summarizer = ThreadSummarizer(FakeSummaryModel(), trigger_items=4, keep_recent=0)
+    for n in range(3):
+        await add_turn(store, n)
+
+    summary = await summarizer.run(store, "t")
+    assert summary.covered == 6 and summary.through_id == "a2"
+
+    for n in range(3, 6):
+        await add_turn(store, n)
+    assert (await summarizer.run(store, "t")).covered == 12
+    assert summarizer._done == {"t": ("u3", "a5")}
+
+
+@pytest.mark.asyncio
+async def test_prompt_size_plateaus():
+    """
+    Verify that with background summaries the prompt stops growing with
+    conversation length, while the raw history keeps growing linearly.
+    """
+    store = MemoryStore()
+    summarizer = ThreadSummarizer(FakeSummaryModel(), trigger_items=12, keep_recent=6, max_words=80)
+    sizes, raw = [], []
+
+    for n in range(60):
+        await add_turn(store, n)
+        sizes.append(prompt_tokens(store, store.load_summary("t"))[0])
+        raw.append(prompt_tokens(store, None)[0])
+        if summarizer.due(store.items["t"], store.load_summary("t")):
+            await summarizer.schedule(store, "t")
+
+    assert raw[-1] > 5 * raw[9]
+    assert max(sizes[20:]) <= max(sizes[:20]) * 1.2, "Prompt size plateaus"
+    assert max(sizes[40:]) <= max(sizes[20:40])
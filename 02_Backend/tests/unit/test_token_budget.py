@@ -0,0 +1,107 @@
+"""
+Test to verify token-budgeted pagination of the list tools.
+"""
+import re
+
+import pytest
+
+from document_store import DocumentStore, DEFAULT_EXPORT_PATH
+from groq_engine import evaluate
+from portfolio_bundle import BUNDLE_QUERY, PortfolioBundle
+from token_budget import MORE_AVAILABLE, ToolOutputMeter, count_tokens, render_page, token_budget
+
+
+@pytest.fixture(scope="module")
+def bundle_data():
+    store = DocumentStore()
+    store.load(DEFAULT_EXPORT_PATH)
+    return evaluate(BUNDLE_QUERY.text, store)
+
+
+@pytest.fixture
+def tools_on_bundle(monkeypatch, bundle_data):
+    """Serve the tools from a fixed bundle and a fresh token meter."""
+    import tools
+
+    bundle = PortfolioBundle(bundle_data)
+
+    class StaticBundle:
+        async def get(self):
+            return bundle
+
+    meter = ToolOutputMeter()
+    monkeypatch.setattr(tools, "portfolio_bundle", StaticBundle())
+    monkeypatch.setattr(tools, "tool_output_meter", meter)
+    return tools, meter
+
+
+def _next_offset(output):
+    match = re.search(r"offset=(\d+)\]$", output)
+    return int(match.group(1)) if match else None
+
+
+def test_render_page_budget_limit_and_offset():
+    """
+    Verify that pages stop at the budget or limit and say where to continue.
+    """
+    entries = [f"• entry number {i}\n" for i in range(20)]
+
+    everything = render_page("Items (20 total):\n\n", entries, budget=10_000)
+    assert everything == ("Items (20 total):\n\n" + "".join(entries)).strip(), "Output is unchanged when it fits"
+
+    page = render_page("Items (20 total):\n\n", entries, budget=40)
+    assert count_tokens(page) <= 40
+    assert page.endswith(f"{MORE_AVAILABLE}{_next_offset(page)}]")
+    assert "• entry number 0" in page and "• entry number 19" not in page
+
+    page = render_page("Items (20 total):\n\n", entries, budget=10_000, offset=18, limit=5)
+    assert "• entry number 17" not in page and page.endswith("• entry number 19")
+
+    assert "[No entries at offset 25; 20 total]" in render_page("Items:\n", entries, budget=100, offset=25)
+    assert "• entry number 3" in render_page("Items:\n", entries, budget=1, offset=3), "At least one entry is shown"
+
+
+@pytest.mark.asyncio
+async def test_skills_are_paged_within_budget(tools_on_bundle, invoke_tool):
+    """
+    Verify that get_skills stays within its token budget and that following
+    the continuation offsets returns every skill exactly once.
+    """
+    tools, meter = tools_on_bundle
+
+    first = await invoke_tool(tools.get_skills)
+    assert first.startswith("Skills (38 total):")
+    assert count_tokens(first) <= token_budget("get_skills")
+
+    seen, output = [], first
+    while True:
+        seen += re.findall(r"^• (.+?) \(", output, flags=re.M)
+        offset = _next_offset(output)
+        if offset is None:
+            break
+        output = await invoke_tool(tools.get_skills, offset=offset)
+
+    assert len(seen) == 38 and len(set(seen)) == 38
+    stats = meter.as_dict()["get_skills"]
+    assert stats["calls"] >= 2 and stats["truncated"] == stats["calls"] - 1
+    assert stats["max_tokens"] <= token_budget("get_skills")
+
+
+@pytest.mark.asyncio
+async def test_limit_and_fields_shrink_outputs(tools_on_bundle, invoke_tool):
+    """
+    Verify that limit and fields narrow list tool outputs.
+    """
+    tools, _ = tools_on_bundle
+
+    names = await invoke_tool(tools.get_skills, category="frontend", limit=3, fields=["category"])
+    assert names.splitlines()[2:5] == ["• React (frontend)", "• Tailwind CSS (frontend)", "• TypeScript (frontend)"]
+    assert "%" not in names and "more available" in names
+
+    titles = await invoke_tool(tools.get_projects, fields=["liveUrl"])
+    assert "Live: https://" in titles and "GitHub:" not in titles and "Technologies:" not in titles
+
+    full = await invoke_tool(tools.search_experience, query_param="TechCorp")
+    brief = await invoke_tool(tools.search_experience, query_param="TechCorp", fields=["dates"])
+    assert brief == "Work Experience (1 positions):\n\n**Senior Full-Stack Developer at TechCorp Global**\n2022-01-15 - Present"
+    assert count_tokens(brief) < count_tokens(full) / 5
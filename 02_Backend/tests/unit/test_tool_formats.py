@@ -0,0 +1,83 @@
+"""
+Test to verify the compact TSV and JSON tool output formats.
+"""
+import json
+
+import pytest
+
+import tool_formats
+from document_store import DocumentStore, DEFAULT_EXPORT_PATH
+from groq_engine import evaluate
+from portfolio_bundle import BUNDLE_QUERY, PortfolioBundle
+from token_budget import MORE_AVAILABLE, count_tokens
+from tool_formats import JSON, PROSE, TSV
+
+
+@pytest.fixture(scope="module")
+def bundle():
+    store = DocumentStore()
+    store.load(DEFAULT_EXPORT_PATH)
+    return PortfolioBundle(evaluate(BUNDLE_QUERY.text, store))
+
+
+def test_compact_tables_have_one_header_row(bundle):
+    """
+    Verify that TSV and JSON name the columns once and encode one entry per line.
+    """
+    import tools
+
+    tsv = tools._format_skills(bundle.skills("frontend"), "frontend", fmt=TSV).splitlines()
+    assert tsv[0] == "Skills (7 total)"
+    assert tsv[1] == "name\tproficiency\tpercentage\tyearsOfExperience", "Filtered category is not repeated"
+    assert tsv[2] == "React\texpert\t95\t6"
+    assert all(len(line.split("\t")) == 4 for line in tsv[1:])
+
+    lines = tools._format_experience(bundle.experience("TechCorp"), "TechCorp", fmt=JSON).splitlines()
+    header, row = json.loads(lines[0]), json.loads(lines[1])
+    entry = dict(zip(header["columns"], row))
+    assert header["total"] == 1 and len(lines) == 2
+    assert entry["company"] == "TechCorp Global" and entry["endDate"] == "Present"
+    assert "React" in entry["technologies"]
+
+    profile = json.loads(tools._format_profile(bundle.profile, fmt=JSON))
+    assert profile["name"] == "John Doe"
+    availability = tools._format_availability(bundle.availability, fmt=TSV)
+    assert "status\topen" in availability and "Full-Stack Web Development\t5000\tproject\t" in availability
+
+
+def test_compact_formats_cost_fewer_tokens(bundle, monkeypatch):
+    """
+    Verify that the TSV encoding is cheaper than prose and still pages within budget.
+    """
+    import tools
+
+    monkeypatch.setenv("TOOL_TOKEN_BUDGET_GET_SKILLS", "100000")
+    prose = tools._format_skills(bundle.skills(), None, fmt=PROSE)
+    tsv = tools._format_skills(bundle.skills(), None, fmt=TSV)
+    assert count_tokens(tsv) < count_tokens(prose) * 0.8
+
+    monkeypatch.setenv("TOOL_TOKEN_BUDGET_GET_SKILLS", "120")
+    page = tools._format_skills(bundle.skills(), None, fmt=JSON)
+    assert count_tokens(page) <= 120 and MORE_AVAILABLE in page
+
+
+@pytest.mark.asyncio
+async def test_selected_format_applies_to_tools(bundle, monkeypatch, invoke_tool):
+    """
+    Verify that TOOL_OUTPUT_FORMAT switches every tool and keys the render memo.
+    """
+    import tools
+
+    class StaticBundle:
+        async def get(self):
+            return bundle
+
+    monkeypatch.setattr(tools, "portfolio_bundle", StaticBundle())
+
+    prose = await invoke_tool(tools.get_projects, featured_only=True)
+    monkeypatch.setattr(tool_formats, "TOOL_OUTPUT_FORMAT", TSV)
+    tsv = await invoke_tool(tools.get_projects, featured_only=True)
+
+    assert prose.startswith("Projects (5 total):\n\n**")
+    assert tsv.startswith("Projects (5 total)\ntitle\ttagline\t")
+    assert (await invoke_tool(tools.check_availability)).startswith("Availability\nstatus\t")
@@ -0,0 +1,76 @@
+"""
+Test to verify startup warmup phases and the liveness and readiness endpoints.
+"""
+import asyncio
+
+import pytest
+
+from warmup import Warmup
+
+
+@pytest.mark.asyncio
+async def test_phases_run_in_stage_order_and_are_timed():
+    """
+    Verify that stages run in order, phases within a stage run concurrently,
+    and failures are reported without blocking readiness.
+    """
+    order = []
+
+    def phase(name, delay=0.01, fail=False):
+        async def run():
+            order.append(f"{name}:start")
+            await asyncio.sleep(delay)
+            order.append(f"{name}:end")
+            if fail:
+                raise RuntimeError(f"{name} unreachable")
+        return run
+
+    warmup = Warmup(stages=[
+        {"sanity": phase("sanity"), "llm": phase("llm", fail=True)},
+        {"agents": phase("agents")},
+    ])
+    assert warmup.report()["status"] == "warming"
+
+    await warmup.start()
+
+    assert order[:2] == ["sanity:start", "llm:start"], "Phases in a stage start together"
+    assert order.index("agents:start") > max(order.index("sanity:end"), order.index("llm:end"))
+    report = warmup.report()
+    assert warmup.ready and report["status"] == "ready" and not report["timed_out"]
+    assert [p["phase"] for p in report["phases"]][-1] == "agents"
+    assert all(p["seconds"] >= 0.01 for p in report["phases"])
+    assert {p["phase"]: p.get("error") for p in report["phases"]}["llm"] == "llm unreachable"
+
+
+@pytest.mark.asyncio
+async def test_timeout_still_marks_ready():
+    """
+    Verify that a hung phase cannot keep the instance out of rotation.
+    """
+    async def hang():
+        await asyncio.sleep(10)
+
+    warmup = Warmup(stages=[{"sanity": hang}], timeout=0.05)
+    await warmup.run()
+
+    assert warmup.ready and warmup.report()["timed_out"]
+
+
+def test_health_endpoints(monkeypatch):
+    """
+    Verify that liveness is always 200 and readiness is 503 until warmup finishes.
+    """
+    from fastapi.testclient import TestClient
+    import main
+
+    pending = Warmup(stages=[])
+    monkeypatch.setattr(main, "warmup", pending)
+    client = TestClient(main.app)
+
+    assert client.get("/healthz/live").json() == {"status": "alive"}
+    response = client.get("/healthz/ready")
+    assert response.status_code == 503 and response.json()["status"] == "warming"
+
+    asyncio.run(pending.run())
+    response = client.get("/healthz/ready")
+    assert response.status_code == 200 and response.json()["status"] == "ready"
@@ -0,0 +1,168 @@
+"""
+Token budgets for tool outputs.
+Everything a tool returns is pushed into the model context on every later
+turn, so list tools page their entries (limit/offset) and stop adding
+entries once the output reaches the tool's token budget, ending with a
+marker that says how many more are available. Every tool output is token
+counted, per call and in running per-tool totals.
+"""
+import math
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from decouple import config
+
+from metrics import metrics, TOKEN_BUCKETS
+
+# Set up logging
+from logging_config import get_logger
+logger = get_logger(__name__)
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+# Token budget per tool output; a tool may override it with TOOL_TOKEN_BUDGET_<TOOL NAME>
+DEFAULT_TOKEN_BUDGET = config("TOOL_TOKEN_BUDGET", default=400, cast=int)
+TOOL_TOKEN_BUDGETS = {
+    "get_skills": 300,
+    "get_projects": 400,
+    "search_experience": 600,
+}
+
+# Wording of the marker ending a truncated page
+MORE_AVAILABLE = "more available, call again with offset="
+
+# Rough characters per token for English/markdown when tiktoken is not installed
+CHARS_PER_TOKEN = 4
+
+_encoding = None
+
+OUTPUT_TOKENS = metrics.histogram("tool_output_tokens", "Tokens per tool output", ("tool",), buckets=TOKEN_BUCKETS)
+TRUNCATED_OUTPUTS = metrics.counter("tool_outputs_truncated_total", "Tool outputs cut at their token budget", ("tool",))
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens in `text` (exact with tiktoken, estimated otherwise)."""
+    global _encoding, TIKTOKEN_AVAILABLE
+    if not text:
+        return 0
+    if TIKTOKEN_AVAILABLE:
+        try:
+            if _encoding is None:
+                _encoding = tiktoken.get_encoding("o200k_base")
+            return len(_encoding.encode(text))
+        except Exception as e:
+            # The encoding file is downloaded on first use; estimate if that fails
+            logger.warning(f"tiktoken unavailable, estimating token counts: {e}")
+            TIKTOKEN_AVAILABLE = False
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def token_budget(tool: str) -> int:
+    """Token budget for one tool's output."""
+    return config(f"TOOL_TOKEN_BUDGET_{tool.upper()}", default=TOOL_TOKEN_BUDGETS.get(tool, DEFAULT_TOKEN_BUDGET), cast=int)
+
+
+def render_page(
+    header: str,
+    entries: List[str],
+    budget: int,
+    offset: int = 0,
+    limit: Optional[int] = None,
+) -> str:
+    """
+    Render a page of entries under a header, within a token budget.
+
+    Entries from `offset` are added until `limit` entries or the budget is
+    reached (at least one entry is always shown). If entries remain, the
+    output ends with a marker giving the count and the offset to continue from.
+
+    Args:
+        header: Text before the entries (e.g. "Skills (38 total):")
+        entries: Pre-rendered entries, in order
+        budget: Maximum tokens for the whole output
+        offset: Index of the first entry to show
+        limit: Maximum number of entries to show
+
+    Returns:
+        The rendered page
+    """
+    offset = max(offset or 0, 0)
+    end = len(entries) if limit is None else min(len(entries), offset + max(limit, 1))
+
+    parts = [header]
+    used = count_tokens(header)
+    # Room for the marker, unless the entry being added is the last one
+    marker_cost = count_tokens(_more_marker(len(entries), len(entries), len(entries)))
+    shown = offset
+    for entry in entries[offset:end]:
+        cost = count_tokens(entry)
+        reserve = marker_cost if shown + 1 < len(entries) else 0
+        if shown > offset and used + cost + reserve > budget:
+            break
+        parts.append(entry)
+        used += cost
+        shown += 1
+
+    remaining = len(entries) - shown
+    if remaining > 0:
+        parts.append(_more_marker(offset + 1, shown, len(entries)))
+    elif offset and offset >= len(entries):
+        parts.append(f"[No entries at offset {offset}; {len(entries)} total]")
+    return "".join(parts).strip()
+
+
+def _more_marker(first: int, last: int, total: int) -> str:
+    return f"[Showing {first}-{last} of {total}; {total - last} {MORE_AVAILABLE}{last}]"
+
+
+@dataclass
+class ToolOutputStats:
+    calls: int = 0
+    tokens: int = 0
+    max_tokens: int = 0
+    truncated: int = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "tokens": self.tokens,
+            "max_tokens": self.max_tokens,
+            "avg_tokens": self.tokens / self.calls if self.calls else 0.0,
+            "truncated": self.truncated,
+        }
+
+
+class ToolOutputMeter:
+    """Counts the tokens of every tool output, per call and per tool."""
+
+    def __init__(self):
+        self.stats: Dict[str, ToolOutputStats] = {}
+
+    def record(self, tool: str, text: str) -> str:
+        """Count and log the tokens of one tool output; returns the text unchanged."""
+        tokens = count_tokens(text)
+        stats = self.stats.setdefault(tool, ToolOutputStats())
+        stats.calls += 1
+        stats.tokens += tokens
+        stats.max_tokens = max(stats.max_tokens, tokens)
+        OUTPUT_TOKENS.observe(tokens, tool=tool)
+        truncated = MORE_AVAILABLE in text
+        if truncated:
+            stats.truncated += 1
+            TRUNCATED_OUTPUTS.inc(tool=tool)
+        logger.info(
+            f"{tool} output: {tokens} tokens" + (" (truncated)" if truncated else ""),
+            extra={"tool": tool, "tokens": tokens, "truncated": truncated},
+        )
+        return text
+
+    def as_dict(self) -> dict:
+        return {tool: stats.as_dict() for tool, stats in self.stats.items()}
+
+
+# Global meter for tool output tokens
+tool_output_meter = ToolOutputMeter()
@@ -0,0 +1,62 @@
+"""
+Output encodings for tool results.
+`prose` is the original bulleted, labelled text. `tsv` and `json` are
+compact encodings: a header row naming the columns once, then one line per
+entry (tab-separated values, or a JSON array per line), which drops the
+bullets and labels prose repeats on every row. TOOL_OUTPUT_FORMAT selects
+the encoding for every tool; see benchmarks/bench_tool_formats.py for the
+tokens each one costs.
+"""
+import json
+from typing import Any, Dict, List
+
+from decouple import config
+
+# Set up logging
+from logging_config import get_logger
+logger = get_logger(__name__)
+
+PROSE, TSV, JSON = "prose", "tsv", "json"
+FORMATS = (PROSE, TSV, JSON)
+
+TOOL_OUTPUT_FORMAT = config("TOOL_OUTPUT_FORMAT", default=PROSE).lower()
+if TOOL_OUTPUT_FORMAT not in FORMATS:
+    logger.warning(f"Unknown TOOL_OUTPUT_FORMAT '{TOOL_OUTPUT_FORMAT}', using '{PROSE}'")
+    TOOL_OUTPUT_FORMAT = PROSE
+
+
+def _json(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _cell(value: Any) -> str:
+    """One TSV cell: lists joined with '; ', missing values empty, no tabs or newlines."""
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple)):
+        return "; ".join(_cell(item) for item in value)
+    if isinstance(value, bool):
+        return "yes" if value else "no"
+    return " ".join(str(value).split())
+
+
+def table_header(title: str, total: int, columns: List[str], fmt: str) -> str:
+    """Title line plus the column header row of a compact table."""
+    if fmt == JSON:
+        return _json({"title": title, "total": total, "columns": columns}) + "\n"
+    return f"{title} ({total} total)\n" + "\t".join(columns) + "\n"
+
+
+def table_row(values: List[Any], fmt: str) -> str:
+    """One entry of a compact table, values in column order."""
+    if fmt == JSON:
+        return _json(values) + "\n"
+    return "\t".join(_cell(value) for value in values) + "\n"
+
+
+def record(title: str, fields: Dict[str, Any], fmt: str) -> str:
+    """A single compact record: one JSON object, or `key<TAB>value` lines."""
+    if fmt == JSON:
+        return _json({"title": title, **fields})
+    lines = [title] + [f"{key}\t{_cell(value)}" for key, value in fields.items()]
+    return "\n".join(lines)
@@ -1,39 +1,49 @@
+import asyncio
+
 from agents import function_tool
-from sanity_client import query_sanity
+from sanity_client import aquery_sanity
+from portfolio_bundle import portfolio_bundle
+from query_registry import queries
+from retrieval import retrieval_index, DEFAULT_TOP_K
+from token_budget import render_page, token_budget, tool_output_meter
+from tool_formats import PROSE, record, table_header, table_row
+import tool_formats
 import logging
 
 # Set up logging
 from logging_config import get_logger
 logger = get_logger(__name__)
 
+# Fields the list tools can return, besides each entry's name or title
+SKILL_FIELDS = ("category", "proficiency", "percentage", "yearsOfExperience")
+PROJECT_FIELDS = ("tagline", "technologies", "githubUrl", "liveUrl")
+EXPERIENCE_FIELDS = ("dates", "technologies", "responsibilities", "achievements")
 
-@function_tool
-def get_profile() -> str:
-    """Get complete profile information including name, bio, and contact details."""
-    logger.info("Executing get_profile tool")
-    query = '''
-    *[_id == "singleton-profile" && !(_id in path("drafts.**"))][0]{
-        firstName,
-        lastName,
-        headline,
-        shortBio,
-        email,
-        phone,
-        location,
-        availability,
-        yearsOfExperience,
-        "profileImageUrl": profileImage.asset->url,
-        socialLinks
-    }
-    '''
-
-    result = query_sanity(query, use_cdn=False)
+
+def _select_fields(fields: list[str] | None, available: tuple) -> tuple:
+    """Requested fields in display order; unknown names are ignored and none means all."""
+    selected = tuple(name for name in available if name in (fields or ()))
+    return selected or available
+
+
+async def fetch_profile() -> str:
+    """Fetch and format the profile from Sanity (shared by the tool and agent priming)."""
+    bundle = await portfolio_bundle.get()
+    if bundle is not None:
+        return bundle.rendered(
+            ("get_profile", tool_formats.TOOL_OUTPUT_FORMAT), lambda: _format_profile(bundle.profile)
+        )
+
+    result = await aquery_sanity(queries["profile.singleton"], use_cdn=False)
     # Fallback: if singleton-profile ID fails, try querying by type
     if not result:
         logger.debug("singleton-profile ID query returned nothing, trying by type")
-        query_by_type = '*[_type == "profile" && !(_id in path("drafts.**"))][0]'
-        result = query_sanity(query_by_type, use_cdn=False)
+        result = await aquery_sanity(queries["profile.by_type"], use_cdn=False)
+
+    return _format_profile(result)
 
+
+def _format_profile(result: dict | None, fmt: str | None = None) -> str:
     logger.debug(f"get_profile raw result: {result}")
 
     if not result:
@@ -41,7 +51,20 @@ def get_profile() -> str:
         return "Profile information not available."
 
     # Format response
+    fmt = fmt or tool_formats.TOOL_OUTPUT_FORMAT
     name = f"{result.get('firstName', '')} {result.get('lastName', '')}".strip()
+    if fmt != PROSE:
+        logger.info("Profile information retrieved from Sanity", extra={"tool": "get_profile"})
+        return record("Profile", {
+            "name": name,
+            "headline": result.get('headline'),
+            "bio": result.get('shortBio'),
+            "location": result.get('location'),
+            "yearsOfExperience": result.get('yearsOfExperience', 0),
+            "availability": result.get('availability'),
+            "email": result.get('email'),
+            "phone": result.get('phone'),
+        }, fmt)
     response = f"""
 Profile Information:
 Name: {name}
@@ -59,35 +82,62 @@ Phone: {result.get('phone', 'N/A')}
 
 
 @function_tool
-def get_skills(category: str | None = None) -> str:
+async def get_profile() -> str:
+    """Get complete profile information including name, bio, and contact details."""
+    logger.info("Executing get_profile tool")
+    return tool_output_meter.record("get_profile", await fetch_profile())
+
+
+@function_tool
+async def get_skills(
+    category: str | None = None,
+    limit: int | None = None,
+    offset: int = 0,
+    fields: list[str] | None = None,
+) -> str:
     """Get skills with proficiency levels, optionally filtered by category.
 
+    Results are paged: if more skills are available the output ends with the
+    offset to call again with.
+
     Args:
         category: Optional category filter (frontend, backend, devops, ai/ml, database)
+        limit: Maximum number of skills to return
+        offset: Number of skills to skip (for the next page)
+        fields: Fields to include besides the name (category, proficiency, percentage, yearsOfExperience); all if omitted
     """
-    logger.info(f"Executing get_skills tool with category: {category}")
+    logger.info(f"Executing get_skills tool with category: {category}, limit: {limit}, offset: {offset}, fields: {fields}")
+    return tool_output_meter.record("get_skills", await fetch_skills(category, limit, offset, fields))
+
+
+async def fetch_skills(
+    category: str | None = None,
+    limit: int | None = None,
+    offset: int = 0,
+    fields: list[str] | None = None,
+) -> str:
+    """Fetch and format skills (shared by get_skills and get_portfolio_overview)."""
+    bundle = await portfolio_bundle.get()
+    if bundle is not None:
+        return bundle.rendered(
+            ("get_skills", category, limit, offset, tuple(fields or ()), tool_formats.TOOL_OUTPUT_FORMAT),
+            lambda: _format_skills(bundle.skills(category), category, limit, offset, fields),
+        )
     if category:
-        query = f'''
-        *[_type == "skill" && category == "{category}" && !(_id in path("drafts.**"))] | order(percentage desc) {{
-            name,
-            category,
-            proficiency,
-            percentage,
-            yearsOfExperience
-        }}
-        '''
+        skills = await aquery_sanity(queries["skills.by_category"], {"category": category})
     else:
-        query = '''
-        *[_type == "skill" && !(_id in path("drafts.**"))] | order(percentage desc) {
-            name,
-            category,
-            proficiency,
-            percentage,
-            yearsOfExperience
-        }
-        '''
-
-    skills = query_sanity(query)
+        skills = await aquery_sanity(queries["skills.all"])
+    return _format_skills(skills, category, limit, offset, fields)
+
+
+def _format_skills(
+    skills: list,
+    category: str | None,
+    limit: int | None = None,
+    offset: int = 0,
+    fields: list[str] | None = None,
+    fmt: str | None = None,
+) -> str:
     logger.debug(f"get_skills raw skills: {skills}")
 
     if not skills:
@@ -95,48 +145,85 @@ def get_skills(category: str | None = None) -> str:
         return "No skills found."
 
     # Format response
-    result = f"Skills ({len(skills)} total):\n\n"
+    fmt = fmt or tool_formats.TOOL_OUTPUT_FORMAT
+    selected = _select_fields(fields, SKILL_FIELDS)
+    if fmt != PROSE:
+        # Every row would repeat the category being filtered on
+        columns = ["name", *(name for name in selected if not (category and name == "category"))]
+        entries = [table_row([skill.get(column) for column in columns], fmt) for skill in skills]
+        logger.info(f"Skills retrieved from Sanity (count: {len(skills)})", extra={"tool": "get_skills", "category": category})
+        return render_page(table_header("Skills", len(skills), columns, fmt), entries, token_budget("get_skills"), offset, limit)
+
+    entries = []
     for skill in skills:
-        result += f"• {skill['name']} ({skill.get('category', 'N/A')}): "
-        result += f"{skill.get('proficiency', 'N/A')} ({skill.get('percentage', 0)}%), "
-        result += f"{skill.get('yearsOfExperience', 0)} years\n"
+        line = f"• {skill['name']}"
+        if "category" in selected:
+            line += f" ({skill.get('category', 'N/A')})"
+        details = []
+        if "proficiency" in selected and "percentage" in selected:
+            details.append(f"{skill.get('proficiency', 'N/A')} ({skill.get('percentage', 0)}%)")
+        elif "proficiency" in selected:
+            details.append(skill.get('proficiency', 'N/A'))
+        elif "percentage" in selected:
+            details.append(f"{skill.get('percentage', 0)}%")
+        if "yearsOfExperience" in selected:
+            details.append(f"{skill.get('yearsOfExperience', 0)} years")
+        if details:
+            line += f": {', '.join(details)}"
+        entries.append(line + "\n")
 
     logger.info(f"Skills retrieved from Sanity (count: {len(skills)})", extra={"tool": "get_skills", "category": category})
-    return result.strip()
+    return render_page(f"Skills ({len(skills)} total):\n\n", entries, token_budget("get_skills"), offset, limit)
 
 
 @function_tool
-def get_projects(featured_only: bool = False) -> str:
+async def get_projects(
+    featured_only: bool = False,
+    limit: int | None = None,
+    offset: int = 0,
+    fields: list[str] | None = None,
+) -> str:
     """Get portfolio projects with descriptions and technologies used.
 
+    Results are paged: if more projects are available the output ends with
+    the offset to call again with.
+
     Args:
         featured_only: If True, return only featured projects
+        limit: Maximum number of projects to return
+        offset: Number of projects to skip (for the next page)
+        fields: Fields to include besides the title (tagline, technologies, githubUrl, liveUrl); all if omitted
     """
-    logger.info(f"Executing get_projects tool with featured_only: {featured_only}")
-    if featured_only:
-        query = '''
-        *[_type == "project" && featured == true && !(_id in path("drafts.**"))] | order(order asc) {
-            title,
-            tagline,
-            "technologies": technologies[]->name,
-            githubUrl,
-            liveUrl,
-            "imageUrl": coverImage.asset->url
-        }
-        '''
-    else:
-        query = '''
-        *[_type == "project" && !(_id in path("drafts.**"))] | order(order asc) {
-            title,
-            tagline,
-            "technologies": technologies[]->name,
-            githubUrl,
-            liveUrl,
-            "imageUrl": coverImage.asset->url
-        }
-        '''
-
-    projects = query_sanity(query)
+    logger.info(f"Executing get_projects tool with featured_only: {featured_only}, limit: {limit}, offset: {offset}, fields: {fields}")
+    return tool_output_meter.record("get_projects", await fetch_projects(featured_only, limit, offset, fields))
+
+
+async def fetch_projects(
+    featured_only: bool = False,
+    limit: int | None = None,
+    offset: int = 0,
+    fields: list[str] | None = None,
+) -> str:
+    """Fetch and format projects (shared by get_projects and get_portfolio_overview)."""
+    bundle = await portfolio_bundle.get()
+    if bundle is not None:
+        return bundle.rendered(
+            ("get_projects", featured_only, limit, offset, tuple(fields or ()), tool_formats.TOOL_OUTPUT_FORMAT),
+            lambda: _format_projects(bundle.projects(featured_only), featured_only, limit, offset, fields),
+        )
+    template = queries["projects.featured" if featured_only else "projects.all"]
+    projects = await aquery_sanity(template)
+    return _format_projects(projects, featured_only, limit, offset, fields)
+
+
+def _format_projects(
+    projects: list,
+    featured_only: bool,
+    limit: int | None = None,
+    offset: int = 0,
+    fields: list[str] | None = None,
+    fmt: str | None = None,
+) -> str:
     logger.debug(f"get_projects raw projects: {projects}")
 
     if not projects:
@@ -144,61 +231,83 @@ def get_projects(featured_only: bool = False) -> str:
         return "No projects found."
 
     # Format response
-    result = f"Projects ({len(projects)} total):\n\n"
+    fmt = fmt or tool_formats.TOOL_OUTPUT_FORMAT
+    selected = _select_fields(fields, PROJECT_FIELDS)
+    if fmt != PROSE:
+        columns = ["title", *selected]
+        entries = [table_row([project.get(column) for column in columns], fmt) for project in projects]
+        logger.info(f"Projects retrieved from Sanity (count: {len(projects)})", extra={"tool": "get_projects", "featured_only": featured_only})
+        return render_page(table_header("Projects", len(projects), columns, fmt), entries, token_budget("get_projects"), offset, limit)
+
+    entries = []
     for project in projects:
-        result += f"**{project['title']}**\n"
-        result += f"{project.get('tagline', 'N/A')}\n"
-        result += f"Technologies: {', '.join(project.get('technologies', []))}\n"
-
-        if project.get('githubUrl'):
-            result += f"GitHub: {project['githubUrl']}\n"
-        if project.get('liveUrl'):
-            result += f"Live: {project['liveUrl']}\n"
-        result += "\n"
+        parts = [f"**{project['title']}**\n"]
+        if "tagline" in selected:
+            parts.append(f"{project.get('tagline', 'N/A')}\n")
+        if "technologies" in selected:
+            parts.append(f"Technologies: {', '.join(project.get('technologies', []))}\n")
+
+        if "githubUrl" in selected and project.get('githubUrl'):
+            parts.append(f"GitHub: {project['githubUrl']}\n")
+        if "liveUrl" in selected and project.get('liveUrl'):
+            parts.append(f"Live: {project['liveUrl']}\n")
+        parts.append("\n")
+        entries.append("".join(parts))
 
     logger.info(f"Projects retrieved from Sanity (count: {len(projects)})", extra={"tool": "get_projects", "featured_only": featured_only})
-    return result.strip()
+    return render_page(f"Projects ({len(projects)} total):\n\n", entries, token_budget("get_projects"), offset, limit)
 
 
 @function_tool
-def search_experience(query_param: str | None = None) -> str:
+async def search_experience(
+    query_param: str | None = None,
+    limit: int | None = None,
+    offset: int = 0,
+    fields: list[str] | None = None,
+) -> str:
     """Search work experience by company name or position.
 
+    Results are paged: if more positions are available the output ends with
+    the offset to call again with.
+
     Args:
         query_param: Search term for company or position
+        limit: Maximum number of positions to return
+        offset: Number of positions to skip (for the next page)
+        fields: Fields to include besides position and company (dates, technologies, responsibilities, achievements); all if omitted
     """
-    logger.info(f"Executing search_experience tool with query: {query_param}")
+    logger.info(f"Executing search_experience tool with query: {query_param}, limit: {limit}, offset: {offset}, fields: {fields}")
+    return tool_output_meter.record("search_experience", await fetch_experience(query_param, limit, offset, fields))
+
+
+async def fetch_experience(
+    query_param: str | None = None,
+    limit: int | None = None,
+    offset: int = 0,
+    fields: list[str] | None = None,
+) -> str:
+    """Fetch and format work experience (shared by search_experience and get_portfolio_overview)."""
+    bundle = await portfolio_bundle.get()
+    if bundle is not None:
+        return bundle.rendered(
+            ("search_experience", query_param, limit, offset, tuple(fields or ()), tool_formats.TOOL_OUTPUT_FORMAT),
+            lambda: _format_experience(bundle.experience(query_param), query_param, limit, offset, fields),
+        )
     if query_param:
-        groq_query = f'''
-        *[_type == "experience" && !(_id in path("drafts.**")) && (
-            company match "{query_param}*" ||
-            position match "{query_param}*"
-        )] | order(startDate desc) {{
-            company,
-            position,
-            startDate,
-            endDate,
-            current,
-            "technologies": technologies[]->name,
-            responsibilities,
-            achievements
-        }}
-        '''
+        experience = await aquery_sanity(queries["experience.search"], {"pattern": f"{query_param}*"})
     else:
-        groq_query = '''
-        *[_type == "experience" && !(_id in path("drafts.**"))] | order(startDate desc) {
-            company,
-            position,
-            startDate,
-            endDate,
-            current,
-            "technologies": technologies[]->name,
-            responsibilities,
-            achievements
-        }
-        '''
-
-    experience = query_sanity(groq_query)
+        experience = await aquery_sanity(queries["experience.all"])
+    return _format_experience(experience, query_param, limit, offset, fields)
+
+
+def _format_experience(
+    experience: list,
+    query_param: str | None,
+    limit: int | None = None,
+    offset: int = 0,
+    fields: list[str] | None = None,
+    fmt: str | None = None,
+) -> str:
     logger.debug(f"search_experience raw experience: {experience}")
 
     if not experience:
@@ -206,57 +315,89 @@ def search_experience(query_param: str | None = None) -> str:
         return "No experience found."
 
     # Format response
-    result = f"Work Experience ({len(experience)} positions):\n\n"
+    fmt = fmt or tool_formats.TOOL_OUTPUT_FORMAT
+    selected = _select_fields(fields, EXPERIENCE_FIELDS)
+    if fmt != PROSE:
+        columns = ["position", "company"]
+        for name in selected:
+            columns.extend(["startDate", "endDate"] if name == "dates" else [name])
+        entries = []
+        for job in experience:
+            row = {**job, "endDate": "Present" if job.get('current') else job.get('endDate')}
+            entries.append(table_row([row.get(column) for column in columns], fmt))
+        logger.info(f"Experience retrieved from Sanity (count: {len(experience)})", extra={"tool": "search_experience", "query": query_param})
+        return render_page(
+            table_header("Work Experience", len(experience), columns, fmt), entries, token_budget("search_experience"), offset, limit
+        )
+
+    entries = []
     for job in experience:
-        end_date = "Present" if job.get('current') else job.get('endDate', 'N/A')
-        result += f"**{job['position']} at {job['company']}**\n"
-        result += f"{job.get('startDate', 'N/A')} - {end_date}\n"
-        
-        if job.get('technologies'):
-            result += f"Technologies: {', '.join(job['technologies'])}\n"
-            
-        if job.get('responsibilities'):
-            result += "Responsibilities:\n"
-            for resp in job['responsibilities']:
-                result += f"  • {resp}\n"
-                
-        if job.get('achievements'):
-            result += "Key Achievements:\n"
-            for ach in job['achievements']:
-                result += f"  • {ach}\n"
-        result += "\n"
+        parts = [f"**{job['position']} at {job['company']}**\n"]
+        if "dates" in selected:
+            end_date = "Present" if job.get('current') else job.get('endDate', 'N/A')
+            parts.append(f"{job.get('startDate', 'N/A')} - {end_date}\n")
+
+        if "technologies" in selected and job.get('technologies'):
+            parts.append(f"Technologies: {', '.join(job['technologies'])}\n")
+
+        if "responsibilities" in selected and job.get('responsibilities'):
+            parts.append("Responsibilities:\n")
+            parts.extend(f"  • {resp}\n" for resp in job['responsibilities'])
+
+        if "achievements" in selected and job.get('achievements'):
+            parts.append("Key Achievements:\n")
+            parts.extend(f"  • {ach}\n" for ach in job['achievements'])
+        parts.append("\n")
+        entries.append("".join(parts))
 
     logger.info(f"Experience retrieved from Sanity (count: {len(experience)})", extra={"tool": "search_experience", "query": query_param})
-    return result.strip()
+    return render_page(
+        f"Work Experience ({len(experience)} positions):\n\n", entries, token_budget("search_experience"), offset, limit
+    )
 
 
 @function_tool
-def check_availability() -> str:
+async def check_availability() -> str:
     """Check if available for work, projects, or consultations."""
     logger.info("Executing check_availability tool")
-    query = '''
-    *[_id == "singleton-profile" || (_type == "profile" && !(_id in path("drafts.**")))][0]{
-        availability,
-        email,
-        "services": *[_type == "service" && !(_id in path("drafts.**"))] | order(order asc){
-            title,
-            shortDescription,
-            pricing
-        }
-    }
-    '''
-
-    result = query_sanity(query)
+    return tool_output_meter.record("check_availability", await fetch_availability())
+
+
+async def fetch_availability() -> str:
+    """Fetch and format availability and services (shared by check_availability and get_portfolio_overview)."""
+    bundle = await portfolio_bundle.get()
+    if bundle is not None:
+        return bundle.rendered(
+            ("check_availability", tool_formats.TOOL_OUTPUT_FORMAT), lambda: _format_availability(bundle.availability)
+        )
+    return _format_availability(await aquery_sanity(queries["availability"]))
+
+
+def _format_availability(result: dict | None, fmt: str | None = None) -> str:
     logger.debug(f"check_availability raw result: {result}")
 
     if not result:
         logger.warning("Availability information not available from Sanity")
         return "Availability information not available."
 
-    response = f"Availability Status: {result.get('availability', 'Not specified')}\n\n"
+    fmt = fmt or tool_formats.TOOL_OUTPUT_FORMAT
+    if fmt != PROSE:
+        services = result.get('services') or []
+        columns = ["title", "startingPrice", "priceType", "shortDescription"]
+        parts = [record("Availability", {"status": result.get('availability', 'Not specified'), "contact": result.get('email')}, fmt)]
+        if services:
+            parts.append("\n" + table_header("Services", len(services), columns, fmt))
+            for service in services:
+                pricing = service.get('pricing') or {}
+                row = {**service, "startingPrice": pricing.get('startingPrice'), "priceType": pricing.get('priceType')}
+                parts.append(table_row([row.get(column) for column in columns], fmt))
+        logger.info("Availability information retrieved from Sanity", extra={"tool": "check_availability"})
+        return "".join(parts).strip()
+
+    parts = [f"Availability Status: {result.get('availability', 'Not specified')}\n\n"]
 
     if result.get('services'):
-        response += "Services Offered:\n"
+        parts.append("Services Offered:\n")
         for service in result['services']:
             pricing = service.get('pricing', {})
             price_str = "Contact for pricing"
@@ -264,12 +405,69 @@ def check_availability() -> str:
                 price_str = f"From ${pricing['startingPrice']}"
                 if pricing.get('priceType'):
                     price_str += f" ({pricing['priceType']})"
-            
-            response += f"• {service['title']}: {price_str}\n"
+
+            parts.append(f"• {service['title']}: {price_str}\n")
             if service.get('shortDescription'):
-                response += f"  {service['shortDescription']}\n"
+                parts.append(f"  {service['shortDescription']}\n")
 
-    response += f"\nContact: {result.get('email', 'N/A')}"
+    parts.append(f"\nContact: {result.get('email', 'N/A')}")
 
     logger.info("Availability information retrieved from Sanity", extra={"tool": "check_availability"})
-    return response.strip()
\ No newline at end of file
+    return "".join(parts).strip()
+
+
+@function_tool
+async def search_portfolio(query: str, top_k: int = DEFAULT_TOP_K) -> str:
+    """Find the passages of the portfolio (profile, projects, experience, blog posts,
+    testimonials) most relevant to a free-form question.
+
+    Args:
+        query: The question or keywords to look up
+        top_k: Maximum number of passages to return
+    """
+    logger.info(f"Executing search_portfolio tool with query: {query}, top_k: {top_k}")
+    await retrieval_index.refresh()
+    snippets = retrieval_index.search(query, top_k)
+    return tool_output_meter.record("search_portfolio", _format_snippets(snippets, query))
+
+
+def _format_snippets(snippets: list, query: str, fmt: str | None = None) -> str:
+    if not snippets:
+        logger.warning(f"No portfolio passages match '{query}'")
+        return f"No portfolio content matches '{query}'."
+
+    fmt = fmt or tool_formats.TOOL_OUTPUT_FORMAT
+    if fmt != PROSE:
+        entries = [table_row([s.chunk.kind, s.chunk.title, s.chunk.text], fmt) for s in snippets]
+        header = table_header("Portfolio matches", len(snippets), ["kind", "title", "text"], fmt)
+    else:
+        entries = [f"• [{s.chunk.kind}] {s.chunk.title}: {s.chunk.text}\n" for s in snippets]
+        header = f"Portfolio matches for '{query}' ({len(snippets)}):\n\n"
+
+    logger.info(f"Portfolio passages retrieved (count: {len(snippets)})", extra={"tool": "search_portfolio", "query": query})
+    return render_page(header, entries, token_budget("search_portfolio"))
+
+
+# Sections of get_portfolio_overview, in output order, and what renders each
+OVERVIEW_SECTIONS = {
+    "profile": fetch_profile,
+    "skills": fetch_skills,
+    "projects": fetch_projects,
+    "experience": fetch_experience,
+    "availability": fetch_availability,
+}
+
+
+@function_tool
+async def get_portfolio_overview(sections: list[str] | None = None) -> str:
+    """Get several portfolio sections in one call. Prefer this for broad questions
+    (e.g. "tell me about yourself") instead of calling the individual tools in turn.
+
+    Args:
+        sections: Sections to include (profile, skills, projects, experience, availability); all if omitted
+    """
+    logger.info(f"Executing get_portfolio_overview tool with sections: {sections}")
+    names = [name for name in OVERVIEW_SECTIONS if name in (sections or ())] or list(OVERVIEW_SECTIONS)
+    # The sections share one bundle fetch; without a bundle their queries run concurrently
+    outputs = await asyncio.gather(*(OVERVIEW_SECTIONS[name]() for name in names))
+    return tool_output_meter.record("get_portfolio_overview", "\n\n".join(outputs))
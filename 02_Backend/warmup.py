@@ -0,0 +1,154 @@
+"""
+Startup warmup and readiness.
+On a cold container the first visitor would otherwise pay for the first
+Sanity and LLM handshakes, the portfolio fetch and building the agents.
+`warmup.start()` runs those phases in the background at startup and
+records how long each took; `/healthz/ready` reports 503 until it has
+finished so the platform only routes traffic to a warm instance.
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
+
+from decouple import config
+
+from agent import agent_cache, open_llm_connection
+from document_store import OFFLINE_MODE
+from metrics import metrics
+from portfolio_bundle import portfolio_bundle
+from retrieval import retrieval_index
+from sanity_client import sanity
+
+# Set up logging
+from logging_config import get_logger
+logger = get_logger(__name__)
+
+# Report ready anyway once warmup has run this long, so a slow dependency
+# cannot keep the instance out of rotation forever
+WARMUP_TIMEOUT = config("WARMUP_TIMEOUT", default=30.0, cast=float)
+WARMUP_LLM_ENABLED = config("WARMUP_LLM_ENABLED", default=True, cast=bool)
+
+# Smallest query that opens a connection to the Sanity CDN
+_PING_QUERY = '*[_type == "profile"][0]._id'
+
+WARMUP_PHASE_SECONDS = metrics.gauge("warmup_phase_seconds", "Duration of each startup warmup phase", ("phase",))
+WARMUP_READY = metrics.gauge("warmup_ready", "1 once startup warmup has finished")
+
+
+@dataclass
+class PhaseResult:
+    name: str
+    seconds: float
+    ok: bool
+    error: Optional[str] = None
+
+    def as_dict(self) -> dict:
+        result = {"phase": self.name, "seconds": round(self.seconds, 4), "ok": self.ok}
+        if self.error:
+            result["error"] = self.error
+        return result
+
+
+Phase = Callable[[], Awaitable[object]]
+
+
+async def _open_sanity() -> None:
+    if OFFLINE_MODE:
+        return
+    await sanity.fetch(_PING_QUERY, use_cdn=True)
+
+
+async def _fetch_portfolio() -> None:
+    if await portfolio_bundle.get() is None:
+        raise RuntimeError("portfolio bundle unavailable")
+
+
+async def _open_llm() -> None:
+    if WARMUP_LLM_ENABLED:
+        await open_llm_connection()
+
+
+def default_stages() -> List[Dict[str, Phase]]:
+    """
+    Warmup phases grouped into stages. Phases in a stage run concurrently;
+    stages run in order because agents are primed from the fetched portfolio.
+    """
+    return [
+        {"sanity": _open_sanity, "llm": _open_llm},
+        {"portfolio": _fetch_portfolio},
+        {"agents": agent_cache.warm, "retrieval": retrieval_index.refresh},
+    ]
+
+
+class Warmup:
+    """Runs the startup phases once and tracks readiness."""
+
+    def __init__(self, stages: Optional[Sequence[Dict[str, Phase]]] = None, timeout: float = WARMUP_TIMEOUT):
+        self._stages = stages
+        self.timeout = timeout
+        self.phases: List[PhaseResult] = []
+        self.ready = False
+        self.timed_out = False
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def _phase(self, name: str, phase: Phase) -> None:
+        started = time.perf_counter()
+        try:
+            await phase()
+            result = PhaseResult(name, time.perf_counter() - started, True)
+        except Exception as e:
+            result = PhaseResult(name, time.perf_counter() - started, False, str(e) or type(e).__name__)
+            logger.warning(f"Warmup phase '{name}' failed: {result.error}")
+        self.phases.append(result)
+        WARMUP_PHASE_SECONDS.set(result.seconds, phase=name)
+
+    async def _run_stages(self) -> None:
+        for stage in self._stages if self._stages is not None else default_stages():
+            await asyncio.gather(*(self._phase(name, phase) for name, phase in stage.items()))
+
+    async def run(self) -> None:
+        """Run every phase, then mark the instance ready (also after a timeout)."""
+        self.started_at = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._run_stages(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self.timed_out = True
+            logger.warning(f"Warmup timed out after {self.timeout:.1f}s, serving anyway")
+        self.finished_at = time.perf_counter()
+        self.ready = True
+        WARMUP_READY.set(1)
+        timings = ", ".join(f"{p.name}={p.seconds * 1000:.0f}ms{'' if p.ok else ' (failed)'}" for p in self.phases)
+        logger.info(f"Warmup finished in {(self.finished_at - self.started_at) * 1000:.0f}ms: {timings}")
+
+    def start(self) -> asyncio.Task:
+        """Start warmup in the background (once)."""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def report(self) -> dict:
+        """Readiness and per-phase timings, as served on /healthz/ready."""
+        total = None
+        if self.started_at is not None:
+            total = (self.finished_at or time.perf_counter()) - self.started_at
+        return {
+            "status": "ready" if self.ready else "warming",
+            "timed_out": self.timed_out,
+            "total_seconds": round(total, 4) if total is not None else None,
+            "phases": [phase.as_dict() for phase in self.phases],
+        }
+
+
+# Global warmup, started from the app lifespan
+warmup = Warmup()